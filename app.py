@@ -9,11 +9,22 @@ try:
 except ImportError:
     pass
 
+import os
+from datetime import date, timedelta
+from pathlib import Path
 import streamlit as st
-import chromadb
 from embedding_service import get_embedding_model
 from chunk_subtitles import format_timestamp
-import time
+from search_metrics import get_search_metrics, NULL_TIMER
+from index_snapshots import IndexManager
+from index_bundle import BUNDLE_FILE, DEFAULT_BUNDLE_PATH, IndexBundle
+from search_filters import SearchFilter, available_attributes, query_index
+from ranking import PriorRanker, VideoPriors, similarity_scores
+from semantic_cache import SemanticCache
+from query_preprocessing import DEFAULT_DICTIONARY_PATH, QueryPreprocessor, load_dictionary
+from result_cards import render_cards, youtube_url
+from result_pages import DEFAULT_DEPTH, ResultPages
+from thumbnails import DEFAULT_THUMBNAIL_DIR, ThumbnailCache
 
 # 페이지 설정
 st.set_page_config(
@@ -68,6 +79,14 @@ st.markdown("""
         display: flex;
         flex-direction: column;
     }
+    /* 순위 번호 (카드 HTML은 순위와 무관하게 캐시) */
+    .result-list {
+        counter-reset: rank;
+    }
+    .result-list .video-title::before {
+        counter-increment: rank;
+        content: counter(rank) ". ";
+    }
     .video-title {
         font-size: 1.15rem;
         font-weight: 600;
@@ -152,48 +171,183 @@ st.title("🐻 박곰희TV 영상 추천 봇")
 st.markdown("궁금한 점을 물어보세요! 박곰희TV 영상 중에서 가장 관련 있는 부분을 찾아드립니다.")
 
 # 기본 설정
-model_type = "kosbert"
-top_k = 2
+model_type = "kosbert"  # ChromaDB 인덱스(번들 없음)에서 사용할 모델
+# 한 번에 보여줄 결과 수 (검색 옵션에서 변경)
+PAGE_SIZES = [2, 5, 10]
+# 질문당 한 번 가져와 두는 순위 목록 길이 (더 보기/결과 수 변경/같은 영상 더 보기는 이 목록에서 보여줌)
+search_depth = int(os.getenv("SEARCH_DEPTH", str(DEFAULT_DEPTH)))
+# 2단계 검색: 이진 부호로 먼저 고를 후보 수 (0이면 정확 검색, 청크가 많아질 때 SEARCH_SHORTLIST=300 등으로 사용)
+search_shortlist = int(os.getenv("SEARCH_SHORTLIST", "0")) or None
 
 # 리소스 로딩 (캐싱)
-@st.cache_resource
-def load_resources(model_type):
-    # ChromaDB 로드
-    client = chromadb.PersistentClient(path="data/chroma_db")
-    collection = client.get_collection(name="gomhee_videos")
+def load_collection(version, path, manifest):
+    """
+    인덱스 로드 + 워밍업
+    스냅샷에 번들이 있으면 번들(mmap), 없으면 ChromaDB.
+    배포된 스냅샷이 없으면 배포용 번들(GOMHEE_INDEX_BUNDLE 또는 data/gomhee_index.bundle), 그마저 없으면 기존 data/chroma_db
+    """
+    if path is None:
+        bundle_path = Path(os.getenv("GOMHEE_INDEX_BUNDLE", DEFAULT_BUNDLE_PATH))
+        if bundle_path.exists():
+            return IndexBundle(bundle_path)
+        import chromadb
+        client = chromadb.PersistentClient(path="data/chroma_db")
+        return client.get_collection(name="gomhee_videos")
     
-    # 임베딩 모델 로드
-    embedding_model = get_embedding_model(model_type)
+    if (path / BUNDLE_FILE).exists():
+        collection = IndexBundle(path / BUNDLE_FILE)
+        # 교체 직후 첫 요청이 인덱스 로딩 비용을 떠안지 않도록 공간마다 미리 한 번 조회
+        for space in collection.spaces:
+            dimension = collection.space_info(space)["dimension"]
+            collection.query(query_embeddings=[[0.0] * dimension], n_results=1, space=space)
+        return collection
     
-    return collection, embedding_model
+    import chromadb
+    client = chromadb.PersistentClient(path=str(path / "chroma"))
+    collection = client.get_collection(name=manifest["collection_name"])
+    collection.query(query_embeddings=[[0.0] * manifest["dimension"]], n_results=1)
+    return collection
+
+@st.cache_resource
+def load_resources():
+    # 인덱스 로드 (새 스냅샷이 배포되면 백그라운드에서 교체)
+    return IndexManager(load_collection, check_interval=float(os.getenv("INDEX_CHECK_INTERVAL", "5")))
+
+# 임베딩 모델 (공간마다 하나, 처음 사용할 때 로드)
+@st.cache_resource
+def load_embedding_model(model_type):
+    return get_embedding_model(model_type)
+
+# 검색 지연 시간 메트릭 (세션 간 공유, SEARCH_METRICS 환경변수로 활성화)
+@st.cache_resource
+def load_metrics():
+    return get_search_metrics()
 
 try:
-    collection, embedding_model = load_resources(model_type)
+    index_manager = load_resources()
 except Exception as e:
     st.error(f"리소스 로딩 중 오류 발생: {e}")
     st.stop()
 
+metrics = load_metrics()
+
+# 비슷한 질문의 검색 결과 캐시 (세션 간 공유)
+@st.cache_resource
+def load_semantic_cache():
+    return SemanticCache(
+        max_entries=int(os.getenv("SEMANTIC_CACHE_SIZE", "512")),
+        threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+    )
+
+semantic_cache = load_semantic_cache()
+
+# 질문 전처리 (약어 사전 로드, 결과는 메모이즈)
+# 빌드마다 약어 사전이 다시 만들어지므로 파일 수정 시각을 키로 사용 (바뀌면 새로 로드, 이전 것은 버림)
+@st.cache_resource(max_entries=1)
+def load_preprocessor(dictionary_mtime):
+    return QueryPreprocessor(load_dictionary(DEFAULT_DICTIONARY_PATH))
+
+def dictionary_mtime(path=DEFAULT_DICTIONARY_PATH):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+preprocessor = load_preprocessor(dictionary_mtime())
+
+# 정규화된 질문 -> 임베딩 (같은 질문은 모델 호출 없이 재사용)
+# 함수 본문은 캐시 미스일 때만 실행되므로 호출 수로 적중 여부를 기록 (rerun마다 새로 만들어짐)
+embedding_calls = {"count": 0}
+
+@st.cache_data(max_entries=1024, show_spinner=False)
+def embed_normalized_query(normalized_query, model_type):
+    embedding_calls["count"] += 1
+    return load_embedding_model(model_type).embed_query(normalized_query)
+
+# 이번 실행(rerun)에서 사용할 인덱스 버전 고정
+index_handle = index_manager.get()
+collection = index_handle.index
+
+# 검색할 임베딩 공간 (모델 A/B 비교: ?space=openai 또는 INDEX_SPACE 환경변수, 기본은 번들의 기본 공간)
+# ChromaDB 인덱스는 기본 공간만 지원
+space = None
+if isinstance(collection, IndexBundle):
+    space = st.query_params.get("space") or os.getenv("INDEX_SPACE")
+    if space not in collection.spaces:
+        space = collection.default_space
+    model_type = collection.space_info(space).get("model_type", space)
+else:
+    model_type = index_handle.manifest.get("model_type", model_type)
+
+try:
+    embedding_model = load_embedding_model(model_type)
+except Exception as e:
+    st.error(f"임베딩 모델 로딩 중 오류 발생: {e}")
+    st.stop()
+
+# 조회수/최신성 prior 재정렬 (번들은 빌드 시 계산된 배열, ChromaDB는 영상 메타데이터로 계산)
+def make_ranker(handle):
+    # 번들이면 prior 배열이 번들 mmap을 참조하므로 버전별 전역 캐시가 아닌 handle에 붙여 교체 시 함께 해제
+    index = handle.index
+    priors = index.priors if isinstance(index, IndexBundle) else VideoPriors.from_metadata_file()
+    return PriorRanker(priors)
+
+ranker = index_handle.derived("ranker", make_ranker)
+
+# 이 인덱스에 값이 기록된 필터 속성 (이전 빌드/data/chroma_db에는 업로드 날짜, 쇼츠 여부가 없을 수 있음)
+filter_attributes = index_handle.derived(
+    "filter_attributes", lambda handle: available_attributes(handle.index, handle.manifest or None)
+)
+
+# 썸네일 로컬 캐시 (python thumbnails.py build로 생성, 없는 영상은 YouTube 썸네일 주소)
+@st.cache_resource
+def load_thumbnails():
+    return ThumbnailCache(os.getenv("THUMBNAIL_DIR", DEFAULT_THUMBNAIL_DIR))
+
+thumbnails = load_thumbnails()
+
 # 검색 함수
-def search_videos(query, top_k=3):
+def search_videos(query, depth=DEFAULT_DEPTH, timer=NULL_TIMER, search_filter=None):
+    # 쿼리 정규화 (NFC, 문장부호/이모지 제거, 약어 표기 통일, 요청 어미 제거)
+    with timer.stage("normalize"):
+        query = preprocessor(query)
+    
     # 쿼리 임베딩
-    query_embedding = embedding_model.embed_query(query)
+    with timer.stage("embedding"):
+        misses = embedding_calls["count"]
+        query_embedding = embed_normalized_query(query, model_type)
+    timer.flag("embedding_cache", embedding_calls["count"] == misses)
     
-    # 검색
-    results = collection.query(
-        query_embeddings=[query_embedding.tolist()],
-        n_results=top_k
-    )
+    # 비슷한 질문에 답한 적이 있으면 그 결과 사용 (인덱스 버전/공간/목록 길이/필터가 같을 때만)
+    context = (index_handle.version, space, depth, search_filter.key() if search_filter else None)
+    cached, _ = semantic_cache.lookup(query_embedding, context)
+    timer.flag("semantic_cache", cached is not None)
+    if cached is not None:
+        with timer.stage("format"):
+            return format_results(cached)
+    
+    # 검색 (필터 조건이 있으면 후보 청크만 검색)
+    with timer.stage("vector_search"):
+        results = query_index(collection, query_embedding, ranker.fetch_size(depth), search_filter, space,
+                              search_shortlist, filter_attributes)
+    
+    # 후보를 유사도 + prior 점수로 재정렬
+    with timer.stage("rerank"):
+        results = ranker.rerank(results, depth)
+    semantic_cache.store(query_embedding, results, context)
     
+    with timer.stage("format"):
+        return format_results(results)
+
+def format_results(results):
     formatted_results = []
-    for doc, metadata, distance in zip(
+    for doc, metadata, similarity in zip(
         results['documents'][0],
         results['metadatas'][0],
-        results['distances'][0]
+        similarity_scores(results)
     ):
-        start_seconds = int(metadata['start_time'])
-        url = f"https://www.youtube.com/watch?v={metadata['video_id']}&t={start_seconds}s"
-        # 고해상도 썸네일 사용 (hqdefault or maxresdefault)
-        thumbnail_url = f"https://img.youtube.com/vi/{metadata['video_id']}/hqdefault.jpg"
+        url = youtube_url(metadata['video_id'], int(metadata['start_time']))
+        thumbnail_url, thumbnail_srcset = thumbnails.sources(metadata['video_id'])
         
         formatted_results.append({
             'title': metadata['title'],
@@ -203,8 +357,9 @@ def search_videos(query, top_k=3):
             'timestamp': format_timestamp(metadata['start_time']),
             'url': url,
             'thumbnail': thumbnail_url,
+            'thumbnail_srcset': thumbnail_srcset,
             'snippet': doc,
-            'similarity_score': 1 - distance
+            'similarity_score': similarity
         })
     
     return formatted_results
@@ -219,31 +374,58 @@ def set_query(q):
 # 메인 인터페이스
 query = st.text_input("질문을 입력하세요", placeholder="예: ISA 계좌는 어떻게 활용하나요?", key="query_input")
 
-if query:
-    with st.spinner("관련 영상을 찾고 있습니다..."):
-        start_time = time.time()
-        results = search_videos(query, top_k)
-        end_time = time.time()
-        
+# 검색 옵션
+PERIODS = {"전체 기간": None, "최근 1년": 365, "최근 3년": 365 * 3}
+with st.expander("검색 옵션"):
+    # 영상 길이/업로드 날짜가 없는 인덱스에서는 해당 옵션을 끔 (조건을 걸면 결과가 없거나 효과가 없음)
+    has_duration = bool(filter_attributes & {"video_duration", "is_short"})
+    has_dates = "upload_date" in filter_attributes
+    exclude_shorts = st.checkbox("쇼츠 제외", value=has_duration, disabled=not has_duration,
+                                 help=None if has_duration else "이 인덱스에는 영상 길이 정보가 없습니다")
+    period = st.selectbox("업로드 기간", list(PERIODS), disabled=not has_dates,
+                          help=None if has_dates else "이 인덱스에는 업로드 날짜 정보가 없습니다")
+    if not has_dates:
+        period = "전체 기간"
+    page_size = st.selectbox("한 번에 보여줄 결과 수", PAGE_SIZES)
+search_filter = SearchFilter(
+    date_from=date.today() - timedelta(days=PERIODS[period]) if PERIODS[period] else None,
+    exclude_shorts=exclude_shorts and has_duration
+)
 
+if query:
+    # 같은 질문/조건이면 이전에 가져온 목록에서 보여주기만 함 (더 보기, 결과 수 변경, 같은 영상 더 보기)
+    search_key = (query, index_handle.version, space, search_filter.key())
+    pages = st.session_state.get("result_pages")
+    if pages is None or pages.key != search_key:
+        timer = metrics.start_request()
+        with st.spinner("관련 영상을 찾고 있습니다..."):
+            results = search_videos(query, search_depth, timer, search_filter)
+        pages = st.session_state.result_pages = ResultPages(search_key, results, page_size)
+    else:
+        timer = NULL_TIMER
+    pages.set_page_size(page_size)
+    visible = pages.visible()
+    
+    if not visible:
+        st.info("조건에 맞는 영상이 없습니다. 검색 옵션을 바꿔 보세요.")
+    
+    with timer.stage("render"):
+        if pages.video_id is not None:
+            st.caption(f"이 영상에서 찾은 구간 {len(visible)}개")
+        if visible:
+            # 카드 HTML은 청크별로 캐시되고, 목록 전체를 한 번에 전송
+            st.markdown(render_cards(visible), unsafe_allow_html=True)
+    metrics.finish_request(timer)
     
-    for i, result in enumerate(results, 1):
-        st.markdown(f"""
-        <div class="video-card">
-            <a href="{result['url']}" target="_blank">
-                <div class="video-thumbnail-container">
-                    <img src="{result['thumbnail']}" class="video-thumbnail">
-                </div>
-            </a>
-            <div class="video-content">
-                <div class="video-title">{i}. {result['title']}</div>
-                <span class="timestamp-badge">⏱️ {result['timestamp']}부터 재생</span>
-                <a href="{result['url']}" target="_blank" class="watch-button">
-                    🎥 영상 보러가기
-                </a>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+    if pages.video_id is not None:
+        st.button("← 전체 결과로 돌아가기", on_click=pages.focus, args=(None,))
+    else:
+        titles = {result['video_id']: result['title'] for result in visible}
+        for video_id, count in pages.more_from_videos().items():
+            st.button(f"🎞️ {titles[video_id]} - 다른 구간 {count}개 더 보기", key=f"more_from_{video_id}",
+                      on_click=pages.focus, args=(video_id,))
+        if pages.has_more():
+            st.button("결과 더 보기", on_click=pages.more)
 
 # 추천 질문
 st.markdown("### 💡 이런 질문은 어떠세요?")
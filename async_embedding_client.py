@@ -0,0 +1,279 @@
+"""
+OpenAI 임베딩 API 비동기 클라이언트
+토큰 수 기준으로 요청을 묶고, 속도 제한 안에서 여러 요청을 동시에 보내며,
+일시적 오류는 지수 백오프로 재시도하고 완료된 배치는 체크포인트로 저장합니다.
+(중간에 실패해도 다시 실행하면 완료된 배치는 건너뜀)
+
+로컬 테스트:
+    python mock_openai_server.py  # http://127.0.0.1:8765/v1 에서 임베딩 엔드포인트 흉내
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=test python build_vector_db.py
+"""
+import asyncio
+import hashlib
+import os
+import random
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+# OpenAI 임베딩 API 요청 한도
+MAX_INPUTS_PER_REQUEST = 2048
+MAX_TOKENS_PER_REQUEST = 300_000
+MAX_TOKENS_PER_INPUT = 8191
+
+
+def pack_batches(
+    order: List[int],
+    token_counts: List[int],
+    max_tokens: int = MAX_TOKENS_PER_REQUEST,
+    max_inputs: int = MAX_INPUTS_PER_REQUEST
+) -> List[List[int]]:
+    """
+    주어진 순서대로 입력을 요청 단위로 묶습니다.
+    요청당 토큰 합이 max_tokens, 입력 개수가 max_inputs를 넘지 않습니다.
+
+    Args:
+        order: 입력 인덱스 순서 (예: 토큰 길이순)
+        token_counts: 입력별 토큰 수
+        max_tokens: 요청당 최대 토큰 합
+        max_inputs: 요청당 최대 입력 개수
+
+    Returns:
+        원본 인덱스 리스트들의 리스트
+    """
+    batches = []
+    current = []
+    current_tokens = 0
+    for i in order:
+        tokens = token_counts[i]
+        if current and (current_tokens + tokens > max_tokens or len(current) >= max_inputs):
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+class RateLimiter:
+    """분당 요청 수 / 토큰 수 한도를 지키는 비동기 토큰 버킷"""
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._request_budget = requests_per_minute or 0.0
+        self._token_budget = tokens_per_minute or 0.0
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        if self.requests_per_minute:
+            self._request_budget = min(self.requests_per_minute, self._request_budget + elapsed * self.requests_per_minute / 60)
+        if self.tokens_per_minute:
+            self._token_budget = min(self.tokens_per_minute, self._token_budget + elapsed * self.tokens_per_minute / 60)
+
+    async def acquire(self, tokens: int):
+        """요청 1건과 tokens개 토큰을 사용할 수 있을 때까지 대기"""
+        if self.tokens_per_minute:
+            # 한도보다 큰 요청은 버킷이 가득 찼을 때 보냄
+            tokens = min(tokens, self.tokens_per_minute)
+        async with self._lock:
+            while True:
+                self._refill()
+                waits = []
+                if self.requests_per_minute and self._request_budget < 1:
+                    waits.append((1 - self._request_budget) * 60 / self.requests_per_minute)
+                if self.tokens_per_minute and self._token_budget < tokens:
+                    waits.append((tokens - self._token_budget) * 60 / self.tokens_per_minute)
+                if not waits:
+                    break
+                await asyncio.sleep(max(waits))
+            if self.requests_per_minute:
+                self._request_budget -= 1
+            if self.tokens_per_minute:
+                self._token_budget -= tokens
+
+
+class BatchCheckpoint:
+    """완료된 배치 임베딩을 배치 내용 해시 기준으로 .npy 파일에 저장"""
+
+    def __init__(self, directory: str, model_name: str):
+        self.directory = Path(directory) / model_name
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.model_name = model_name
+
+    def key(self, texts: List[str]) -> str:
+        digest = hashlib.sha1(self.model_name.encode("utf-8"))
+        for text in texts:
+            digest.update(b"\0")
+            digest.update(text.encode("utf-8"))
+        return digest.hexdigest()
+
+    def load(self, key: str) -> Optional[np.ndarray]:
+        path = self.directory / f"{key}.npy"
+        if not path.exists():
+            return None
+        return np.load(path)
+
+    def save(self, key: str, embeddings: np.ndarray):
+        path = self.directory / f"{key}.npy"
+        tmp_path = self.directory / f"{key}.tmp.npy"
+        np.save(tmp_path, embeddings)
+        os.replace(tmp_path, path)
+
+
+class AsyncEmbeddingClient:
+    """OpenAI 호환 임베딩 엔드포인트 비동기 클라이언트"""
+
+    def __init__(
+        self,
+        model_name: str,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        max_concurrency: int = 4,
+        requests_per_minute: Optional[float] = 3000,
+        tokens_per_minute: Optional[float] = 1_000_000,
+        max_tokens_per_request: int = MAX_TOKENS_PER_REQUEST,
+        max_retries: int = 6,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        checkpoint_dir: Optional[str] = None,
+        timeout: float = 60.0,
+        dimension: Optional[int] = None
+    ):
+        """
+        Args:
+            model_name: 임베딩 모델 이름
+            api_key: API 키 (None이면 OPENAI_API_KEY)
+            base_url: API 주소 (None이면 OPENAI_BASE_URL 또는 기본값, 로컬 모의 서버 테스트용)
+            max_concurrency: 동시에 보낼 최대 요청 수
+            requests_per_minute: 분당 요청 한도 (None이면 제한 없음)
+            tokens_per_minute: 분당 토큰 한도 (None이면 제한 없음)
+            max_tokens_per_request: 요청당 최대 토큰 합
+            max_retries: 일시적 오류 재시도 횟수
+            backoff_base: 첫 재시도 대기 시간 (초, 이후 2배씩 증가 + jitter)
+            backoff_max: 최대 대기 시간 (초)
+            checkpoint_dir: 완료 배치 저장 디렉토리 (None이면 체크포인트 사용 안 함)
+            timeout: 요청 타임아웃 (초)
+            dimension: 예상 임베딩 차원 (빈 입력의 결과 shape에 사용, 응답을 받으면 실제 차원으로 갱신)
+        """
+        self.model_name = model_name
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.base_url = base_url or os.getenv("OPENAI_BASE_URL")
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_tokens_per_request = max_tokens_per_request
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.checkpoint = BatchCheckpoint(checkpoint_dir, model_name) if checkpoint_dir else None
+        self.dimension = dimension
+
+        # 마지막 실행 통계
+        self.stats = {"requests": 0, "retries": 0, "checkpoint_hits": 0}
+
+    def embed(self, texts: List[str], token_counts: List[int], order: Optional[List[int]] = None,
+              show_progress_bar: bool = True) -> np.ndarray:
+        """
+        텍스트 리스트를 임베딩합니다 (동기 래퍼).
+
+        Args:
+            texts: 임베딩할 텍스트
+            token_counts: 텍스트별 토큰 수
+            order: 요청을 묶을 순서 (None이면 입력 순서)
+            show_progress_bar: 진행 표시 여부
+
+        Returns:
+            입력 순서대로의 임베딩 배열 (shape: [len(texts), dim])
+        """
+        if order is None:
+            order = list(range(len(texts)))
+        batches = pack_batches(order, token_counts, max_tokens=self.max_tokens_per_request)
+        return asyncio.run(self._embed_all(texts, token_counts, batches, show_progress_bar))
+
+    async def _embed_all(self, texts, token_counts, batches, show_progress_bar):
+        from openai import AsyncOpenAI
+        from tqdm import tqdm
+
+        self.stats = {"requests": 0, "retries": 0, "checkpoint_hits": 0}
+        results: List[Optional[np.ndarray]] = [None] * len(batches)
+        limiter = RateLimiter(self.requests_per_minute, self.tokens_per_minute)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        progress = tqdm(total=len(texts), desc="OpenAI 임베딩 생성 중", disable=not show_progress_bar)
+
+        # 재시도는 직접 처리하므로 SDK 자체 재시도는 끔
+        client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0, timeout=self.timeout)
+
+        async def run_batch(n, indices):
+            batch_texts = [texts[i] for i in indices]
+            key = self.checkpoint.key(batch_texts) if self.checkpoint else None
+            cached = self.checkpoint.load(key) if self.checkpoint else None
+            if cached is not None:
+                self.stats["checkpoint_hits"] += 1
+                results[n] = cached
+            else:
+                async with semaphore:
+                    tokens = sum(token_counts[i] for i in indices)
+                    results[n] = await self._request_with_retry(client, limiter, batch_texts, tokens)
+                if self.checkpoint:
+                    self.checkpoint.save(key, results[n])
+            progress.update(len(indices))
+
+        try:
+            await asyncio.gather(*(run_batch(n, indices) for n, indices in enumerate(batches)))
+        finally:
+            progress.close()
+            await client.close()
+
+        if not batches:
+            return np.zeros((0, self.dimension or 0), dtype=np.float32)
+        self.dimension = results[0].shape[1]
+        embeddings = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for indices, batch_embeddings in zip(batches, results):
+            embeddings[indices] = batch_embeddings
+        return embeddings
+
+    async def _request_with_retry(self, client, limiter, batch_texts, tokens) -> np.ndarray:
+        import openai
+
+        attempt = 0
+        while True:
+            await limiter.acquire(tokens)
+            try:
+                self.stats["requests"] += 1
+                response = await client.embeddings.create(model=self.model_name, input=batch_texts)
+                data = sorted(response.data, key=lambda item: item.index)
+                return np.array([item.embedding for item in data], dtype=np.float32)
+            except (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._retry_delay(attempt, e)
+            except openai.APIStatusError as e:
+                # 408/409 등 일시적 상태 코드만 재시도, 그 외(400/401/404)는 즉시 실패
+                if e.status_code not in (408, 409) or attempt >= self.max_retries:
+                    raise
+                delay = self._retry_delay(attempt, e)
+            attempt += 1
+            self.stats["retries"] += 1
+            await asyncio.sleep(delay)
+
+    def _retry_delay(self, attempt: int, error) -> float:
+        """Retry-After 헤더가 있으면 따르고, 없으면 full jitter 지수 백오프"""
+        response = getattr(error, "response", None)
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.backoff_max)
+                except ValueError:
+                    pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
@@ -0,0 +1,293 @@
+"""
+헤드리스 브라우저 풀 (자막 수집의 마지막 대체 경로)
+Chrome 실행은 영상 하나를 처리하는 것보다 훨씬 오래 걸리므로, 드라이버 N개를 미리 띄워 두고 돌려 씁니다.
+
+- 고정 sleep 대신 페이지의 ytInitialPlayerResponse가 준비될 때까지만 기다림 (짧은 간격으로 확인)
+- page_load_strategy "eager": 이미지/광고 로딩을 기다리지 않고 DOMContentLoaded에서 반환
+- 드라이버마다 요청 수 한도(max_requests)를 넘거나 오류가 나면 종료하고 새로 띄움 (메모리 누수/세션 오염 방지)
+- fetch_all: 영상 ID 큐를 드라이버 수만큼의 스레드가 나눠 처리하고 처리량(영상/분)을 보고
+  (SubtitleFetcher는 스레드 간 공유할 수 없으므로 스레드마다 자기 fetcher/세션으로 자막 XML을 받음)
+
+사용 예:
+    python browser_pool.py VIDEO_ID ... --size 3
+    python browser_pool.py --mock --size 3      # Chrome 없이 모의 서버 + MockWebDriver로 기존 방식과 처리량 비교
+"""
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Optional
+
+from subtitle_fetcher import DEFAULT_BASE_URL, USER_AGENT, NoSubtitles, StrategyUnavailable
+
+DEFAULT_POOL_SIZE = 2
+# 드라이버 하나로 처리할 최대 페이지 수 (넘으면 새로 띄움)
+DEFAULT_MAX_REQUESTS = 50
+# player response 준비 여부 확인 간격 (초)
+POLL_INTERVAL = 0.05
+# 준비되면 {captions: ... | null}, 아직이면 null
+CAPTIONS_SCRIPT = ("return window.ytInitialPlayerResponse ? "
+                   "{captions: window.ytInitialPlayerResponse.captions || null} : null")
+
+
+def chrome_driver(page_load_timeout: float = 30.0):
+    """헤드리스 Chrome 드라이버. selenium이 없으면 StrategyUnavailable"""
+    try:
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+    except ImportError:
+        raise StrategyUnavailable("selenium 미설치")
+    options = Options()
+    for argument in ("--headless", "--no-sandbox", "--disable-dev-shm-usage", "--lang=ko-KR",
+                     "--blink-settings=imagesEnabled=false", f"user-agent={USER_AGENT}"):
+        options.add_argument(argument)
+    options.page_load_strategy = "eager"
+    driver = webdriver.Chrome(options=options)
+    driver.set_page_load_timeout(page_load_timeout)
+    return driver
+
+
+def wait_until(condition: Callable, timeout: float, poll: float = POLL_INTERVAL):
+    """condition()이 None이 아닌 값을 돌려줄 때까지 기다린 뒤 그 값을 반환 (WebDriverWait와 같은 방식)"""
+    deadline = time.monotonic() + timeout
+    while True:
+        value = condition()
+        if value is not None:
+            return value
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"{timeout}초 안에 조건을 만족하지 않았습니다")
+        time.sleep(poll)
+
+
+class BrowserPool:
+    """미리 띄워 둔 드라이버를 빌려 주는 풀 (스레드 안전)"""
+
+    def __init__(self, size: int = DEFAULT_POOL_SIZE, max_requests: int = DEFAULT_MAX_REQUESTS,
+                 base_url: Optional[str] = None, timeout: float = 20.0, driver_factory: Optional[Callable] = None):
+        """
+        Args:
+            size: 드라이버 수 (= fetch_all의 동시 처리 수)
+            max_requests: 드라이버 하나로 처리할 최대 페이지 수
+            base_url: YouTube 주소 (None이면 실제 YouTube, 모의 서버 테스트용)
+            timeout: 페이지당 player response를 기다릴 최대 시간 (초)
+            driver_factory: 드라이버 생성 함수 (None이면 chrome_driver, 테스트에는 MockWebDriver)
+        """
+        self.size = size
+        self.max_requests = max_requests
+        self.base_url = (base_url or DEFAULT_BASE_URL).rstrip("/")
+        self.timeout = timeout
+        self._factory = driver_factory or (lambda: chrome_driver(timeout * 1.5))
+        # [드라이버, 처리한 페이지 수]. 드라이버가 None인 칸은 빌릴 때 띄움
+        self._idle = queue.Queue()
+        for _ in range(size):
+            self._idle.put([None, 0])
+        self._lock = threading.Lock()
+        self.launched = 0
+        self.recycled = 0
+        self.pages = 0
+        self.launch_seconds = 0.0
+
+    def warm_up(self):
+        """모든 드라이버를 동시에 미리 띄움 (첫 요청이 실행 시간을 기다리지 않도록)"""
+        slots = [self._idle.get() for _ in range(self.size)]
+        threads = [threading.Thread(target=self._ensure_driver, args=(slot,)) for slot in slots]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            for slot in slots:
+                self._idle.put(slot)
+        return self
+
+    def _ensure_driver(self, slot):
+        if slot[0] is None:
+            start = time.perf_counter()
+            slot[0], slot[1] = self._factory(), 0
+            with self._lock:
+                self.launched += 1
+                self.launch_seconds += time.perf_counter() - start
+
+    def _retire(self, slot):
+        try:
+            slot[0].quit()
+        except Exception:
+            pass
+        slot[0], slot[1] = None, 0
+        with self._lock:
+            self.recycled += 1
+
+    @contextmanager
+    def driver(self):
+        """드라이버 하나를 빌림. 요청 수 한도를 넘거나 드라이버 오류가 나면 반납할 때 종료 (다음에 빌릴 때 새로 띄움)"""
+        slot = self._idle.get()
+        try:
+            self._ensure_driver(slot)
+            healthy = False
+            try:
+                yield slot[0]
+                healthy = True
+            except (TimeoutError, NoSubtitles):
+                # 페이지 문제 (동의 페이지, 자막 없음) -> 드라이버는 계속 사용
+                healthy = True
+                raise
+            finally:
+                slot[1] += 1
+                with self._lock:
+                    self.pages += 1
+                if not healthy or slot[1] >= self.max_requests:
+                    self._retire(slot)
+        finally:
+            self._idle.put(slot)
+
+    def captions(self, video_id: str) -> Optional[Dict]:
+        """영상 페이지를 열어 player response의 captions를 읽음 (자막 트랙이 없으면 None)"""
+        with self.driver() as driver:
+            driver.get(f"{self.base_url}/watch?v={video_id}")
+            return wait_until(lambda: driver.execute_script(CAPTIONS_SCRIPT), self.timeout)["captions"]
+
+    def fetch_all(self, video_ids: Iterable[str], make_fetcher: Callable, on_result: Optional[Callable] = None) -> Dict:
+        """
+        영상 ID 큐를 드라이버 수만큼의 스레드로 처리합니다.
+
+        Args:
+            video_ids: 처리할 영상 ID
+            make_fetcher: 자막 XML을 받아올 subtitle_fetcher.SubtitleFetcher를 만드는 함수 (인자 없음).
+                스레드마다 한 번 호출해 그 스레드 안에서만 사용하고 끝나면 닫음 (스레드별 세션 재사용)
+            on_result: 영상마다 호출 (video_id, {language, subtitles} | None(자막 없음) | 예외)
+
+        Returns:
+            {results: {video_id: {language, subtitles} | None}, errors: {video_id: 예외}, seconds, videos_per_minute}
+        """
+        tasks = queue.Queue()
+        for video_id in video_ids:
+            tasks.put(video_id)
+        total = tasks.qsize()
+        results, errors = {}, {}
+
+        def worker():
+            with make_fetcher() as fetcher:
+                while True:
+                    try:
+                        video_id = tasks.get_nowait()
+                    except queue.Empty:
+                        return
+                    try:
+                        language, subtitles = fetcher.subtitles_from_captions(video_id, self.captions(video_id))
+                        outcome = results[video_id] = {"language": language, "subtitles": subtitles}
+                    except NoSubtitles:
+                        outcome = results[video_id] = None
+                    except Exception as e:
+                        outcome = errors[video_id] = e
+                    if on_result is not None:
+                        on_result(video_id, outcome)
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=worker) for _ in range(min(self.size, total))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - start
+        return {"results": results, "errors": errors, "seconds": seconds,
+                "videos_per_minute": total / seconds * 60 if seconds else 0.0}
+
+    def print_stats(self):
+        average = self.launch_seconds / self.launched if self.launched else 0.0
+        print(f"드라이버: 실행 {self.launched}회 (평균 {average:.2f}s), 교체 {self.recycled}회, 페이지 {self.pages}개")
+
+    def close(self):
+        for _ in range(self.size):
+            slot = self._idle.get()
+            if slot[0] is not None:
+                try:
+                    slot[0].quit()
+                except Exception:
+                    pass
+                slot[0] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def fetch_one_driver_per_video(video_ids: Iterable[str], fetcher, driver_factory: Callable,
+                               base_url: Optional[str] = None, sleep: float = 3.0) -> Dict:
+    """비교용 기존 방식: 영상마다 드라이버를 새로 띄우고 고정 시간 기다린 뒤 page_source를 읽음"""
+    from subtitle_fetcher import extract_captions
+
+    base_url = (base_url or DEFAULT_BASE_URL).rstrip("/")
+    video_ids = list(video_ids)
+    results, errors = {}, {}
+    start = time.perf_counter()
+    for video_id in video_ids:
+        driver = driver_factory()
+        try:
+            driver.get(f"{base_url}/watch?v={video_id}")
+            time.sleep(sleep)
+            language, subtitles = fetcher.subtitles_from_captions(video_id, extract_captions(driver.page_source))
+            results[video_id] = {"language": language, "subtitles": subtitles}
+        except NoSubtitles:
+            results[video_id] = None
+        except Exception as e:
+            errors[video_id] = e
+        finally:
+            driver.quit()
+    seconds = time.perf_counter() - start
+    return {"results": results, "errors": errors, "seconds": seconds,
+            "videos_per_minute": len(video_ids) / seconds * 60 if seconds else 0.0}
+
+
+def print_summary(name: str, summary: Dict):
+    found = sum(1 for result in summary["results"].values() if result is not None)
+    print(f"{name}: 영상 {len(summary['results']) + len(summary['errors'])}개, 자막 {found}개, "
+          f"실패 {len(summary['errors'])}개, {summary['seconds']:.1f}s, {summary['videos_per_minute']:.1f} 영상/분")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from subtitle_fetcher import SubtitleFetcher
+
+    parser = argparse.ArgumentParser(description="브라우저 풀로 자막 수집 (처리량 보고)")
+    parser.add_argument("video_ids", nargs="*")
+    parser.add_argument("--size", type=int, default=DEFAULT_POOL_SIZE)
+    parser.add_argument("--max-requests", type=int, default=DEFAULT_MAX_REQUESTS)
+    parser.add_argument("--mock", action="store_true",
+                        help="모의 서버 + MockWebDriver (Chrome 실행 1s, 스크립트 0.2s 흉내)로 기존 방식과 비교")
+    parser.add_argument("--baseline-videos", type=int, default=3, help="--mock: 기존 방식으로 처리해 볼 영상 수")
+    args = parser.parse_args()
+
+    server = None
+    base_url = None
+    driver_factory = None
+    video_ids = args.video_ids
+    if args.mock:
+        from mock_youtube_server import MockWebDriver, MockYouTubeServer
+
+        server = MockYouTubeServer().start()
+        base_url = server.base_url
+        driver_factory = MockWebDriver
+        video_ids = video_ids or server.video_ids()
+
+    try:
+        with SubtitleFetcher(base_url=base_url) as fetcher:
+            if args.mock and args.baseline_videos:
+                print_summary("기존 방식 (영상마다 드라이버 + sleep 3초)",
+                              fetch_one_driver_per_video(video_ids[:args.baseline_videos], fetcher, driver_factory,
+                                                         base_url))
+            with BrowserPool(args.size, args.max_requests, base_url, driver_factory=driver_factory) as pool:
+                start = time.perf_counter()
+                pool.warm_up()
+                print(f"드라이버 {args.size}개 준비: {time.perf_counter() - start:.1f}s")
+                summary = pool.fetch_all(video_ids, lambda: SubtitleFetcher(base_url=base_url))
+                print_summary(f"브라우저 풀 ({args.size}개)", summary)
+                pool.print_stats()
+                for video_id, error in summary["errors"].items():
+                    print(f"  {video_id}: {error}")
+    finally:
+        if server is not None:
+            server.stop()
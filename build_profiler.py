@@ -0,0 +1,315 @@
+"""
+오프라인 빌드 파이프라인(chunk_subtitles, build_vector_db) 프로파일링 도구
+단계별/배치별 wall time, CPU time, 처리량(items/sec), 시작/끝 RSS와 그 차이를 기록하고
+실행 간 비교할 수 있는 요약 JSON과 선택적으로 cProfile 덤프를 남깁니다.
+
+사용 예:
+    python chunk_subtitles.py --profile
+    python build_vector_db.py --profile --cprofile
+    python build_profiler.py compare data/profiles/old.json data/profiles/new.json
+"""
+import cProfile
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def current_rss_mb() -> Optional[float]:
+    """현재 프로세스의 RSS (MB). 측정할 수 없으면 None"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    프로세스 시작 이후 최대 RSS (MB). 측정할 수 없으면 None.
+    프로세스 전체의 최댓값이라 단계별 값으로 쓸 수 없음 (단계별로는 current_rss_mb의 차이 사용)
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 bytes 단위
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+class StageRecord:
+    """한 단계(또는 배치)의 측정값"""
+
+    def __init__(self, name: str, items: int = 0):
+        self.name = name
+        self.items = items
+        self.wall = 0.0
+        self.cpu = 0.0
+        # 단계 시작/끝의 RSS와 그 차이 (같은 이름으로 누적되면 첫 시작, 마지막 끝, 차이의 합)
+        self.rss_start_mb: Optional[float] = None
+        self.rss_end_mb: Optional[float] = None
+        self.rss_delta_mb: Optional[float] = None
+
+    def to_dict(self) -> Dict:
+        def mb(value):
+            return round(value, 1) if value is not None else None
+
+        return {
+            "wall_s": round(self.wall, 6),
+            "cpu_s": round(self.cpu, 6),
+            "items": self.items,
+            "items_per_s": round(self.items / self.wall, 2) if self.wall > 0 and self.items else None,
+            "rss_start_mb": mb(self.rss_start_mb),
+            "rss_end_mb": mb(self.rss_end_mb),
+            "rss_delta_mb": mb(self.rss_delta_mb),
+        }
+
+
+class BuildProfiler:
+    """빌드 단계 프로파일러"""
+
+    enabled = True
+
+    def __init__(self, run_name: str, output_dir: str = "data/profiles", cprofile: bool = False):
+        """
+        Args:
+            run_name: 실행 이름 (예: "chunk_subtitles", "build_vector_db")
+            output_dir: 요약 JSON과 cProfile 덤프가 저장될 디렉토리
+            cprofile: True이면 전체 실행을 cProfile로 기록 (.prof)
+        """
+        self.run_name = run_name
+        self.output_dir = Path(output_dir)
+        self.params: Dict = {}
+        self.stages: Dict[str, StageRecord] = {}
+        self.batches: Dict[str, List[StageRecord]] = {}
+        self._cprofile = cProfile.Profile() if cprofile else None
+        self._started_at = datetime.now()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        if self._cprofile is not None:
+            self._cprofile.enable()
+
+    def set_params(self, **params):
+        """실행 파라미터 기록 (비교 시 참고용)"""
+        self.params.update(params)
+
+    @contextmanager
+    def stage(self, name: str, items: int = 0):
+        """
+        단계 시간을 측정합니다. 같은 이름으로 여러 번 호출하면 누적됩니다.
+
+        Args:
+            name: 단계 이름
+            items: 이 단계에서 처리한 항목 수
+        """
+        record = StageRecord(name, items)
+        record.rss_start_mb = current_rss_mb()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield record
+        finally:
+            record.wall = time.perf_counter() - wall_start
+            record.cpu = time.process_time() - cpu_start
+            record.rss_end_mb = current_rss_mb()
+            if record.rss_start_mb is not None and record.rss_end_mb is not None:
+                record.rss_delta_mb = record.rss_end_mb - record.rss_start_mb
+            self._accumulate(record)
+
+    @contextmanager
+    def batch(self, name: str, items: int = 0):
+        """배치 단위 측정. 단계 합계에도 누적되고 배치별 기록도 남깁니다."""
+        with self.stage(name, items) as record:
+            yield record
+        self.batches.setdefault(name, []).append(record)
+
+    def _accumulate(self, record: StageRecord):
+        total = self.stages.get(record.name)
+        if total is None:
+            total = self.stages[record.name] = StageRecord(record.name)
+        total.items += record.items
+        total.wall += record.wall
+        total.cpu += record.cpu
+        if total.rss_start_mb is None:
+            total.rss_start_mb = record.rss_start_mb
+        total.rss_end_mb = record.rss_end_mb
+        if record.rss_delta_mb is not None:
+            total.rss_delta_mb = (total.rss_delta_mb or 0.0) + record.rss_delta_mb
+
+    def summary(self) -> Dict:
+        """실행 요약 (JSON 직렬화 가능)"""
+        stages = {}
+        for name, record in self.stages.items():
+            stage = record.to_dict()
+            batches = self.batches.get(name)
+            if batches:
+                walls = sorted(b.wall for b in batches)
+                stage["batches"] = {
+                    "count": len(batches),
+                    "wall_mean_s": round(sum(walls) / len(walls), 6),
+                    "wall_p50_s": round(walls[len(walls) // 2], 6),
+                    "wall_p95_s": round(walls[min(len(walls) - 1, int(len(walls) * 0.95))], 6),
+                    "wall_max_s": round(walls[-1], 6),
+                    "records": [b.to_dict() for b in batches],
+                }
+            stages[name] = stage
+
+        return {
+            "run": self.run_name,
+            "started_at": self._started_at.isoformat(timespec="seconds"),
+            "params": self.params,
+            "total": {
+                "wall_s": round(time.perf_counter() - self._wall_start, 6),
+                "cpu_s": round(time.process_time() - self._cpu_start, 6),
+                "process_peak_rss_mb": peak_rss_mb(),
+            },
+            "stages": stages,
+        }
+
+    def finish(self) -> Dict:
+        """
+        측정을 마치고 요약 JSON (및 cProfile 덤프)을 저장합니다.
+
+        Returns:
+            요약 dict
+        """
+        if self._cprofile is not None:
+            self._cprofile.disable()
+
+        summary = self.summary()
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        stamp = self._started_at.strftime("%Y%m%d_%H%M%S")
+        summary_file = self.output_dir / f"{self.run_name}_{stamp}.json"
+        with open(summary_file, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+        print(f"\n{'='*60}")
+        print(f"프로파일 요약: {self.run_name}")
+        print(f"{'='*60}")
+        print_summary(summary)
+        print(f"요약 저장: {summary_file}")
+
+        if self._cprofile is not None:
+            # snakeviz, flameprof 등으로 플레임그래프 생성 가능
+            prof_file = self.output_dir / f"{self.run_name}_{stamp}.prof"
+            self._cprofile.dump_stats(str(prof_file))
+            print(f"cProfile 덤프 저장: {prof_file}")
+
+        return summary
+
+
+class _NullProfiler:
+    """프로파일링이 꺼져 있을 때 사용하는 no-op 프로파일러"""
+
+    enabled = False
+
+    def set_params(self, **params):
+        pass
+
+    @contextmanager
+    def stage(self, name: str, items: int = 0):
+        yield StageRecord(name, items)
+
+    batch = stage
+
+    def finish(self):
+        return None
+
+
+NULL_PROFILER = _NullProfiler()
+
+
+def get_profiler(run_name: str, enabled: bool = False, **kwargs):
+    """
+    프로파일러 팩토리 함수
+
+    Args:
+        run_name: 실행 이름
+        enabled: False이면 no-op 프로파일러 반환
+        **kwargs: BuildProfiler 추가 인자
+
+    Returns:
+        BuildProfiler 또는 no-op 프로파일러
+    """
+    if not enabled:
+        return NULL_PROFILER
+    return BuildProfiler(run_name, **kwargs)
+
+
+def add_profile_arguments(parser):
+    """빌드 스크립트 argparse에 공통 프로파일링 옵션 추가"""
+    parser.add_argument("--profile", action="store_true", help="단계별 시간/메모리 프로파일링")
+    parser.add_argument("--profile-dir", default="data/profiles", help="프로파일 결과 저장 디렉토리")
+    parser.add_argument("--cprofile", action="store_true", help="cProfile 덤프(.prof)도 저장")
+
+
+def print_summary(summary: Dict):
+    """요약 dict를 표 형태로 출력"""
+    print(f"{'단계':<20} {'wall(s)':>10} {'cpu(s)':>10} {'items':>8} {'items/s':>10} {'RSS끝(MB)':>10} {'ΔRSS(MB)':>10}")
+    for name, stage in summary["stages"].items():
+        rate = stage["items_per_s"]
+        # 이전 형식의 요약(peak_rss_mb만 있음)도 출력
+        rss = stage.get("rss_end_mb", stage.get("peak_rss_mb"))
+        delta = stage.get("rss_delta_mb")
+        print(
+            f"{name:<20} {stage['wall_s']:>10.3f} {stage['cpu_s']:>10.3f} {stage['items']:>8} "
+            f"{rate if rate is not None else '-':>10} {rss if rss is not None else '-':>10} "
+            f"{delta if delta is not None else '-':>10}"
+        )
+    total = summary["total"]
+    peak = total.get("process_peak_rss_mb", total.get("peak_rss_mb"))
+    print(f"{'total':<20} {total['wall_s']:>10.3f} {total['cpu_s']:>10.3f} (프로세스 최대 RSS {f'{peak:.1f}' if peak is not None else '-'}MB)")
+
+
+def compare_summaries(old: Dict, new: Dict):
+    """두 실행 요약을 단계별로 비교 출력"""
+    print(f"{'단계':<20} {'old wall(s)':>12} {'new wall(s)':>12} {'ratio':>8}")
+    names = list(old["stages"]) + [n for n in new["stages"] if n not in old["stages"]]
+    for name in names + ["total"]:
+        old_stage = old["total"] if name == "total" else old["stages"].get(name)
+        new_stage = new["total"] if name == "total" else new["stages"].get(name)
+        old_wall = old_stage["wall_s"] if old_stage else None
+        new_wall = new_stage["wall_s"] if new_stage else None
+        ratio = f"{new_wall / old_wall:.2f}x" if old_wall and new_wall is not None else "-"
+        print(
+            f"{name:<20} {old_wall if old_wall is not None else '-':>12} "
+            f"{new_wall if new_wall is not None else '-':>12} {ratio:>8}"
+        )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="빌드 프로파일 요약 비교")
+    sub = parser.add_subparsers(dest="command", required=True)
+    compare = sub.add_parser("compare", help="두 요약 JSON 비교")
+    compare.add_argument("old")
+    compare.add_argument("new")
+    show = sub.add_parser("show", help="요약 JSON 출력")
+    show.add_argument("summary")
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        with open(args.old, encoding="utf-8") as f:
+            old_summary = json.load(f)
+        with open(args.new, encoding="utf-8") as f:
+            new_summary = json.load(f)
+        compare_summaries(old_summary, new_summary)
+    else:
+        with open(args.summary, encoding="utf-8") as f:
+            print_summary(json.load(f))
@@ -2,76 +2,108 @@
 청크 데이터를 임베딩하여 ChromaDB에 저장하는 스크립트
 """
 import json
+import queue
+import threading
 from pathlib import Path
+from typing import Dict, List
 import chromadb
 from chromadb.config import Settings
-from embedding_service import get_embedding_model
+from embedding_service import get_embedding_model, padding_stats
 from tqdm import tqdm
+from build_profiler import NULL_PROFILER
+from index_snapshots import DEFAULT_INDEX_ROOT, new_snapshot, publish, prune_snapshots, write_manifest
+from index_bundle import BUNDLE_FILE, export_from_collections
+from chunk_store import load_video_attributes
+from dim_reduction import check_reduction, reductions_for_spaces
+from search_filters import SHORTS_MAX_DURATION
+from query_preprocessing import DEFAULT_DICTIONARY_PATH, build_dictionary, save_dictionary
 
-def build_vector_db(
-    chunks_file="data/chunks.json",
-    db_path="data/chroma_db",
-    collection_name="gomhee_videos",
-    model_type="kosbert",
-    batch_size=32
-):
+
+def plan_batches(lengths: List[int], max_batch_tokens: int = 16384, max_batch_size: int = 256) -> List[List[int]]:
     """
-    청크 데이터를 임베딩하여 ChromaDB에 저장합니다.
+    청크를 토큰 길이순으로 정렬하고, 패딩 포함 토큰 수가 예산을 넘지 않도록 배치를 나눕니다.
+    길이가 비슷한 청크끼리 묶이므로 패딩 낭비가 줄어들고, 짧은 청크는 큰 배치로 처리됩니다.
     
     Args:
-        chunks_file: 청크 데이터 JSON 파일
-        db_path: ChromaDB 저장 경로
-        collection_name: 컬렉션 이름
-        model_type: 임베딩 모델 타입 ("kosbert" 또는 "openai")
-        batch_size: 배치 크기
+        lengths: 청크별 토큰 수
+        max_batch_tokens: 배치당 (최대 길이 x 배치 크기) 상한
+        max_batch_size: 배치당 최대 청크 수
+    
+    Returns:
+        원본 인덱스 리스트들의 리스트
     """
-    # 청크 데이터 로드
-    print(f"청크 데이터 로딩: {chunks_file}")
-    with open(chunks_file, 'r', encoding='utf-8') as f:
-        chunks = json.load(f)
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
     
-    print(f"총 {len(chunks)}개의 청크를 처리합니다.\n")
+    batches = []
+    current = []
+    for i in order:
+        # 정렬되어 있으므로 현재 항목이 배치 내 최대 길이
+        padded_tokens = lengths[i] * (len(current) + 1)
+        if current and (padded_tokens > max_batch_tokens or len(current) >= max_batch_size):
+            batches.append(current)
+            current = []
+        current.append(i)
+    if current:
+        batches.append(current)
     
-    # 임베딩 모델 로드
-    print(f"임베딩 모델 로딩: {model_type}")
-    embedding_model = get_embedding_model(model_type)
-    print()
+    return batches
+
+
+class CollectionWriter:
+    """
+    인코딩된 배치를 bounded queue로 받아 별도 스레드에서 collection.add 하는 writer
+    인코딩과 DB 저장이 겹쳐서 실행됩니다.
+    """
     
-    # ChromaDB 클라이언트 생성
-    print(f"ChromaDB 초기화: {db_path}")
-    db_path_obj = Path(db_path)
-    db_path_obj.mkdir(parents=True, exist_ok=True)
+    def __init__(self, collection, chunks, queue_size=4, profiler=NULL_PROFILER, videos=None, with_metadata=True):
+        self.collection = collection
+        self.chunks = chunks
+        self.videos = videos or {}
+        self.with_metadata = with_metadata
+        self.profiler = profiler
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name="collection-writer", daemon=True)
+        self._error = None
     
-    client = chromadb.PersistentClient(path=str(db_path_obj))
+    def start(self):
+        self._thread.start()
     
-    # 기존 컬렉션 삭제 (있다면)
-    try:
-        client.delete_collection(name=collection_name)
-        print(f"기존 컬렉션 '{collection_name}' 삭제됨")
-    except:
-        pass
-    
-    # 새 컬렉션 생성
-    collection = client.create_collection(
-        name=collection_name,
-        metadata={"description": "박곰희TV 영상 자막 청크"}
-    )
-    print(f"컬렉션 '{collection_name}' 생성됨\n")
+    def put(self, indices: List[int], embeddings):
+        """배치 전달 (큐가 가득 차면 대기). writer 스레드 오류는 여기서 다시 발생합니다."""
+        if self._error is not None:
+            raise self._error
+        self._queue.put((indices, embeddings))
     
-    # 배치 단위로 임베딩 및 저장
-    print("임베딩 생성 및 저장 중...")
+    def close(self):
+        """남은 배치를 모두 저장하고 스레드 종료"""
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
     
-    for i in tqdm(range(0, len(chunks), batch_size), desc="배치 처리"):
-        batch_chunks = chunks[i:i+batch_size]
-        
-        # 텍스트 추출
-        texts = [chunk['full_text'] for chunk in batch_chunks]
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._error is not None:
+                continue  # 오류 이후 배치는 버리고 종료 신호까지 큐만 비움
+            try:
+                self._write(*item)
+            except Exception as e:
+                self._error = e
+    
+    def _write(self, indices, embeddings):
+        batch_chunks = [self.chunks[i] for i in indices]
         
-        # 임베딩 생성
-        embeddings = embedding_model.embed(texts)
+        # ChromaDB에 저장 (id는 정렬 전 원래 순서 기준)
+        ids = [f"chunk_{i}" for i in indices]
+        if not self.with_metadata:
+            # 추가 임베딩 공간: 메타데이터/자막은 기본 공간과 공유하므로 임베딩만 저장
+            with self.profiler.batch("collection_add", items=len(ids)):
+                self.collection.add(ids=ids, embeddings=embeddings.tolist())
+            return
         
-        # ChromaDB에 저장
-        ids = [f"chunk_{i+j}" for j in range(len(batch_chunks))]
         metadatas = [
             {
                 'video_id': chunk['video_id'],
@@ -83,38 +115,278 @@ def build_vector_db(
             }
             for chunk in batch_chunks
         ]
+        # 검색 필터(search_filters.SearchFilter.to_where)용 영상 속성. 모르는 값은 넣지 않음
+        for metadata in metadatas:
+            video = self.videos.get(metadata['video_id'], {})
+            if video.get('upload_date'):
+                metadata['upload_date'] = int(video['upload_date'])
+            if video.get('duration') is not None:
+                metadata['video_duration'] = float(video['duration'])
+            metadata['is_short'] = video.get('duration') is not None and video['duration'] <= SHORTS_MAX_DURATION
         documents = [chunk['text'] for chunk in batch_chunks]  # 자막 텍스트만 (제목 제외)
         
-        collection.add(
-            ids=ids,
-            embeddings=embeddings.tolist(),
-            metadatas=metadatas,
-            documents=documents
+        with self.profiler.batch("collection_add", items=len(ids)):
+            self.collection.add(
+                ids=ids,
+                embeddings=embeddings.tolist(),
+                metadatas=metadatas,
+                documents=documents
+            )
+
+def encode_space(
+    embedding_model,
+    collection,
+    chunks,
+    batch_size=None,
+    max_batch_tokens=None,
+    num_workers=None,
+    write_queue_size=4,
+    videos=None,
+    with_metadata=True,
+    profiler=NULL_PROFILER
+):
+    """
+    한 임베딩 모델로 모든 청크를 인코딩하여 컬렉션에 저장합니다.
+    
+    Args:
+        embedding_model: 임베딩 모델
+        collection: 저장할 ChromaDB 컬렉션
+        chunks: 청크 리스트
+        batch_size: 배치당 최대 청크 수 (None이면 모델 기본값)
+        max_batch_tokens: 배치당 패딩 포함 토큰 예산 (None이면 모델 기본값)
+        num_workers: 인코딩 프로세스 수
+        write_queue_size: 인코딩과 DB 저장 사이 큐 크기
+        videos: video_id별 영상 속성
+        with_metadata: 메타데이터/자막도 저장할지 여부 (추가 공간은 임베딩만 저장)
+        profiler: 프로파일러
+    """
+    # 1단계: 토큰 길이 기준 정렬 + 토큰 예산 기반 배치 구성
+    batch_size = batch_size or embedding_model.pipeline_batch_size
+    max_batch_tokens = max_batch_tokens or embedding_model.pipeline_batch_tokens
+    profiler.set_params(batch_size=batch_size, max_batch_tokens=max_batch_tokens)
+    texts = [chunk['full_text'] for chunk in chunks]
+    with profiler.stage("tokenize", items=len(texts)):
+        lengths = embedding_model.count_tokens(texts)
+    batches = plan_batches(lengths, max_batch_tokens=max_batch_tokens, max_batch_size=batch_size)
+    stats = padding_stats(lengths, 32, batches)
+    print(f"배치 구성: {len(batches)}개 (토큰 예산 {max_batch_tokens}, 최대 {batch_size}개/배치)")
+    print(f"패딩 토큰 비율: {stats['padding_ratio_before']:.1%} (고정 32개 배치) -> {stats['padding_ratio_after']:.1%}")
+    
+    # 2단계: 멀티프로세스 인코딩 / 3단계: 별도 스레드에서 DB 저장
+    if hasattr(embedding_model, "start_pool"):
+        embedding_model.start_pool(num_workers)
+    
+    print("임베딩 생성 및 저장 중...")
+    writer = CollectionWriter(collection, chunks, queue_size=write_queue_size, profiler=profiler,
+                              videos=videos, with_metadata=with_metadata)
+    writer.start()
+    try:
+        with tqdm(total=len(chunks), desc="임베딩", unit="chunk") as progress:
+            for indices in batches:
+                batch_texts = [texts[i] for i in indices]
+                with profiler.batch("encode", items=len(batch_texts)):
+                    embeddings = embedding_model.embed_batch(batch_texts)
+                
+                with profiler.stage("queue_wait"):
+                    writer.put(indices, embeddings)
+                progress.update(len(indices))
+    finally:
+        writer.close()
+        if hasattr(embedding_model, "stop_pool"):
+            embedding_model.stop_pool()
+
+
+def written_video_attributes(chunks: List[Dict], videos: Dict[str, Dict]) -> List[str]:
+    """청크 메타데이터에 기록되는 필터용 영상 속성 (is_short는 항상, 나머지는 값이 있는 영상이 하나라도 있을 때)"""
+    known = [videos.get(chunk['video_id'], {}) for chunk in chunks]
+    attributes = ['is_short']
+    if any(video.get('upload_date') for video in known):
+        attributes.append('upload_date')
+    if any(video.get('duration') is not None for video in known):
+        attributes.append('video_duration')
+    return attributes
+
+
+def build_vector_db(
+    chunks_file="data/chunks.json",
+    index_root=DEFAULT_INDEX_ROOT,
+    collection_name="gomhee_videos",
+    model_type="kosbert",
+    publish_snapshot=True,
+    keep_snapshots=3,
+    batch_size=None,
+    max_batch_tokens=None,
+    num_workers=None,
+    write_queue_size=4,
+    videos_metadata_file="data/videos_metadata.json",
+    query_dictionary_file=DEFAULT_DICTIONARY_PATH,
+    reduction=None,
+    profiler=NULL_PROFILER
+):
+    """
+    청크 데이터를 임베딩하여 새 인덱스 스냅샷(ChromaDB)에 저장하고 배포합니다.
+    기존 스냅샷은 건드리지 않으므로 실행 중인 앱은 배포 시점까지 이전 인덱스로 응답합니다.
+    
+    model_type에 여러 모델을 주면 모델마다 임베딩 공간을 만들어 같은 청크 id로 저장합니다 (A/B 비교용).
+    첫 번째 모델이 기본 공간이며, 메타데이터와 자막은 기본 공간 컬렉션에만 저장됩니다.
+    
+    Args:
+        chunks_file: 청크 데이터 JSON 파일
+        index_root: 인덱스 루트 디렉토리 (스냅샷과 CURRENT 포인터)
+        collection_name: 기본 공간 컬렉션 이름 (추가 공간은 "<이름>__<모델>")
+        model_type: 임베딩 모델 타입 ("kosbert" 또는 "openai") 또는 그 리스트
+        publish_snapshot: 빌드 후 CURRENT 포인터를 새 스냅샷으로 교체할지 여부
+        keep_snapshots: 배포 후 남겨둘 최근 스냅샷 수
+        batch_size: 배치당 최대 청크 수 (None이면 모델 기본값)
+        max_batch_tokens: 배치당 패딩 포함 토큰 예산 (짧은 청크일수록 큰 배치, None이면 모델 기본값)
+        num_workers: 인코딩 프로세스 수 (None이면 CPU 코어 수, 1이면 단일 프로세스)
+        write_queue_size: 인코딩과 DB 저장 사이 큐 크기 (메모리 상한)
+        videos_metadata_file: 영상 메타데이터 (업로드 날짜, 길이 등 검색 필터용 속성)
+        query_dictionary_file: 질문 전처리용 약어 사전 저장 경로 (None이면 생성하지 않음)
+        reduction: 번들 벡터 차원 축소 ("pca:256", "truncate:1024", {공간: 지정} 또는 ["openai=truncate:1024", ...],
+            dim_reduction.reductions_for_spaces 참고). 모델 로드 직후, 인코딩 전에 공간별로 확인합니다.
+            ChromaDB에는 원래 차원 그대로 저장되므로 나중에 다른 차원으로 다시 내보낼 수 있습니다.
+        profiler: 단계별 측정용 프로파일러 (build_profiler.get_profiler)
+    
+    Returns:
+        기본 공간 컬렉션
+    """
+    model_types = [model_type] if isinstance(model_type, str) else list(model_type)
+    
+    # 청크 데이터 로드
+    print(f"청크 데이터 로딩: {chunks_file}")
+    with profiler.stage("json_parse") as record:
+        with open(chunks_file, 'r', encoding='utf-8') as f:
+            chunks = json.load(f)
+        record.items = len(chunks)
+    
+    videos = load_video_attributes(videos_metadata_file)
+    print(f"총 {len(chunks)}개의 청크를 처리합니다.\n")
+    
+    # 임베딩 모델을 먼저 모두 로드하고 차원 축소 지정을 공간별로 확인 (잘못된 지정이면 인코딩 전에 실패)
+    models = {}
+    for space in model_types:
+        print(f"\n임베딩 모델 로딩: {space}")
+        with profiler.stage("model_load"):
+            models[space] = get_embedding_model(space)
+    reductions = reductions_for_spaces(reduction, model_types)
+    for space, reduced in reductions.items():
+        check_reduction(reduced, models[space].embedding_dim, models[space].model_name, space)
+    
+    # 새 스냅샷에 ChromaDB 생성
+    version, snapshot_dir = new_snapshot(index_root)
+    db_path = snapshot_dir / "chroma"
+    print(f"ChromaDB 초기화: {db_path}")
+    client = chromadb.PersistentClient(path=str(db_path))
+    
+    collections = {}
+    spaces = {}
+    for space, embedding_model in models.items():
+        name = collection_name if not collections else f"{collection_name}__{space}"
+        collection = client.create_collection(
+            name=name,
+            metadata={"description": "박곰희TV 영상 자막 청크", "space": space}
         )
+        print(f"컬렉션 '{name}' 생성됨 (공간: {space})\n")
+        
+        encode_space(
+            embedding_model,
+            collection,
+            chunks,
+            batch_size=batch_size,
+            max_batch_tokens=max_batch_tokens,
+            num_workers=num_workers,
+            write_queue_size=write_queue_size,
+            videos=videos,
+            with_metadata=not collections,
+            profiler=profiler
+        )
+        collections[space] = collection
+        spaces[space] = {
+            'model_type': space,
+            'model_name': embedding_model.model_name,
+            'dimension': embedding_model.embedding_dim,
+            'collection_name': name,
+        }
+    
+    default_space = model_types[0]
+    count = collections[default_space].count()
     
     print(f"\n{'='*60}")
     print(f"벡터 DB 구축 완료!")
     print(f"{'='*60}")
     print(f"총 청크 수: {len(chunks)}")
-    print(f"임베딩 차원: {embedding_model.embedding_dim}")
+    for space, info in spaces.items():
+        print(f"임베딩 공간 '{space}': {info['model_name']} ({info['dimension']}차원, 컬렉션 '{info['collection_name']}')")
     print(f"저장 경로: {db_path}")
-    print(f"컬렉션 이름: {collection_name}")
-    
-    # 컬렉션 통계
-    count = collection.count()
     print(f"저장된 문서 수: {count}")
     
-    return collection
+    manifest_fields = {
+        'format': "chroma+bundle",
+        'collection_name': collection_name,
+        'model_type': default_space,
+        'model_name': spaces[default_space]['model_name'],
+        'dimension': spaces[default_space]['dimension'],
+        'chunk_count': count,
+        'default_space': default_space,
+        'spaces': spaces,
+        # 청크 메타데이터에 기록된 필터용 영상 속성 (search_filters.available_attributes)
+        'video_attributes': written_video_attributes(chunks, videos),
+    }
+    
+    # 앱이 로드할 단일 파일 번들 (공간별 벡터 mmap + 공유 메타데이터)
+    with profiler.stage("bundle_export", items=count):
+        bundle_manifest = export_from_collections(
+            collections, {'version': version, **manifest_fields}, snapshot_dir / BUNDLE_FILE, videos, reductions
+        )
+    # 축소 정보(spaces[공간]["reduction"])를 manifest에도 남겨 다시 내보낼 때 같은 설정 사용
+    manifest_fields['spaces'] = bundle_manifest['spaces']
+    for space in spaces:
+        if 'reduction' in bundle_manifest['spaces'][space]:
+            reduced = bundle_manifest['spaces'][space]['reduction']
+            print(f"차원 축소 '{space}': {reduced['method']} {reduced['source_dimension']} -> {reduced['dimension']}차원")
+    
+    # manifest는 스냅샷 내용이 모두 쓰인 뒤 마지막에 기록
+    with profiler.stage("manifest"):
+        manifest = write_manifest(snapshot_dir, **manifest_fields)
+    print(f"스냅샷: {version} (checksum {manifest['checksum'][:12]})")
+    
+    # 질문 전처리(query_preprocessing)용 약어 사전도 같은 청크로 갱신
+    if query_dictionary_file:
+        save_dictionary(build_dictionary(chunks_file), query_dictionary_file)
+    
+    if publish_snapshot:
+        publish(version, index_root)
+        prune_snapshots(index_root, keep=keep_snapshots)
+        print(f"배포 완료: {Path(index_root) / 'CURRENT'} -> {version}")
+    
+    return collections[default_space]
 
 if __name__ == "__main__":
+    import argparse
+    from build_profiler import add_profile_arguments, get_profiler
+    
+    parser = argparse.ArgumentParser(description="벡터 DB 구축")
+    parser.add_argument("--models", nargs="+", default=["kosbert"],
+                        help="임베딩 모델 (여러 개면 같은 청크로 공간을 나란히 생성, 첫 번째가 기본)")
+    parser.add_argument("--reduce", nargs="+", default=None,
+                        help="번들 벡터 차원 축소 (예: pca:256 또는 공간별 openai=truncate:1024, truncate는 Matryoshka 모델 전용)")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    
+    profiler = get_profiler("build_vector_db", enabled=args.profile, output_dir=args.profile_dir, cprofile=args.cprofile)
+    profiler.set_params(model_type=",".join(args.models))
+    
     # 벡터 DB 구축
     collection = build_vector_db(
         chunks_file="data/chunks.json",
-        db_path="data/chroma_db",
+        index_root="data/index",
         collection_name="gomhee_videos",
-        model_type="kosbert",  # 또는 "openai"
-        batch_size=32
+        model_type=args.models,  # 예: kosbert openai
+        reduction=args.reduce,
+        profiler=profiler
     )
+    profiler.finish()
     
     print("\n=== 테스트 검색 ===")
     # 간단한 테스트 검색
@@ -122,7 +394,7 @@ if __name__ == "__main__":
     print(f"테스트 쿼리: {test_query}")
     
     from embedding_service import get_embedding_model
-    model = get_embedding_model("kosbert")
+    model = get_embedding_model(args.models[0])
     query_embedding = model.embed_query(test_query)
     
     results = collection.query(
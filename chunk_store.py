@@ -0,0 +1,260 @@
+"""
+컬럼형 청크 메타데이터 저장소
+청크마다 dict(제목 문자열 포함)를 두는 대신 numpy 배열 컬럼으로 보관합니다.
+    video_index  int32    청크가 속한 영상 번호
+    start_time   float32  시작 시간 (초)
+    end_time     float32  종료 시간 (초)
+    chunk_id     int32    영상 내 청크 번호
+영상 ID, 제목, URL은 영상당 한 번만 저장하고(intern), 자막 스니펫은 하나의 UTF-8 버퍼와 offset 배열로 보관합니다.
+영상 속성(업로드 날짜, 길이, 조회수)도 영상 단위 배열로 보관하며 검색 필터(search_filters.py)에 사용됩니다.
+검색 결과용 dict는 top-k 행에 대해서만 만들어집니다.
+"""
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# 영상 속성을 알 수 없을 때의 값
+UNKNOWN_DATE = 0
+UNKNOWN_VIEWS = -1
+
+
+def load_video_attributes(metadata_file: str = "data/videos_metadata.json") -> Dict[str, Dict]:
+    """
+    collect_channel_videos.py가 저장한 영상 메타데이터를 video_id별 속성 dict로 읽습니다.
+    파일이 없으면 빈 dict (모든 영상 속성이 unknown)
+
+    Returns:
+        {video_id: {"upload_date": "YYYYMMDD" 또는 None, "duration": 초 또는 None, "view_count": int 또는 None}}
+    """
+    path = Path(metadata_file)
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        videos = json.load(f)
+    return {
+        video['video_id']: {
+            'upload_date': video.get('upload_date'),
+            'duration': video.get('duration'),
+            'view_count': video.get('view_count'),
+        }
+        for video in videos
+    }
+
+
+class ChunkStore:
+    """청크 메타데이터 테이블"""
+
+    def __init__(
+        self,
+        video_ids: List[str],
+        titles: List[str],
+        video_index: np.ndarray,
+        start_time: np.ndarray,
+        end_time: np.ndarray,
+        chunk_id: np.ndarray,
+        snippet_offsets: np.ndarray,
+        snippet_data: bytes,
+        upload_date: Optional[np.ndarray] = None,
+        video_duration: Optional[np.ndarray] = None,
+        view_count: Optional[np.ndarray] = None
+    ):
+        self.video_ids = video_ids
+        self.titles = titles
+        self.urls = [f"https://www.youtube.com/watch?v={video_id}" for video_id in video_ids]
+        self.video_index = video_index
+        self.start_time = start_time
+        self.end_time = end_time
+        self.chunk_id = chunk_id
+        self.snippet_offsets = snippet_offsets
+        self.snippet_data = snippet_data
+
+        # 영상 단위 속성 (upload_date는 YYYYMMDD 정수, 모르면 UNKNOWN_DATE / NaN / UNKNOWN_VIEWS)
+        num_videos = len(video_ids)
+        self.upload_date = upload_date if upload_date is not None else np.full(num_videos, UNKNOWN_DATE, dtype=np.int32)
+        self.video_duration = video_duration if video_duration is not None else np.full(num_videos, np.nan, dtype=np.float32)
+        self.view_count = view_count if view_count is not None else np.full(num_videos, UNKNOWN_VIEWS, dtype=np.int64)
+
+        # 필터용 보조 배열 (처음 필터링할 때 생성)
+        self._video_rows = None
+        self._video_offsets = None
+        self._dates_order = None
+        self._sorted_dates = None
+        self._video_numbers = None
+        # 필터 조건별 후보 행 (search_filters.SearchFilter.candidate_rows)
+        self.filter_cache: Dict[tuple, np.ndarray] = {}
+
+    @classmethod
+    def from_chunks(cls, metadatas: List[Dict], documents: List[str],
+                    videos: Optional[Dict[str, Dict]] = None) -> "ChunkStore":
+        """
+        청크 메타데이터 dict 리스트(ChromaDB 메타데이터 또는 chunks.json)로부터 생성
+
+        Args:
+            metadatas: 청크별 video_id, title, chunk_id, start_time, end_time
+            documents: 청크별 자막 텍스트
+            videos: video_id별 영상 속성 (load_video_attributes). None이면 모두 unknown
+        """
+        video_numbers: Dict[str, int] = {}
+        video_ids: List[str] = []
+        titles: List[str] = []
+        video_index = np.empty(len(metadatas), dtype=np.int32)
+        for row, metadata in enumerate(metadatas):
+            number = video_numbers.get(metadata['video_id'])
+            if number is None:
+                number = video_numbers[metadata['video_id']] = len(video_ids)
+                video_ids.append(metadata['video_id'])
+                titles.append(metadata['title'])
+            video_index[row] = number
+
+        encoded = [document.encode("utf-8") for document in documents]
+        snippet_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(data) for data in encoded], out=snippet_offsets[1:])
+
+        attributes = [(videos or {}).get(video_id, {}) for video_id in video_ids]
+        upload_date = np.array(
+            [int(a['upload_date']) if a.get('upload_date') else UNKNOWN_DATE for a in attributes], dtype=np.int32
+        )
+        video_duration = np.array(
+            [a['duration'] if a.get('duration') is not None else np.nan for a in attributes], dtype=np.float32
+        )
+        view_count = np.array(
+            [a['view_count'] if a.get('view_count') is not None else UNKNOWN_VIEWS for a in attributes], dtype=np.int64
+        )
+
+        return cls(
+            video_ids,
+            titles,
+            video_index,
+            np.array([m['start_time'] for m in metadatas], dtype=np.float32),
+            np.array([m['end_time'] for m in metadatas], dtype=np.float32),
+            np.array([m['chunk_id'] for m in metadatas], dtype=np.int32),
+            snippet_offsets,
+            b"".join(encoded),
+            upload_date,
+            video_duration,
+            view_count,
+        )
+
+    def __len__(self) -> int:
+        return len(self.video_index)
+
+    @property
+    def num_videos(self) -> int:
+        return len(self.video_ids)
+
+    def video_number(self, video_id: str) -> Optional[int]:
+        if self._video_numbers is None:
+            self._video_numbers = {video_id: n for n, video_id in enumerate(self.video_ids)}
+        return self._video_numbers.get(video_id)
+
+    def rows_for_videos(self, videos: np.ndarray) -> np.ndarray:
+        """
+        영상 번호 배열에 속한 청크 행 번호 (오름차순).
+        영상별 행 목록(video_index 기준 정렬)과 offset을 한 번 만들어 두므로 비용은 후보 청크 수에 비례합니다.
+        """
+        if self._video_rows is None:
+            self._video_rows = np.argsort(self.video_index, kind="stable")
+            self._video_offsets = np.zeros(self.num_videos + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.video_index, minlength=self.num_videos), out=self._video_offsets[1:])
+        if len(videos) == 0:
+            return np.zeros(0, dtype=np.int64)
+        rows = np.concatenate([
+            self._video_rows[self._video_offsets[v]:self._video_offsets[v + 1]] for v in videos
+        ])
+        rows.sort()
+        return rows
+
+    def videos_in_date_range(self, date_from: Optional[int], date_to: Optional[int]) -> np.ndarray:
+        """업로드 날짜(YYYYMMDD)가 범위 안인 영상 번호. 날짜순 정렬 배열에서 이분 탐색 (날짜 미상 영상 제외)"""
+        if self._dates_order is None:
+            known = np.flatnonzero(self.upload_date != UNKNOWN_DATE)
+            self._dates_order = known[np.argsort(self.upload_date[known], kind="stable")]
+            self._sorted_dates = self.upload_date[self._dates_order]
+        lo = np.searchsorted(self._sorted_dates, date_from, side="left") if date_from is not None else 0
+        hi = np.searchsorted(self._sorted_dates, date_to, side="right") if date_to is not None else len(self._sorted_dates)
+        return self._dates_order[lo:hi]
+
+    def snippet(self, row: int) -> str:
+        """자막 스니펫 (필요할 때만 디코딩)"""
+        start, end = self.snippet_offsets[row], self.snippet_offsets[row + 1]
+        return bytes(self.snippet_data[start:end]).decode("utf-8")
+
+    def metadata(self, row: int) -> Dict:
+        """한 행을 ChromaDB 메타데이터와 같은 형태의 dict로 만듭니다."""
+        video = int(self.video_index[row])
+        start_time = float(self.start_time[row])
+        end_time = float(self.end_time[row])
+        return {
+            'video_id': self.video_ids[video],
+            'title': self.titles[video],
+            'url': self.urls[video],
+            'chunk_id': int(self.chunk_id[row]),
+            'start_time': start_time,
+            'end_time': end_time,
+            'duration': end_time - start_time,
+        }
+
+    def nbytes(self) -> int:
+        """저장소가 차지하는 대략적인 메모리 (bytes)"""
+        strings = sum(sys.getsizeof(s) for s in self.video_ids + self.titles + self.urls)
+        arrays = sum(a.nbytes for a in (self.video_index, self.start_time, self.end_time, self.chunk_id, self.snippet_offsets,
+                                        self.upload_date, self.video_duration, self.view_count))
+        return strings + arrays + len(self.snippet_data)
+
+
+def benchmark(chunks_file: str = "data/chunks.json", min_chunks: int = 10000):
+    """
+    청크별 dict 리스트와 ChunkStore의 메모리 사용량 비교 (tracemalloc 기준).
+    실제 청크를 min_chunks개 이상이 될 때까지 복제해서 측정합니다.
+    """
+    import time
+    import tracemalloc
+
+    with open(chunks_file, 'r', encoding='utf-8') as f:
+        chunks = json.load(f)
+    copies = -(-min_chunks // len(chunks))
+    raw = json.dumps(chunks * copies, ensure_ascii=False)
+    del chunks
+
+    def measure(build):
+        tracemalloc.start()
+        result = build()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return result, current
+
+    fields = ('video_id', 'title', 'chunk_id', 'start_time', 'end_time', 'duration')
+    loaded = json.loads(raw)
+    del raw
+
+    # ChromaDB가 돌려주는 것과 같은 청크별 메타데이터 dict / 스니펫 문자열
+    metadatas, dict_meta_bytes = measure(lambda: [json.loads(json.dumps({k: c[k] for k in fields})) for c in loaded])
+    documents, dict_doc_bytes = measure(lambda: [json.loads(json.dumps(c['text'])) for c in loaded])
+    del loaded
+    store, store_bytes = measure(lambda: ChunkStore.from_chunks(metadatas, documents))
+    store_doc_bytes = len(store.snippet_data) + store.snippet_offsets.nbytes
+    store_meta_bytes = store_bytes - store_doc_bytes
+    n = len(metadatas)
+
+    rows = range(0, n, max(1, n // 1000))
+    start = time.perf_counter()
+    for row in rows:
+        store.metadata(row)
+        store.snippet(row)
+    materialize_us = (time.perf_counter() - start) / len(rows) * 1e6
+
+    def mb(size):
+        return f"{size / 1024 / 1024:7.2f} MB ({size / n:6.0f} B/청크)"
+
+    print(f"청크 수: {n} (영상 {store.num_videos}개)")
+    print(f"{'':12} {'dict 리스트':>24} {'ChunkStore':>24}")
+    print(f"{'메타데이터':12} {mb(dict_meta_bytes):>24} {mb(store_meta_bytes):>24}")
+    print(f"{'스니펫':12} {mb(dict_doc_bytes):>24} {mb(store_doc_bytes):>24}")
+    print(f"{'합계':12} {mb(dict_meta_bytes + dict_doc_bytes):>24} {mb(store_bytes):>24}")
+    print(f"top-k 한 행 materialize: {materialize_us:.1f} µs")
+
+if __name__ == "__main__":
+    benchmark()
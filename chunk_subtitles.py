@@ -1,11 +1,21 @@
 """
 자막을 청킹(chunking)하는 모듈
 긴 영상의 자막을 2분 단위로 나누어 더 정확한 검색 가능
+
+재실행 시에는 manifest(data/chunks_manifest.json)에 기록된 파일별 내용 해시와 청킹 파라미터를 비교해
+바뀐 자막 파일만 다시 청킹하고, 나머지는 이전 chunks.json의 청크를 그대로 씁니다.
 """
+import hashlib
 import json
+import os
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
 from tqdm import tqdm
+from build_profiler import NULL_PROFILER
+
+DEFAULT_MANIFEST_FILE = "data/chunks_manifest.json"
+# chunk_subtitle/full_text의 결과가 바뀌도록 수정하면 올려서 캐시된 청크를 모두 무효화
+CHUNKER_VERSION = 1
 
 def chunk_subtitle(subtitle_data: Dict, chunk_duration: float = 120.0) -> List[Dict]:
     """
@@ -79,14 +89,79 @@ def chunk_subtitle(subtitle_data: Dict, chunk_duration: float = 120.0) -> List[D
     return chunks
 
 
-def process_all_subtitles(subtitles_dir="data/subtitles", output_file="data/chunks.json", chunk_duration=120.0):
+def full_text(chunk: Dict) -> str:
+    """임베딩할 텍스트 (제목 + 자막)"""
+    return f"제목: {chunk['title']}\n\n{chunk['text']}"
+
+
+def is_transcript(data) -> bool:
+    """download_subtitles가 저장한 자막 형식인지 (failed_videos.json 같은 다른 JSON 제외)"""
+    return (isinstance(data, dict) and isinstance(data.get('video_id'), str) and 'title' in data
+            and isinstance(data.get('subtitles'), list))
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_manifest(manifest_file) -> Dict:
+    """청킹 manifest. 없거나 읽을 수 없으면 빈 manifest"""
+    try:
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"params": None, "files": {}}
+
+
+def write_json_atomic(path: Path, data, indent: Optional[int] = None):
+    """임시 파일에 쓴 뒤 교체 (쓰는 도중 중단되어도 이전 파일이 남도록)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = path.with_name(path.name + ".tmp")
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+    os.replace(tmp_file, path)
+
+
+def chunk_file(subtitle_file: Path, chunk_duration: float = 120.0, profiler=NULL_PROFILER) -> Optional[List[Dict]]:
+    """자막 파일 하나를 청킹 (full_text 포함). 자막 형식이 아니면 None"""
+    with profiler.stage("json_parse", items=1):
+        with open(subtitle_file, 'r', encoding='utf-8') as f:
+            subtitle_data = json.load(f)
+    if not is_transcript(subtitle_data):
+        return None
+    
+    with profiler.stage("chunking") as record:
+        chunks = chunk_subtitle(subtitle_data, chunk_duration)
+        record.items = len(chunks)
+    for chunk in chunks:
+        chunk['full_text'] = full_text(chunk)
+    return chunks
+
+
+def chunk_ids(chunks: List[Dict]) -> List[str]:
+    return [f"{chunk['video_id']}_{chunk['chunk_id']}" for chunk in chunks]
+
+
+def process_all_subtitles(subtitles_dir="data/subtitles", output_file="data/chunks.json", chunk_duration=120.0, profiler=NULL_PROFILER,
+                          manifest_file=DEFAULT_MANIFEST_FILE, force=False):
     """
     모든 자막 파일을 청킹하여 하나의 파일로 저장합니다.
     
+    manifest에 파일별 내용 해시(sha256), 청킹 파라미터, 생성된 청크 ID를 기록해 두고, 다음 실행에서는
+    해시나 파라미터가 바뀐 파일만 다시 청킹합니다. 크기와 수정 시각이 그대로인 파일은 해시도 다시 계산하지 않습니다.
+    자막 형식이 아닌 JSON(failed_videos.json 등)은 건너뜁니다.
+    
     Args:
         subtitles_dir: 자막 파일들이 있는 디렉토리
         output_file: 출력 파일 경로
         chunk_duration: 청크 길이 (초)
+        profiler: 단계별 측정용 프로파일러 (build_profiler.get_profiler)
+        manifest_file: 청킹 manifest 경로 (None이면 캐시 없이 전부 청킹)
+        force: manifest를 무시하고 전부 다시 청킹
     
     Returns:
         전체 청크 리스트
@@ -104,35 +179,94 @@ def process_all_subtitles(subtitles_dir="data/subtitles", output_file="data/chun
         print(f"자막 파일이 없습니다: {subtitles_dir}")
         return []
     
+    subtitle_files.sort()
     print(f"총 {len(subtitle_files)}개의 자막 파일을 처리합니다.")
     print(f"청크 길이: {chunk_duration}초 ({chunk_duration/60:.1f}분)")
     
-    all_chunks = []
+    output_path = Path(output_file)
+    params = {'chunk_duration': chunk_duration, 'chunker_version': CHUNKER_VERSION}
+    manifest = load_manifest(manifest_file) if manifest_file and not force else {"params": None, "files": {}}
+    reusable = manifest['params'] == params and output_path.exists()
+    previous = manifest['files'] if reusable else {}
     
-    for subtitle_file in tqdm(subtitle_files, desc="자막 청킹 중"):
+    # 1. 바뀐 파일 찾기 (크기/수정 시각이 같으면 기록된 해시를 그대로 사용)
+    entries = {}
+    changed = []
+    with profiler.stage("hash", items=len(subtitle_files)):
+        for subtitle_file in subtitle_files:
+            stat = subtitle_file.stat()
+            entry = previous.get(subtitle_file.name)
+            if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+                entries[subtitle_file.name] = entry
+                continue
+            sha256 = file_sha256(subtitle_file)
+            if entry and entry['sha256'] == sha256:
+                entries[subtitle_file.name] = {**entry, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+            else:
+                entries[subtitle_file.name] = {'sha256': sha256, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+                changed.append(subtitle_file)
+    removed = set(previous) - set(entries)
+    
+    # 2. 바뀐 파일만 청킹
+    new_chunks = {}
+    for subtitle_file in tqdm(changed, desc="자막 청킹 중"):
+        entry = entries[subtitle_file.name]
         try:
-            with open(subtitle_file, 'r', encoding='utf-8') as f:
-                subtitle_data = json.load(f)
-            
-            chunks = chunk_subtitle(subtitle_data, chunk_duration)
-            all_chunks.extend(chunks)
+            chunks = chunk_file(subtitle_file, chunk_duration, profiler)
+            if chunks is None:
+                entry['skipped'] = "자막 형식이 아님"
+                continue
+            new_chunks[subtitle_file.name] = chunks
+            # 자막이 비어 있는 영상은 청크가 없으므로 video_id는 파일 이름에서
+            entry['video_id'] = chunks[0]['video_id'] if chunks else subtitle_file.stem
+            entry['chunk_ids'] = chunk_ids(chunks)
             
         except Exception as e:
             print(f"오류 발생 ({subtitle_file.name}): {e}")
+            # 다음 실행에서 다시 시도하도록 기록하지 않음
+            del entries[subtitle_file.name]
             continue
     
-    print(f"\n총 {len(all_chunks)}개의 청크가 생성되었습니다.")
+    # 3. 바뀌지 않은 파일의 청크는 이전 출력에서 가져옴
+    cached = {}
+    if previous:
+        with profiler.stage("load_cache"):
+            with open(output_path, 'r', encoding='utf-8') as f:
+                for chunk in json.load(f):
+                    cached.setdefault(chunk['video_id'], []).append(chunk)
     
-    # 각 청크에 전체 텍스트 추가 (제목 + 자막)
-    for chunk in all_chunks:
-        chunk['full_text'] = f"제목: {chunk['title']}\n\n{chunk['text']}"
+    all_chunks = []
+    for subtitle_file in subtitle_files:
+        entry = entries.get(subtitle_file.name)
+        if entry is None or 'skipped' in entry:
+            continue
+        chunks = new_chunks.get(subtitle_file.name)
+        if chunks is None:
+            chunks = cached.get(entry['video_id'], [])
+            if chunk_ids(chunks) != entry['chunk_ids']:
+                # 출력 파일이 manifest와 맞지 않음 -> 이 파일만 다시 청킹
+                chunks = chunk_file(subtitle_file, chunk_duration, profiler) or []
+                entry['chunk_ids'] = chunk_ids(chunks)
+                changed.append(subtitle_file)
+        all_chunks.extend(chunks)
     
-    # JSON 파일로 저장
-    output_path = Path(output_file)
-    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if previous and not changed and not removed:
+        print("바뀐 자막 파일이 없습니다. 기존 청크를 사용합니다.")
+        if entries != previous:  # 내용은 같고 수정 시각만 바뀐 파일
+            write_json_atomic(Path(manifest_file), {'params': params, 'files': entries}, indent=2)
+        return all_chunks
+    
+    skipped = sorted(name for name, entry in entries.items() if 'skipped' in entry)
+    rechunked = {subtitle_file.name for subtitle_file in changed if subtitle_file.name in entries} - set(skipped)
+    print(f"\n다시 청킹: {len(rechunked)}개 파일, 재사용: {len(entries) - len(rechunked) - len(skipped)}개 파일, "
+          f"삭제: {len(removed)}개, 건너뜀: {len(skipped)}개{' (' + ', '.join(skipped) + ')' if skipped else ''}")
+    print(f"총 {len(all_chunks)}개의 청크가 생성되었습니다.")
     
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(all_chunks, f, ensure_ascii=False, indent=2)
+    # JSON 파일로 저장 (청크를 먼저 쓰고 manifest를 마지막에 기록)
+    with profiler.stage("write_output", items=len(all_chunks)):
+        write_json_atomic(output_path, all_chunks, indent=2)
+    if manifest_file:
+        write_json_atomic(Path(manifest_file), {'params': params, 'files': entries}, indent=2)
     
     print(f"청크 데이터 저장 완료: {output_path}")
     
@@ -140,7 +274,7 @@ def process_all_subtitles(subtitles_dir="data/subtitles", output_file="data/chun
     avg_chunk_duration = sum(c['duration'] for c in all_chunks) / len(all_chunks) if all_chunks else 0
     print(f"\n=== 청킹 통계 ===")
     print(f"평균 청크 길이: {avg_chunk_duration:.1f}초 ({avg_chunk_duration/60:.1f}분)")
-    print(f"평균 청크당 글자 수: {sum(len(c['text']) for c in all_chunks) / len(all_chunks):.0f}자")
+    print(f"평균 청크당 글자 수: {sum(len(c['text']) for c in all_chunks) / len(all_chunks) if all_chunks else 0:.0f}자")
     
     return all_chunks
 
@@ -166,12 +300,26 @@ def format_timestamp(seconds: float) -> str:
 
 
 if __name__ == "__main__":
+    import argparse
+    from build_profiler import add_profile_arguments, get_profiler
+    
+    parser = argparse.ArgumentParser(description="자막 청킹")
+    parser.add_argument("--force", action="store_true", help="manifest를 무시하고 모든 자막 파일을 다시 청킹")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    
+    profiler = get_profiler("chunk_subtitles", enabled=args.profile, output_dir=args.profile_dir, cprofile=args.cprofile)
+    profiler.set_params(chunk_duration=120.0)
+    
     # 테스트
     chunks = process_all_subtitles(
         subtitles_dir="data/subtitles",
         output_file="data/chunks.json",
-        chunk_duration=120.0  # 2분
+        chunk_duration=120.0,  # 2분
+        profiler=profiler,
+        force=args.force
     )
+    profiler.finish()
     
     if chunks:
         print(f"\n=== 첫 번째 청크 예시 ===")
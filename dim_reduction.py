@@ -0,0 +1,214 @@
+"""
+임베딩 차원 축소 (Matryoshka 잘라내기 / PCA)
+번들 전수 검색의 비용과 벡터 메모리는 차원에 비례합니다 (text-embedding-3-large는 3072차원).
+번들을 내보낼 때 청크 벡터를 낮은 차원으로 줄여 저장하고, 같은 변환을 번들에 함께 저장해
+검색 시 쿼리 임베딩에도 그대로 적용합니다 (IndexBundle.search가 원래 차원의 쿼리를 자동으로 변환).
+
+    truncate:<dim>  앞쪽 dim개 성분만 사용 (Matryoshka 방식으로 학습된 모델 전용, 예: OpenAI text-embedding-3)
+    pca:<dim>       코퍼스 벡터로 학습한 PCA 투영 (모델과 무관, 평균/투영 행렬을 번들에 저장)
+
+두 방식 모두 변환 후 다시 단위 벡터로 정규화합니다. 번들은 축소하지 않은 공간도 단위 벡터로 저장하므로
+(manifest의 normalized_vectors) 공간마다 거리의 범위가 같고, PriorRanker의 유사도(1 - 거리) 혼합도 같게 동작합니다.
+truncate는 MATRYOSHKA_MODELS에 있는 모델의 공간에만 쓸 수 있습니다.
+
+사용 예:
+    python build_vector_db.py --models openai --reduce pca:512
+    python build_vector_db.py --models kosbert openai --reduce openai=truncate:1024   # 공간별 지정
+    python index_bundle.py export --reduce truncate:1024     # --reduce none: 축소 없이 다시 내보내기
+    python dim_reduction.py --dims 128 256 512 --method pca    # 차원별 지연/메모리/recall@k
+"""
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+METHODS = ("truncate", "pca")
+# PCA 학습에 사용할 최대 벡터 수 (코퍼스가 더 크면 표본 추출)
+PCA_SAMPLE_SIZE = 50000
+# 앞쪽 성분만 잘라 써도 되도록(Matryoshka) 학습된 모델 (truncate 가능)
+MATRYOSHKA_MODELS = ("text-embedding-3-small", "text-embedding-3-large")
+
+
+def parse_reduction(spec) -> Optional[tuple]:
+    """'pca:256' / 'truncate:512' / Projection.info() -> (방법, 차원). None, 빈 문자열, 'none'은 None (축소 안 함)"""
+    if not spec or spec == "none":
+        return None
+    if isinstance(spec, dict):
+        method, dim = spec["method"], spec["dimension"]
+    elif isinstance(spec, (tuple, list)):
+        method, dim = spec
+    else:
+        method, _, dim = str(spec).partition(":")
+    if method not in METHODS or not str(dim).isdigit():
+        raise ValueError(f"차원 축소 지정이 올바르지 않습니다: {spec!r} (예: pca:256, truncate:512)")
+    return method, int(dim)
+
+
+def reductions_for_spaces(specs, spaces: Iterable[str]) -> Dict[str, tuple]:
+    """
+    축소 지정 -> {공간: (방법, 차원)} (축소하지 않는 공간은 빠짐)
+
+    specs는 모든 공간에 적용할 지정 하나("pca:256"), {공간: 지정}, 또는 그 둘을 섞은 목록
+    (["pca:256", "openai=truncate:1024"]: 공간을 지정한 항목이 우선)
+    """
+    spaces = list(spaces)
+    if isinstance(specs, dict):
+        items = list(specs.items())
+    else:
+        items = []
+        for spec in ([specs] if isinstance(specs, str) or specs is None else specs):
+            space, separator, value = str(spec).rpartition("=") if spec else ("", "", spec)
+            items.append((space if separator else None, value))
+    reductions = {}
+    for space, spec in sorted(items, key=lambda item: item[0] is not None):
+        if space is not None and space not in spaces:
+            raise ValueError(f"차원 축소 지정의 공간 '{space}'이 없습니다 (공간: {', '.join(spaces)})")
+        for target in ([space] if space is not None else spaces):
+            reductions[target] = parse_reduction(spec)
+    return {space: reduction for space, reduction in reductions.items() if reduction is not None}
+
+
+def check_reduction(reduction: tuple, source_dim: int, model_name: Optional[str] = None, space: str = ""):
+    """
+    축소 지정이 공간에 맞는지 확인 (맞지 않으면 ValueError). 인코딩 전에 불러 잘못된 지정으로 빌드 시간을 버리지 않도록
+
+    Args:
+        reduction: parse_reduction 결과 (방법, 차원)
+        source_dim: 공간의 원래 임베딩 차원
+        model_name: 공간의 모델 이름 (None이면 truncate 가능 여부는 확인하지 않음)
+        space: 오류 메시지에 쓸 공간 이름
+    """
+    method, dim = reduction
+    if dim > source_dim:
+        raise ValueError(f"공간 '{space}': 축소 차원({dim})이 원래 차원({source_dim})보다 큽니다")
+    if method == "truncate" and model_name is not None and model_name not in MATRYOSHKA_MODELS:
+        raise ValueError(f"공간 '{space}': {model_name}은 Matryoshka 모델이 아니므로 truncate를 쓸 수 없습니다 "
+                         f"(pca를 사용하세요. truncate 가능: {', '.join(MATRYOSHKA_MODELS)})")
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """단위 벡터로 정규화 (0 벡터는 그대로)"""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+
+class Projection:
+    """원래 차원 -> 축소 차원 변환 (결과는 단위 벡터)"""
+
+    def __init__(self, method: str, source_dim: int, dim: int,
+                 mean: Optional[np.ndarray] = None, components: Optional[np.ndarray] = None):
+        """
+        Args:
+            method: "truncate" 또는 "pca"
+            source_dim: 원래 임베딩 차원 (쿼리 차원)
+            dim: 축소 후 차원
+            mean: PCA 중심화용 평균 (shape: [source_dim])
+            components: PCA 투영 행렬 (shape: [source_dim, dim])
+        """
+        if dim > source_dim:
+            raise ValueError(f"축소 차원({dim})이 원래 차원({source_dim})보다 큽니다")
+        self.method = method
+        self.source_dim = source_dim
+        self.dim = dim
+        self.mean = mean
+        self.components = components
+
+    @classmethod
+    def fit(cls, vectors: np.ndarray, method: str, dim: int, sample_size: int = PCA_SAMPLE_SIZE, seed: int = 0):
+        """코퍼스 벡터로 변환을 만듭니다 (truncate는 학습 없음)"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        source_dim = vectors.shape[1]
+        if method == "truncate":
+            return cls("truncate", source_dim, dim)
+
+        if len(vectors) > sample_size:
+            vectors = vectors[np.random.default_rng(seed).choice(len(vectors), sample_size, replace=False)]
+        sample = vectors.astype(np.float64)
+        mean = sample.mean(axis=0)
+        # 공분산(source_dim x source_dim)의 고유벡터 중 분산이 큰 dim개
+        covariance = np.cov(sample - mean, rowvar=False)
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        components = eigenvectors[:, np.argsort(eigenvalues)[::-1][:dim]]
+        return cls("pca", source_dim, dim, mean.astype(np.float32), np.ascontiguousarray(components, dtype=np.float32))
+
+    def apply(self, vectors: np.ndarray) -> np.ndarray:
+        """벡터(1차원 또는 [n, source_dim])를 축소 후 정규화"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.method == "truncate":
+            reduced = vectors[..., :self.dim]
+        else:
+            reduced = (vectors - self.mean) @ self.components
+        return normalize(reduced).astype(np.float32)
+
+    def info(self) -> Dict:
+        """manifest에 기록할 정보"""
+        return {"method": self.method, "source_dimension": self.source_dim, "dimension": self.dim}
+
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.mean, self.components) if a is not None)
+
+
+def recall_at_k(truth: np.ndarray, found: np.ndarray) -> float:
+    """정답 top-k 중 찾은 비율의 평균 (두 배열 shape: [쿼리 수, k])"""
+    return float(np.mean([len(set(t) & set(f)) / len(t) for t, f in zip(truth, found)]))
+
+
+def _top_k(vectors: np.ndarray, queries: np.ndarray, k: int, exclude: np.ndarray) -> np.ndarray:
+    scores = queries @ vectors.T
+    scores[np.arange(len(queries)), exclude] = -np.inf  # 쿼리로 쓴 청크 자신은 제외
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+def benchmark(vectors: np.ndarray, dims, method: str = "pca", num_queries: int = 200, top_k: int = 10, seed: int = 0):
+    """
+    차원별 검색 지연(쿼리 1개 전수 검색, 쿼리 변환 포함), 벡터 메모리, 원래 차원 대비 recall@k 비교.
+    코퍼스에서 뽑은 청크 벡터를 쿼리로 사용합니다 (쿼리로 쓴 청크 자신은 정답/결과에서 제외).
+    """
+    import time
+
+    vectors = normalize(np.asarray(vectors, dtype=np.float32))
+    query_rows = np.random.default_rng(seed).choice(len(vectors), min(num_queries, len(vectors)), replace=False)
+    queries = vectors[query_rows]
+    truth = _top_k(vectors, queries, top_k, query_rows)
+
+    print(f"청크 {len(vectors)}개, 원래 차원 {vectors.shape[1]}, 쿼리 {len(queries)}개, 방법 {method}")
+    print(f"{'차원':>6} {'p50(ms)':>10} {'메모리(MB)':>12} {f'recall@{top_k}':>10}")
+    for dim in [vectors.shape[1]] + sorted((d for d in dims if d < vectors.shape[1]), reverse=True):
+        projection = None if dim == vectors.shape[1] else Projection.fit(vectors, method, dim, seed=seed)
+        corpus = vectors if projection is None else projection.apply(vectors)
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            q = query if projection is None else projection.apply(query)
+            scores = corpus @ q
+            np.argpartition(-scores, top_k - 1)[:top_k]
+            timings.append((time.perf_counter() - start) * 1000)
+        found = truth if projection is None else _top_k(corpus, projection.apply(queries), top_k, query_rows)
+        memory = corpus.nbytes + (projection.nbytes() if projection is not None else 0)
+        print(f"{dim:>6} {np.percentile(timings, 50):>10.3f} {memory / 1024 / 1024:>12.2f} {recall_at_k(truth, found):>10.3f}")
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    from pathlib import Path
+
+    from index_bundle import BUNDLE_FILE, DEFAULT_BUNDLE_PATH, IndexBundle
+    from index_snapshots import DEFAULT_INDEX_ROOT, current_snapshot
+
+    parser = argparse.ArgumentParser(description="차원 축소 벤치마크 (지연/메모리/recall@k)")
+    parser.add_argument("--index-root", default=DEFAULT_INDEX_ROOT)
+    parser.add_argument("--space", default=None, help="번들의 임베딩 공간 (기본: 기본 공간)")
+    parser.add_argument("--method", choices=METHODS, default="pca")
+    parser.add_argument("--dims", type=int, nargs="+", default=[64, 128, 256, 512, 1024])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    _, path, _ = current_snapshot(args.index_root)
+    bundle_path = path / BUNDLE_FILE if path is not None else Path(os.getenv("GOMHEE_INDEX_BUNDLE", DEFAULT_BUNDLE_PATH))
+    bundle = IndexBundle(bundle_path)
+    if bundle.projection(args.space) is not None:
+        raise SystemExit("이미 축소된 공간입니다. 축소 없이 내보낸 번들로 측정하세요 (python index_bundle.py export)")
+    benchmark(bundle.space_vectors(args.space), args.dims, args.method, num_queries=args.queries, top_k=args.top_k)
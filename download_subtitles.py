@@ -1,22 +1,79 @@
 """
 수집된 영상들의 자막을 다운로드하는 스크립트
-youtube-transcript-api를 사용하여 각 영상의 한국어 자막을 다운로드합니다.
+subtitle_fetcher로 각 영상의 한국어 자막을 다운로드합니다 (연결 재사용, 저렴한 방법부터 시도).
 """
 import json
 import os
 from pathlib import Path
-from youtube_transcript_api import YouTubeTranscriptApi
-from youtube_transcript_api._errors import TranscriptsDisabled, NoTranscriptFound
 from tqdm import tqdm
 import time
 
-def download_subtitles(videos_metadata_file="data/videos_metadata.json", output_dir="data/subtitles"):
+from subtitle_fetcher import DEFAULT_STRATEGIES, NoSubtitles, SubtitleFetcher
+
+DEFAULT_RETRY_QUEUE = "data/subtitle_jobs.sqlite"
+
+
+def save_subtitles(output_dir, video_id, title, result) -> Path:
+    """SubtitleFetcher.fetch 결과를 <output_dir>/<video_id>.json으로 저장 (chunk_subtitles 입력 형식)"""
+    output_file = Path(output_dir) / f"{video_id}.json"
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump({
+            'video_id': video_id,
+            'title': title,
+            'language': result['language'],
+            'subtitles': result['subtitles']
+        }, f, ensure_ascii=False, indent=2)
+    return output_file
+
+
+def record_subtitle_result(video, output_file=None, error=None):
+    """영상 메타데이터 항목에 자막 수집 결과 기록 (output_file이 있으면 성공, 없으면 error가 실패 사유)"""
+    if output_file is not None:
+        video['subtitle_file'] = str(output_file)
+        video['has_subtitle'] = True
+        video.pop('subtitle_error', None)
+    else:
+        video['has_subtitle'] = False
+        video['subtitle_error'] = error
+
+
+def update_videos_metadata(videos_metadata_file, results) -> int:
+    """
+    videos_metadata.json의 영상들에 자막 수집 결과를 반영합니다 (fetch_queue 워커용).
+    파일을 그때그때 다시 읽어 고치고 임시 파일 교체로 저장하므로, 그 사이 다른 프로세스가 쓴 내용을 덮지 않습니다.
+
+    Args:
+        results: video_id -> {output_file} 또는 {error}
+
+    Returns:
+        반영한 영상 수 (메타데이터에 없는 영상은 건너뜀)
+    """
+    with open(videos_metadata_file, 'r', encoding='utf-8') as f:
+        videos = json.load(f)
+    updated = 0
+    for video in videos:
+        if video['video_id'] in results:
+            record_subtitle_result(video, **results[video['video_id']])
+            updated += 1
+    tmp_file = f"{videos_metadata_file}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(videos, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_file, videos_metadata_file)
+    return updated
+
+
+def download_subtitles(videos_metadata_file="data/videos_metadata.json", output_dir="data/subtitles",
+                       strategies=DEFAULT_STRATEGIES, base_url=None, delay=0.1, retry_queue=DEFAULT_RETRY_QUEUE):
     """
     영상 메타데이터 파일을 읽어서 각 영상의 자막을 다운로드합니다.
     
     Args:
         videos_metadata_file: 영상 메타데이터 JSON 파일 경로
         output_dir: 자막을 저장할 디렉토리
+        strategies: 자막 수집 방법 순서 (subtitle_fetcher.DEFAULT_STRATEGIES 참고)
+        base_url: YouTube 주소 (None이면 실제 YouTube, 모의 서버 테스트용)
+        delay: 영상 사이 대기 시간 (초, 요청 제한 방지)
+        retry_queue: 일시적으로 실패한 영상을 넣을 재시도 큐 (fetch_queue.py, None이면 사용 안 함)
     """
     # 출력 디렉토리 생성
     output_path = Path(output_dir)
@@ -28,8 +85,8 @@ def download_subtitles(videos_metadata_file="data/videos_metadata.json", output_
     
     print(f"총 {len(videos)}개의 영상에서 자막을 다운로드합니다.\n")
     
-    # API 인스턴스 생성
-    api = YouTubeTranscriptApi()
+    # 모든 영상이 하나의 세션(연결 풀)을 공유
+    fetcher = SubtitleFetcher(strategies=strategies, base_url=base_url)
     
     # 통계
     success_count = 0
@@ -43,71 +100,31 @@ def download_subtitles(videos_metadata_file="data/videos_metadata.json", output_
         title = video['title']
         
         try:
-            # 자막 목록 가져오기
-            transcript_list = api.list(video_id)
-            
-            # 한국어 자막 찾기
-            try:
-                transcript = transcript_list.find_transcript(['ko'])
-            except NoTranscriptFound:
-                # 한국어 자막이 없으면 첫 번째 사용 가능한 자막
-                if transcript_list._manually_created_transcripts:
-                    lang_code = list(transcript_list._manually_created_transcripts.keys())[0]
-                    transcript = transcript_list._manually_created_transcripts[lang_code]
-                elif transcript_list._generated_transcripts:
-                    lang_code = list(transcript_list._generated_transcripts.keys())[0]
-                    transcript = transcript_list._generated_transcripts[lang_code]
-                else:
-                    raise NoTranscriptFound("No transcripts available")
-            
-            # 자막 데이터 가져오기
-            subtitle_data = transcript.fetch()
-            
-            # 자막을 텍스트로 변환
-            subtitle_text = []
-            for entry in subtitle_data:
-                subtitle_text.append({
-                    'start': entry.start,
-                    'duration': entry.duration,
-                    'text': entry.text
-                })
+            result = fetcher.fetch(video_id)
             
             # JSON 파일로 저장
-            output_file = output_path / f"{video_id}.json"
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump({
-                    'video_id': video_id,
-                    'title': title,
-                    'language': transcript.language_code,
-                    'subtitles': subtitle_text
-                }, f, ensure_ascii=False, indent=2)
+            output_file = save_subtitles(output_path, video_id, title, result)
             
             # 메타데이터에 자막 파일 경로 추가
-            video['subtitle_file'] = str(output_file)
-            video['has_subtitle'] = True
+            record_subtitle_result(video, output_file)
             
             success_count += 1
             
-        except TranscriptsDisabled:
-            video['has_subtitle'] = False
-            video['subtitle_error'] = 'Transcripts disabled'
-            no_subtitle_count += 1
-            failed_videos.append({'video_id': video_id, 'title': title, 'reason': 'Transcripts disabled'})
-            
-        except NoTranscriptFound:
-            video['has_subtitle'] = False
-            video['subtitle_error'] = 'No transcript found'
+        except NoSubtitles:
+            record_subtitle_result(video, error='No transcript found')
             no_subtitle_count += 1
             failed_videos.append({'video_id': video_id, 'title': title, 'reason': 'No transcript found'})
             
         except Exception as e:
-            video['has_subtitle'] = False
-            video['subtitle_error'] = str(e)
+            record_subtitle_result(video, error=str(e))
             failed_count += 1
-            failed_videos.append({'video_id': video_id, 'title': title, 'reason': str(e)})
+            failed_videos.append({'video_id': video_id, 'title': title, 'reason': str(e), 'error': e})
         
         # API 제한 방지를 위한 짧은 대기
-        time.sleep(0.1)
+        if delay:
+            time.sleep(delay)
+    
+    fetcher.close()
     
     # 업데이트된 메타데이터 저장
     with open(videos_metadata_file, 'w', encoding='utf-8') as f:
@@ -122,6 +139,8 @@ def download_subtitles(videos_metadata_file="data/videos_metadata.json", output_
     print(f"⚠️  오류: {failed_count}개")
     print(f"총 처리: {len(videos)}개")
     print(f"성공률: {success_count/len(videos)*100:.1f}%")
+    print()
+    fetcher.print_stats()
     
     if failed_videos:
         print(f"\n실패한 영상 목록:")
@@ -134,8 +153,19 @@ def download_subtitles(videos_metadata_file="data/videos_metadata.json", output_
     if failed_videos:
         log_file = output_path / "failed_videos.json"
         with open(log_file, 'w', encoding='utf-8') as f:
-            json.dump(failed_videos, f, ensure_ascii=False, indent=2)
+            json.dump([{k: v for k, v in failed.items() if k != 'error'} for failed in failed_videos],
+                      f, ensure_ascii=False, indent=2)
         print(f"\n실패 로그 저장: {log_file}")
+
+    # 오류로 실패한 영상은 재시도 큐로 (자막 비활성화 등 영구 실패는 큐가 걸러냄)
+    errors = [failed for failed in failed_videos if 'error' in failed]
+    if errors and retry_queue:
+        from fetch_queue import FetchQueue
+
+        with FetchQueue(retry_queue) as job_queue:
+            added = job_queue.add(errors)
+            counts = job_queue.counts()
+        print(f"재시도 큐에 {added}개 추가 (대기 {counts.get('pending', 0)}개): python fetch_queue.py run")
     
     return success_count, no_subtitle_count, failed_count
 
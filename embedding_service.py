@@ -4,8 +4,54 @@ ko-sbert와 OpenAI 임베딩을 쉽게 교체할 수 있도록 설계
 """
 from abc import ABC, abstractmethod
 from typing import List
+import os
 import numpy as np
 
+
+def bucket_by_length(lengths: List[int], batch_size: int) -> List[List[int]]:
+    """
+    입력을 토큰 길이순으로 정렬한 뒤 batch_size 단위로 묶습니다.
+    길이가 비슷한 입력끼리 한 배치가 되어 패딩이 최소화됩니다.
+    
+    Args:
+        lengths: 입력별 토큰 수
+        batch_size: 배치 크기
+    
+    Returns:
+        원본 인덱스 리스트들의 리스트
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    return [order[i:i+batch_size] for i in range(0, len(order), batch_size)]
+
+
+def padding_ratio(lengths: List[int], batches: List[List[int]]) -> float:
+    """
+    배치별로 가장 긴 입력에 맞춰 패딩했을 때 전체 토큰 중 패딩 토큰 비율
+    
+    Args:
+        lengths: 입력별 토큰 수
+        batches: 원본 인덱스 리스트들의 리스트
+    
+    Returns:
+        0~1 사이의 패딩 비율
+    """
+    padded = sum(max(lengths[i] for i in batch) * len(batch) for batch in batches if batch)
+    if not padded:
+        return 0.0
+    return 1 - sum(lengths) / padded
+
+
+def padding_stats(lengths: List[int], batch_size: int, batches: List[List[int]]) -> dict:
+    """입력 순서 그대로 배치했을 때와 길이 버킷팅 후의 패딩 비율 비교"""
+    sequential = [list(range(i, min(i + batch_size, len(lengths)))) for i in range(0, len(lengths), batch_size)]
+    return {
+        'texts': len(lengths),
+        'tokens': sum(lengths),
+        'padding_ratio_before': padding_ratio(lengths, sequential),
+        'padding_ratio_after': padding_ratio(lengths, batches),
+    }
+
+
 class EmbeddingModel(ABC):
     """임베딩 모델 인터페이스"""
     
@@ -40,6 +86,24 @@ class EmbeddingModel(ABC):
     def embedding_dim(self) -> int:
         """임베딩 차원 수"""
         pass
+    
+    # build_vector_db 파이프라인 배치 크기 / 토큰 예산 기본값
+    pipeline_batch_size = 256
+    pipeline_batch_tokens = 16384
+    
+    def count_tokens(self, texts: List[str]) -> List[int]:
+        """
+        텍스트별 토큰 수 (배치 구성용)
+        기본 구현은 글자 수 기반 추정치를 반환합니다.
+        """
+        return [max(1, len(text) // 2) for text in texts]
+    
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        """
+        진행 표시 없이 한 배치를 임베딩 (빌드 파이프라인용)
+        기본 구현은 embed()를 그대로 호출합니다.
+        """
+        return self.embed(texts)
 
 
 class KoSBERTEmbedding(EmbeddingModel):
@@ -53,13 +117,28 @@ class KoSBERTEmbedding(EmbeddingModel):
         from sentence_transformers import SentenceTransformer
         
         print(f"Loading Korean SBERT model: {model_name}")
+        self.model_name = model_name
         self.model = SentenceTransformer(model_name)
+        self._pool = None
         print(f"Model loaded. Embedding dimension: {self.model.get_sentence_embedding_dimension()}")
     
-    def embed(self, texts: List[str]) -> np.ndarray:
-        """텍스트 리스트를 임베딩으로 변환"""
-        embeddings = self.model.encode(texts, show_progress_bar=True)
-        return np.array(embeddings)
+    def embed(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        텍스트 리스트를 임베딩으로 변환
+        토큰 길이 버킷별로 인코딩한 뒤 원래 순서로 되돌립니다.
+        (sentence-transformers 내부 정렬은 글자 수 기준이라 한국어에서는 토큰 길이와 어긋남)
+        """
+        from tqdm import tqdm
+        
+        lengths = self.count_tokens(texts)
+        batches = bucket_by_length(lengths, batch_size)
+        self.padding_stats = padding_stats(lengths, batch_size, batches)
+        
+        embeddings = np.zeros((len(texts), self.embedding_dim), dtype=np.float32)
+        for indices in tqdm(batches, desc="임베딩 생성 중"):
+            batch = [texts[i] for i in indices]
+            embeddings[indices] = self.model.encode(batch, batch_size=len(batch), show_progress_bar=False)
+        return embeddings
     
     def embed_query(self, query: str) -> np.ndarray:
         """단일 쿼리를 임베딩으로 변환"""
@@ -70,50 +149,156 @@ class KoSBERTEmbedding(EmbeddingModel):
     def embedding_dim(self) -> int:
         """임베딩 차원 수"""
         return self.model.get_sentence_embedding_dimension()
+    
+    def count_tokens(self, texts: List[str]) -> List[int]:
+        """토크나이저 기준 토큰 수 (max_seq_length에서 잘림)"""
+        encoded = self.model.tokenizer(
+            texts,
+            add_special_tokens=True,
+            truncation=True,
+            max_length=self.model.max_seq_length
+        )
+        return [len(ids) for ids in encoded['input_ids']]
+    
+    def start_pool(self, processes=None):
+        """
+        CPU 멀티프로세스 인코딩 풀을 시작합니다.
+        
+        Args:
+            processes: 워커 프로세스 수 (None이면 CPU 코어 수)
+        """
+        if self._pool is not None or self.model.device.type != "cpu":
+            return
+        processes = processes or os.cpu_count() or 1
+        if processes > 1:
+            self._pool = self.model.start_multi_process_pool(target_devices=["cpu"] * processes)
+    
+    def stop_pool(self):
+        """멀티프로세스 인코딩 풀 종료"""
+        if self._pool is not None:
+            self.model.stop_multi_process_pool(self._pool)
+            self._pool = None
+    
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        """한 배치를 한 번의 forward로 인코딩 (풀이 있으면 프로세스들에 분산)"""
+        if self._pool is not None:
+            processes = len(self._pool['processes'])
+            if len(texts) >= 2 * processes:
+                chunk_size = -(-len(texts) // processes)
+                embeddings = self.model.encode_multi_process(
+                    texts, self._pool, batch_size=chunk_size, chunk_size=chunk_size
+                )
+                return np.asarray(embeddings)
+        embeddings = self.model.encode(texts, batch_size=len(texts), show_progress_bar=False)
+        return np.asarray(embeddings)
 
 
 class OpenAIEmbedding(EmbeddingModel):
     """OpenAI 임베딩 모델"""
     
-    def __init__(self, model_name="text-embedding-3-large", api_key=None):
+    def __init__(
+        self,
+        model_name="text-embedding-3-large",
+        api_key=None,
+        base_url=None,
+        max_concurrency=4,
+        requests_per_minute=3000,
+        tokens_per_minute=1_000_000,
+        max_retries=6,
+        checkpoint_dir="data/embedding_checkpoints"
+    ):
         """
         Args:
             model_name: OpenAI 임베딩 모델 이름
             api_key: OpenAI API 키 (None이면 환경변수에서 가져옴)
+            base_url: API 주소 (None이면 OPENAI_BASE_URL 또는 기본값, 모의 서버 테스트용)
+            max_concurrency: 동시에 보낼 최대 요청 수
+            requests_per_minute: 분당 요청 한도
+            tokens_per_minute: 분당 토큰 한도
+            max_retries: 일시적 오류(429/5xx/연결 오류) 재시도 횟수
+            checkpoint_dir: 완료 배치 저장 디렉토리 (None이면 사용 안 함)
         """
         from openai import OpenAI
-        import os
-        
-        self.model_name = model_name
-        self.client = OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
+        from async_embedding_client import AsyncEmbeddingClient
         
-        # 모델별 차원 수
+        # 모델별 기본 차원 (실제 차원은 응답 벡터로 확인, 모의 서버나 dimensions 옵션을 쓰면 다를 수 있음)
         self._embedding_dims = {
             "text-embedding-3-small": 1536,
             "text-embedding-3-large": 3072,
             "text-embedding-ada-002": 1536,
         }
         
+        self.model_name = model_name
+        api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.client = OpenAI(api_key=api_key, base_url=base_url or os.getenv("OPENAI_BASE_URL"))
+        self.async_client = AsyncEmbeddingClient(
+            model_name,
+            api_key=api_key,
+            base_url=base_url,
+            max_concurrency=max_concurrency,
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+            max_retries=max_retries,
+            checkpoint_dir=checkpoint_dir,
+            dimension=self._embedding_dims.get(model_name)
+        )
+        
+        # build_vector_db 파이프라인 배치: 여러 요청이 동시에 나갈 수 있도록 크게
+        self.pipeline_batch_size = 2048
+        self.pipeline_batch_tokens = max_concurrency * 100_000
+        
+        # 토큰 수 계산 (tiktoken이 없거나 인코딩 파일을 받을 수 없으면 글자 수 기반 추정)
+        try:
+            import tiktoken
+            self._tokenizer = tiktoken.encoding_for_model(model_name)
+        except Exception:
+            self._tokenizer = None
+        
         print(f"OpenAI Embedding model: {model_name}")
-        print(f"Embedding dimension: {self.embedding_dim}")
+        print(f"Embedding dimension: {self.embedding_dim} (응답을 받으면 실제 차원으로 갱신)")
     
     def embed(self, texts: List[str]) -> np.ndarray:
         """텍스트 리스트를 임베딩으로 변환"""
-        from tqdm import tqdm
-        
-        embeddings = []
-        batch_size = 100  # OpenAI API 배치 크기
+        return self._embed_requests(texts, show_progress_bar=True)
+    
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        """진행 표시 없이 한 배치를 임베딩"""
+        return self._embed_requests(texts, show_progress_bar=False)
+    
+    def count_tokens(self, texts: List[str]) -> List[int]:
+        """tiktoken 기준 토큰 수"""
+        if self._tokenizer is None:
+            return super().count_tokens(texts)
+        return [len(tokens) for tokens in self._tokenizer.encode_batch(texts)]
+    
+    def _truncate(self, texts: List[str], lengths: List[int]):
+        """입력당 토큰 한도를 넘는 텍스트를 잘라냅니다 (한도 초과 시 요청 전체가 400으로 실패하므로)"""
+        from async_embedding_client import MAX_TOKENS_PER_INPUT
         
-        for i in tqdm(range(0, len(texts), batch_size), desc="OpenAI 임베딩 생성 중"):
-            batch = texts[i:i+batch_size]
-            response = self.client.embeddings.create(
-                model=self.model_name,
-                input=batch
-            )
-            batch_embeddings = [item.embedding for item in response.data]
-            embeddings.extend(batch_embeddings)
+        texts = list(texts)
+        lengths = list(lengths)
+        for i, length in enumerate(lengths):
+            if length <= MAX_TOKENS_PER_INPUT:
+                continue
+            if self._tokenizer is not None:
+                texts[i] = self._tokenizer.decode(self._tokenizer.encode(texts[i])[:MAX_TOKENS_PER_INPUT])
+            else:
+                texts[i] = texts[i][:MAX_TOKENS_PER_INPUT * 2]
+            lengths[i] = MAX_TOKENS_PER_INPUT
+        return texts, lengths
+    
+    def _embed_requests(self, texts: List[str], show_progress_bar: bool) -> np.ndarray:
+        """
+        토큰 수 기준으로 요청을 묶어 비동기로 동시에 보냅니다.
+        길이순으로 묶고 결과는 원래 순서로 되돌립니다.
+        """
+        lengths = self.count_tokens(texts)
+        texts, lengths = self._truncate(texts, lengths)
+        batch_size = 100
+        self.padding_stats = padding_stats(lengths, batch_size, bucket_by_length(lengths, batch_size))
         
-        return np.array(embeddings)
+        order = sorted(range(len(texts)), key=lambda i: lengths[i])
+        return self.async_client.embed(texts, lengths, order=order, show_progress_bar=show_progress_bar)
     
     def embed_query(self, query: str) -> np.ndarray:
         """단일 쿼리를 임베딩으로 변환"""
@@ -121,12 +306,14 @@ class OpenAIEmbedding(EmbeddingModel):
             model=self.model_name,
             input=[query]
         )
-        return np.array(response.data[0].embedding)
+        embedding = np.array(response.data[0].embedding)
+        self.async_client.dimension = len(embedding)
+        return embedding
     
     @property
     def embedding_dim(self) -> int:
-        """임베딩 차원 수"""
-        return self._embedding_dims.get(self.model_name, 1536)
+        """임베딩 차원 수 (받은 응답의 벡터 차원, 아직 없으면 모델별 기본값)"""
+        return self.async_client.dimension or self._embedding_dims.get(self.model_name, 1536)
 
 
 def get_embedding_model(model_type="kosbert", **kwargs) -> EmbeddingModel:
@@ -172,3 +359,14 @@ if __name__ == "__main__":
     print(f"\n쿼리와의 유사도:")
     for text, sim in zip(test_texts, similarities):
         print(f"  {sim:.4f} - {text}")
+    
+    # 실제 코퍼스 기준 길이 버킷팅 효과 (패딩 토큰 비율)
+    import json
+    if os.path.exists("data/chunks.json"):
+        with open("data/chunks.json", 'r', encoding='utf-8') as f:
+            corpus = [chunk['full_text'] for chunk in json.load(f)]
+        lengths = model.count_tokens(corpus)
+        stats = padding_stats(lengths, 32, bucket_by_length(lengths, 32))
+        print(f"\n=== 패딩 비율 (청크 {stats['texts']}개, 토큰 {stats['tokens']}개, 배치 32) ===")
+        print(f"  입력 순서 배치: {stats['padding_ratio_before']:.1%}")
+        print(f"  길이 버킷 배치: {stats['padding_ratio_after']:.1%}")
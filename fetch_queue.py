@@ -0,0 +1,400 @@
+"""
+자막 다운로드 재시도 큐 (SQLite)
+일시적으로 실패한 영상(IP 차단, 요청 제한, 네트워크 오류)을 영상별 작업으로 저장해 두고,
+워커가 지수 백오프(full jitter)에 따라 다시 시도합니다. 자막 비활성화처럼 다시 해도 결과가 같은 실패는 재시도하지 않습니다.
+큐는 파일이므로 워커를 중단했다가 다시 실행해도 이어서 처리합니다.
+
+작업 상태:
+    pending       next_attempt_at 이후 시도
+    running       워커가 가져감 (lease 시간 안에 끝나지 않으면 다시 시도 대상 -> 워커가 죽어도 작업이 남음).
+                  가져갈 때마다 lease_token이 바뀌고, 결과 기록(complete/fail)은 token이 같을 때만 반영되므로
+                  lease가 끝난 뒤 늦게 끝난 워커가 새로 가져간 워커의 결과를 덮어쓰지 않음
+    done          자막 저장 완료
+    no_subtitles  자막 없음 / 영구 실패 (재시도 안 함)
+    failed        최대 시도 횟수 초과
+
+사용 예:
+    python fetch_queue.py import          # data/subtitles/failed_videos.json의 실패 영상을 큐에 추가
+    python fetch_queue.py run             # 큐가 빌 때까지 처리 (다음 시도 시각까지 기다렸다가 계속)
+    python fetch_queue.py status
+    python fetch_queue.py run --mock --fail-rate 0.5    # 모의 서버로 재시도/백오프 확인 (임시 큐 사용)
+"""
+import json
+import random
+import sqlite3
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from download_subtitles import DEFAULT_RETRY_QUEUE, save_subtitles, update_videos_metadata
+from subtitle_fetcher import NoSubtitles
+
+MAX_ATTEMPTS = 8
+# 워커가 videos_metadata.json에 결과를 모아 쓰는 단위 (확정된 작업 수)
+METADATA_FLUSH_EVERY = 20
+# 다시 시도해도 결과가 같은 오류 (youtube-transcript-api 예외 이름 또는 메시지)
+PERMANENT_ERRORS = ("TranscriptsDisabled", "Transcripts disabled", "NoTranscriptFound", "No transcript found",
+                    "VideoUnavailable", "Video unavailable", "InvalidVideoId", "AgeRestricted")
+# IP 차단/요청 제한: 일반 오류보다 훨씬 길게 기다렸다가 재시도
+BLOCKED_ERRORS = ("IpBlocked", "RequestBlocked", "TooManyRequests", "Too Many Requests",
+                  "blocking requests from your IP")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    video_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL DEFAULT '',
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    error_kind TEXT,
+    last_error TEXT,
+    updated_at REAL NOT NULL,
+    lease_token TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_due ON jobs (state, next_attempt_at);
+"""
+
+
+def classify_error(error) -> str:
+    """
+    실패 종류: 'permanent'(재시도 안 함), 'blocked'(IP 차단/요청 제한), 'transient'(그 외).
+    예외 또는 failed_videos.json의 reason 문자열을 받습니다. 예외는 원인 체인과 FetchFailed의 방법별 오류를
+    모두 봅니다 (앞 방법이 영구 실패를 알려 줬으면 마지막 방법의 오류가 일시적이어도 permanent).
+    """
+    if isinstance(error, NoSubtitles):
+        return "permanent"
+    texts = []
+    pending, seen = [error], set()
+    while pending:
+        error = pending.pop()
+        if isinstance(error, str):
+            texts.append(error)
+        elif isinstance(error, BaseException) and id(error) not in seen:
+            seen.add(id(error))
+            if isinstance(error, NoSubtitles):
+                return "permanent"
+            texts += [type(error).__name__, str(error)]
+            pending += list(getattr(error, "errors", {}).values()) + [error.__cause__]
+    text = "\n".join(texts)
+    if any(marker in text for marker in PERMANENT_ERRORS):
+        return "permanent"
+    if any(marker in text for marker in BLOCKED_ERRORS):
+        return "blocked"
+    return "transient"
+
+
+class FetchQueue:
+    """영상별 자막 수집 작업 큐 (여러 워커 프로세스가 같은 파일을 써도 작업이 겹치지 않음)"""
+
+    def __init__(self, path=DEFAULT_RETRY_QUEUE, max_attempts: int = MAX_ATTEMPTS, backoff_base: float = 60.0,
+                 blocked_backoff_base: float = 1800.0, backoff_max: float = 12 * 3600.0, lease: float = 600.0):
+        """
+        Args:
+            path: SQLite 파일 경로
+            max_attempts: 이 횟수만큼 실패하면 failed (영구 실패는 바로 no_subtitles)
+            backoff_base: 일시적 오류의 첫 재시도 대기 (초, 이후 2배씩 증가 + full jitter)
+            blocked_backoff_base: IP 차단/요청 제한의 첫 재시도 대기 (초)
+            backoff_max: 최대 대기 (초)
+            lease: 가져간 작업을 이 시간 안에 끝내지 못하면 다시 시도 대상 (초)
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = str(path)
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.blocked_backoff_base = blocked_backoff_base
+        self.backoff_max = backoff_max
+        self.lease = lease
+        # 트랜잭션은 직접 관리 (claim은 BEGIN IMMEDIATE로 다른 워커와 겹치지 않게)
+        self._db = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        # lease_token이 없던 이전 큐 파일
+        if "lease_token" not in {row["name"] for row in self._db.execute("PRAGMA table_info(jobs)")}:
+            self._db.execute("ALTER TABLE jobs ADD COLUMN lease_token TEXT")
+
+    def add(self, videos: Iterable[Dict]) -> int:
+        """
+        작업 추가. videos 항목은 {video_id, title, reason 또는 error(선택)}.
+        이미 있는 작업은 그대로 두고, 시도 횟수를 다 쓴(failed) 작업만 다시 대기 상태로 돌립니다.
+        영구 실패로 분류되는 항목은 no_subtitles로 바로 기록합니다.
+
+        Returns:
+            새로 대기 상태가 된 작업 수
+        """
+        now = time.time()
+        added = 0
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            for video in videos:
+                error = video.get("error", video.get("reason"))
+                kind = classify_error(error) if error is not None else None
+                state = "no_subtitles" if kind == "permanent" else "pending"
+                cursor = self._db.execute(
+                    """INSERT INTO jobs (video_id, title, state, attempts, next_attempt_at, error_kind, last_error,
+                                         updated_at)
+                       VALUES (?, ?, ?, 0, ?, ?, ?, ?)
+                       ON CONFLICT (video_id) DO UPDATE SET
+                           state = excluded.state, attempts = 0, next_attempt_at = excluded.next_attempt_at,
+                           error_kind = excluded.error_kind, last_error = excluded.last_error,
+                           updated_at = excluded.updated_at
+                       WHERE jobs.state = 'failed'""",
+                    (video["video_id"], video.get("title", ""), state, now, kind,
+                     str(error)[:2000] if error is not None else None, now))
+                added += cursor.rowcount if state == "pending" else 0
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        return added
+
+    def claim(self, now: Optional[float] = None) -> Optional[Dict]:
+        """
+        지금 시도할 수 있는 작업 하나를 가져옴 (attempts 증가, lease 동안 다른 워커가 가져가지 않음). 없으면 None.
+        반환한 작업의 lease_token을 complete/fail에 넘깁니다.
+        """
+        now = time.time() if now is None else now
+        token = uuid.uuid4().hex
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._db.execute(
+                """SELECT * FROM jobs WHERE state IN ('pending', 'running') AND next_attempt_at <= ?
+                   ORDER BY next_attempt_at LIMIT 1""", (now,)).fetchone()
+            if row is not None:
+                self._db.execute(
+                    "UPDATE jobs SET state = 'running', attempts = attempts + 1, next_attempt_at = ?, updated_at = ?, "
+                    "lease_token = ? WHERE video_id = ?", (now + self.lease, now, token, row["video_id"]))
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        job = dict(row)
+        job["attempts"] += 1
+        job["lease_token"] = token
+        return job
+
+    def complete(self, video_id: str, lease_token: str, state: str = "done") -> bool:
+        """
+        성공 기록. lease가 끝나 다른 워커가 다시 가져간 작업이면 기록하지 않음
+
+        Returns:
+            기록했으면 True
+        """
+        cursor = self._db.execute(
+            "UPDATE jobs SET state = ?, error_kind = NULL, last_error = NULL, updated_at = ?, lease_token = NULL "
+            "WHERE video_id = ? AND state = 'running' AND lease_token = ?",
+            (state, time.time(), video_id, lease_token))
+        return cursor.rowcount == 1
+
+    def retry_delay(self, attempts: int, kind: str) -> float:
+        """full jitter 지수 백오프 (IP 차단은 더 큰 기본값에서 시작)"""
+        base = self.blocked_backoff_base if kind == "blocked" else self.backoff_base
+        return random.uniform(0, min(self.backoff_max, base * (2 ** (attempts - 1))))
+
+    def fail(self, video_id: str, lease_token: str, error, now: Optional[float] = None) -> Dict:
+        """
+        실패 기록. 영구 실패는 no_subtitles, 시도 횟수를 다 쓰면 failed, 그 외에는 백오프 후 다시 대기.
+        lease가 끝나 다른 워커가 다시 가져간 작업이면 기록하지 않음 (state "lost").
+
+        Returns:
+            {state, kind, delay(다음 시도까지 초, 재시도하지 않으면 None)}
+        """
+        now = time.time() if now is None else now
+        kind = classify_error(error)
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._db.execute("SELECT attempts FROM jobs WHERE video_id = ? AND state = 'running' "
+                                   "AND lease_token = ?", (video_id, lease_token)).fetchone()
+            delay = None
+            if row is None:
+                state = "lost"
+            else:
+                if kind == "permanent":
+                    state = "no_subtitles"
+                elif row["attempts"] >= self.max_attempts:
+                    state = "failed"
+                else:
+                    state = "pending"
+                    delay = self.retry_delay(row["attempts"], kind)
+                self._db.execute(
+                    "UPDATE jobs SET state = ?, next_attempt_at = ?, error_kind = ?, last_error = ?, updated_at = ?, "
+                    "lease_token = NULL WHERE video_id = ?",
+                    (state, now + (delay or 0.0), kind, str(error)[:2000], now, video_id))
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        return {"state": state, "kind": kind, "delay": delay}
+
+    def counts(self) -> Dict[str, int]:
+        return dict(self._db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+
+    def next_attempt_at(self) -> Optional[float]:
+        """남은 작업 중 가장 이른 시도 가능 시각 (남은 작업이 없으면 None)"""
+        return self._db.execute(
+            "SELECT MIN(next_attempt_at) FROM jobs WHERE state IN ('pending', 'running')").fetchone()[0]
+
+    def jobs(self, state: Optional[str] = None) -> list:
+        query, params = "SELECT * FROM jobs", ()
+        if state is not None:
+            query, params = query + " WHERE state = ?", (state,)
+        return [dict(row) for row in self._db.execute(query + " ORDER BY next_attempt_at", params)]
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def run_worker(job_queue: FetchQueue, fetcher, output_dir="data/subtitles", wait: bool = True,
+               max_wait: Optional[float] = None, delay: float = 0.1,
+               videos_metadata_file: Optional[str] = "data/videos_metadata.json") -> Counter:
+    """
+    큐의 작업을 처리합니다.
+
+    Args:
+        job_queue: FetchQueue
+        fetcher: subtitle_fetcher.SubtitleFetcher
+        output_dir: 자막 JSON 저장 디렉토리
+        wait: 지금 시도할 작업이 없어도 남은 작업이 있으면 다음 시도 시각까지 기다렸다가 계속
+        max_wait: 한 번에 기다릴 최대 시간 (초, 넘으면 종료. None이면 제한 없음)
+        delay: 작업 사이 대기 (초, 요청 제한 방지)
+        videos_metadata_file: 결과(has_subtitle, subtitle_file, subtitle_error)를 반영할 영상 메타데이터
+            (download_subtitles와 같은 필드, METADATA_FLUSH_EVERY개마다와 종료 시 저장. None이면 반영하지 않음)
+
+    Returns:
+        처리 결과별 횟수 (done, no_subtitles, failed, retry, lost: lease가 끝나 다른 워커가 가져간 작업)
+    """
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    outcomes = Counter()
+    metadata_updates = {}
+
+    def flush_metadata():
+        if metadata_updates and videos_metadata_file and Path(videos_metadata_file).exists():
+            update_videos_metadata(videos_metadata_file, metadata_updates)
+        metadata_updates.clear()
+
+    try:
+        while True:
+            job = job_queue.claim()
+            if job is None:
+                next_at = job_queue.next_attempt_at()
+                if next_at is None or not wait:
+                    break
+                pause = max(0.0, next_at - time.time())
+                if max_wait is not None and pause > max_wait:
+                    print(f"다음 시도까지 {pause / 60:.1f}분 -> 종료 (다시 실행하면 이어서 처리)")
+                    break
+                time.sleep(pause)
+                continue
+
+            video_id = job["video_id"]
+            try:
+                result = fetcher.fetch(video_id)
+            except Exception as e:
+                outcome = job_queue.fail(video_id, job["lease_token"], e)
+                if outcome["state"] == "pending":
+                    outcomes["retry"] += 1
+                    print(f"{video_id}: 실패 {job['attempts']}회 ({outcome['kind']}), "
+                          f"{outcome['delay']:.1f}초 후 재시도")
+                elif outcome["state"] == "lost":
+                    outcomes["lost"] += 1
+                    print(f"{video_id}: lease 만료로 다른 워커가 처리 중 (실패 결과 기록 안 함)")
+                else:
+                    outcomes[outcome["state"]] += 1
+                    error = "No transcript found" if isinstance(e, NoSubtitles) else str(e)
+                    metadata_updates[video_id] = {"error": error}
+                    print(f"{video_id}: {outcome['state']} ({outcome['kind']}, 시도 {job['attempts']}회)")
+            else:
+                output_file = save_subtitles(output_dir, video_id, job["title"], result)
+                metadata_updates[video_id] = {"output_file": output_file}
+                if job_queue.complete(video_id, job["lease_token"]):
+                    outcomes["done"] += 1
+                    print(f"{video_id}: 저장 ({len(result['subtitles'])}줄, 시도 {job['attempts']}회)")
+                else:
+                    outcomes["lost"] += 1
+                    print(f"{video_id}: 저장했지만 lease 만료로 다른 워커가 처리 중 (큐 상태는 그 워커가 기록)")
+            if len(metadata_updates) >= METADATA_FLUSH_EVERY:
+                flush_metadata()
+            if delay:
+                time.sleep(delay)
+    finally:
+        flush_metadata()
+    return outcomes
+
+
+def print_status(job_queue: FetchQueue):
+    counts = job_queue.counts()
+    print("작업: " + ", ".join(f"{state} {counts.get(state, 0)}개"
+                              for state in ("pending", "running", "done", "no_subtitles", "failed")))
+    kinds = Counter(job["error_kind"] for job in job_queue.jobs("pending") if job["error_kind"])
+    if kinds:
+        print("대기 중인 작업의 마지막 오류: " + ", ".join(f"{kind} {count}개" for kind, count in kinds.items()))
+    next_at = job_queue.next_attempt_at()
+    if next_at is not None:
+        print(f"다음 시도: {max(0.0, next_at - time.time()) / 60:.1f}분 후")
+
+
+if __name__ == "__main__":
+    import argparse
+    import tempfile
+
+    from subtitle_fetcher import DEFAULT_STRATEGIES, SubtitleFetcher
+
+    parser = argparse.ArgumentParser(description="자막 다운로드 재시도 큐")
+    parser.add_argument("command", choices=["import", "run", "status"])
+    parser.add_argument("--queue", default=DEFAULT_RETRY_QUEUE)
+    parser.add_argument("--failed-log", default="data/subtitles/failed_videos.json")
+    parser.add_argument("--output-dir", default="data/subtitles")
+    parser.add_argument("--videos-metadata", default="data/videos_metadata.json",
+                        help="run: 수집 결과(has_subtitle, subtitle_file)를 반영할 영상 메타데이터")
+    parser.add_argument("--strategies", nargs="+", default=list(DEFAULT_STRATEGIES), choices=DEFAULT_STRATEGIES)
+    parser.add_argument("--max-wait", type=float, default=None, help="run: 다음 시도까지 이보다 오래 남으면 종료 (초)")
+    parser.add_argument("--backoff-base", type=float, default=60.0)
+    parser.add_argument("--blocked-backoff-base", type=float, default=1800.0)
+    parser.add_argument("--mock", action="store_true", help="run: 모의 서버 영상으로 임시 큐를 만들어 처리")
+    parser.add_argument("--fail-rate", type=float, default=0.3, help="--mock: 모의 서버 500 오류 확률")
+    args = parser.parse_args()
+
+    server = None
+    base_url = None
+    if args.mock:
+        from mock_youtube_server import MockYouTubeServer
+
+        server = MockYouTubeServer(fail_rate=args.fail_rate).start()
+        base_url = server.base_url
+        workdir = Path(tempfile.mkdtemp())
+        args.queue, args.output_dir = workdir / "jobs.sqlite", workdir / "subtitles"
+        args.videos_metadata = None
+        args.strategies = ["timedtext"]
+
+    queue_options = dict(backoff_base=args.backoff_base, blocked_backoff_base=args.blocked_backoff_base)
+    try:
+        with FetchQueue(args.queue, **queue_options) as job_queue:
+            if args.command == "import":
+                with open(args.failed_log, "r", encoding="utf-8") as f:
+                    failed = json.load(f)
+                added = job_queue.add(failed)
+                kinds = Counter(classify_error(entry.get("reason", "")) for entry in failed)
+                print(f"{args.failed_log}: {len(failed)}개 중 {added}개 대기 ("
+                      + ", ".join(f"{kind} {count}개" for kind, count in kinds.items()) + ")")
+            elif args.command == "run":
+                if server is not None:
+                    job_queue.add({"video_id": video_id} for video_id in server.video_ids() + ["no_subtitles"])
+                start = time.perf_counter()
+                with SubtitleFetcher(strategies=args.strategies, base_url=base_url) as fetcher:
+                    outcomes = run_worker(job_queue, fetcher, args.output_dir, max_wait=args.max_wait,
+                                          videos_metadata_file=args.videos_metadata)
+                print(f"\n{time.perf_counter() - start:.1f}s, " + ", ".join(f"{k} {v}회" for k, v in outcomes.items()))
+            print_status(job_queue)
+    finally:
+        if server is not None:
+            server.stop()
@@ -0,0 +1,621 @@
+"""
+배포용 단일 파일 인덱스 번들
+app.py가 검색에 필요한 것(벡터, 청크 메타데이터, 자막 스니펫, manifest)만 하나의 파일로 묶습니다.
+임베딩 모델별 벡터 공간(space, 예: "kosbert", "openai")을 여러 개 담을 수 있으며,
+모든 공간이 같은 청크 행 번호와 메타데이터/스니펫을 공유합니다 (공간을 추가해도 벡터만 늘어남).
+벡터와 청크 메타데이터 컬럼(chunk_store.ChunkStore)은 정렬된 비압축 구간으로 저장되어 mmap으로 바로 매핑되고
+(필요한 페이지만 읽힘), 영상 제목 목록과 스니펫은 zlib으로 압축되어 처음 접근할 때 풀립니다.
+
+파일 구조:
+    b"GOMHEEIX" | header 길이 (uint32 LE) | header JSON | 64바이트 정렬 | 섹션들...
+    header = {"format_version", "manifest", "sections": {이름: {offset, length, dtype, shape, compression}}}
+    벡터 섹션 이름은 "vectors/<space>", "norms_sq/<space>", manifest["spaces"]에 공간별 모델 정보
+    차원 축소(dim_reduction)한 공간은 "projection_mean/<space>", "projection/<space>"에 쿼리 변환을 함께 저장
+    manifest["normalized_vectors"]가 참이면 모든 공간의 벡터가 단위 벡터 (쿼리도 같은 변환 후 검색, transform 참고)
+    "codes/<space>", "code_thresholds/<space>"는 2단계 검색용 이진 부호 (차원마다 1비트, 벡터의 1/32 크기,
+    64비트 워드 우선 [words, n]으로 저장해 워드마다 연속 배열로 xor/popcount)
+
+2단계 검색 (shortlist): 청크가 많아지면 전체 float32 벡터 내적이 검색 시간을 차지하므로,
+이진 부호의 해밍 거리(xor + popcount)로 전체를 훑어 후보 shortlist개를 고른 뒤
+그 행의 원래 벡터만 mmap에서 읽어 정확한 거리로 다시 계산합니다.
+
+사용 예:
+    python index_bundle.py export                                # 현재 스냅샷 -> 스냅샷 안의 index.bundle
+    python index_bundle.py export --output data/gomhee_index.bundle
+    python index_bundle.py export --reduce pca:256               # 차원 축소해서 내보내기
+    python index_bundle.py export --reduce openai=truncate:1024  # 공간별 차원 축소
+    python index_bundle.py benchmark
+    python index_bundle.py shortlist --sizes 100 300 1000       # 2단계 검색 지연/recall 비교
+"""
+import json
+import mmap
+import struct
+import zlib
+from datetime import date
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+from chunk_store import ChunkStore, load_video_attributes
+from dim_reduction import Projection, check_reduction, normalize, parse_reduction, reductions_for_spaces
+from ranking import VideoPriors
+
+MAGIC = b"GOMHEEIX"
+FORMAT_VERSION = 5
+ALIGNMENT = 64
+BUNDLE_FILE = "index.bundle"
+DEFAULT_BUNDLE_PATH = "data/gomhee_index.bundle"
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _raw(array: np.ndarray):
+    array = np.ascontiguousarray(array)
+    return array.tobytes(), {"dtype": array.dtype.name, "shape": list(array.shape), "compression": "none"}
+
+
+def binary_codes(vectors: np.ndarray, thresholds: np.ndarray) -> np.ndarray:
+    """차원별 기준값보다 큰지를 비트로 묶은 이진 부호 (shape: [..., ceil(dim / 64)], uint64)"""
+    bits = np.packbits(np.asarray(vectors) > thresholds, axis=-1)
+    padding = -bits.shape[-1] % 8
+    if padding:
+        bits = np.concatenate([bits, np.zeros(bits.shape[:-1] + (padding,), dtype=np.uint8)], axis=-1)
+    return np.ascontiguousarray(bits).view(np.uint64)
+
+
+if hasattr(np, "bitwise_count"):
+    _popcount = np.bitwise_count
+else:
+    _POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(words):
+        return _POPCOUNT_TABLE[words.view(np.uint8)].reshape(words.shape + (8,)).sum(axis=-1)
+
+
+def hamming_distances(codes: np.ndarray, query_code: np.ndarray) -> np.ndarray:
+    """
+    청크 부호와 쿼리 부호의 해밍 거리
+
+    Args:
+        codes: 워드 우선으로 저장된 부호 (shape: [words, n]). 워드마다 n개가 연속이라 워드 단위로 누적
+        query_code: 쿼리 부호 (shape: [words])
+    """
+    distances = np.zeros(codes.shape[1], dtype=np.int32)
+    for word, query_word in zip(codes, query_code):
+        distances += _popcount(word ^ query_word)
+    return distances
+
+
+def write_bundle(path, manifest: Dict, spaces: Dict[str, np.ndarray], chunks: ChunkStore,
+                 priors: Optional[VideoPriors] = None, projections: Optional[Dict[str, Projection]] = None):
+    """
+    번들 파일을 기록합니다 (임시 파일에 쓴 뒤 교체).
+
+    Args:
+        path: 출력 파일 경로
+        manifest: 스냅샷 manifest (spaces, default_space 등)
+        spaces: 공간 이름 -> 청크 임베딩 (shape: [n, dim], 모두 chunks와 같은 행 순서)
+        chunks: 청크 메타데이터 저장소
+        priors: 영상별 재정렬 prior (chunks와 같은 영상 순서, None이면 로드할 때 계산)
+        projections: 공간 이름 -> 쿼리 변환 (spaces의 벡터는 이미 축소된 것, manifest["spaces"]에 reduction 정보 필요)
+    """
+    sections = {}
+    for space, projection in (projections or {}).items():
+        if projection.method == "pca":
+            sections[f"projection_mean/{space}"] = _raw(projection.mean)
+            sections[f"projection/{space}"] = _raw(projection.components)
+    for space, vectors in spaces.items():
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if len(vectors) != len(chunks):
+            raise ValueError(f"공간 '{space}'의 벡터 수({len(vectors)})가 청크 수({len(chunks)})와 다릅니다")
+        sections[f"vectors/{space}"] = _raw(vectors)
+        sections[f"norms_sq/{space}"] = _raw(np.einsum("ij,ij->i", vectors, vectors).astype(np.float32))
+        # 이진 부호는 차원별 평균 기준 (임베딩 성분이 0 중심이 아니어도 비트가 고르게 나뉨)
+        thresholds = vectors.mean(axis=0).astype(np.float32)
+        sections[f"code_thresholds/{space}"] = _raw(thresholds)
+        sections[f"codes/{space}"] = _raw(binary_codes(vectors, thresholds).T)
+    videos = {"video_ids": chunks.video_ids, "titles": chunks.titles}
+
+    sections.update({
+        "video_index": _raw(chunks.video_index),
+        "start_time": _raw(chunks.start_time),
+        "end_time": _raw(chunks.end_time),
+        "chunk_id": _raw(chunks.chunk_id),
+        "snippet_offsets": _raw(chunks.snippet_offsets),
+        "upload_date": _raw(chunks.upload_date),
+        "video_duration": _raw(chunks.video_duration),
+        "view_count": _raw(chunks.view_count),
+        "videos": (zlib.compress(json.dumps(videos, ensure_ascii=False).encode("utf-8"), 6), {"compression": "zlib"}),
+        "snippets": (zlib.compress(bytes(chunks.snippet_data), 6), {"compression": "zlib"}),
+    })
+    if priors is not None:
+        sections["prior_popularity"] = _raw(priors.popularity)
+        sections["prior_recency"] = _raw(priors.recency)
+
+    # header 크기가 offset에 영향을 주므로, offset 자리를 넉넉히 잡고 두 번 계산
+    header = {"format_version": FORMAT_VERSION, "manifest": manifest, "sections": {}}
+    for _ in range(2):
+        header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        offset = _align(len(MAGIC) + 4 + len(header_bytes) + 256)
+        for name, (payload, info) in sections.items():
+            header["sections"][name] = {**info, "offset": offset, "length": len(payload)}
+            offset = _align(offset + len(payload))
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        for name, (payload, _) in sections.items():
+            f.seek(header["sections"][name]["offset"])
+            f.write(payload)
+    tmp_path.replace(path)
+
+
+class IndexBundle:
+    """
+    번들 파일 로더. 벡터는 mmap으로 지연 매핑, 메타데이터/스니펫은 처음 접근 시 압축 해제합니다.
+    query()는 ChromaDB collection.query와 같은 형태의 결과를 반환하므로 기존 검색 코드를 그대로 사용할 수 있습니다.
+    거리는 ChromaDB 기본값과 같은 제곱 L2 거리입니다.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"인덱스 번들 파일이 아닙니다: {path}")
+        header_len = struct.unpack_from("<I", self._mmap, len(MAGIC))[0]
+        start = len(MAGIC) + 4
+        header = json.loads(self._mmap[start:start + header_len].decode("utf-8"))
+        if header["format_version"] != FORMAT_VERSION:
+            raise ValueError(f"지원하지 않는 번들 버전: {header['format_version']}")
+
+        self.manifest = header["manifest"]
+        self._sections = header["sections"]
+        self._cache = {}
+        self.spaces = [name.split("/", 1)[1] for name in self._sections if name.startswith("vectors/")]
+        self.default_space = self.manifest.get("default_space") or self.spaces[0]
+
+    def _array(self, name: str) -> np.ndarray:
+        info = self._sections[name]
+        count = int(np.prod(info["shape"]))
+        array = np.frombuffer(self._mmap, dtype=info["dtype"], count=count, offset=info["offset"])
+        return array.reshape(info["shape"])
+
+    def _decompress(self, name: str) -> bytes:
+        info = self._sections[name]
+        return zlib.decompress(self._mmap[info["offset"]:info["offset"] + info["length"]])
+
+    def _space(self, space: Optional[str]) -> str:
+        space = space or self.default_space
+        if space not in self.spaces:
+            raise KeyError(f"번들에 '{space}' 공간이 없습니다 (있는 공간: {', '.join(self.spaces)})")
+        return space
+
+    def space_vectors(self, space: Optional[str] = None) -> np.ndarray:
+        """공간의 청크 임베딩 (mmap, 읽기 전용)"""
+        return self._array(f"vectors/{self._space(space)}")
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """기본 공간의 청크 임베딩"""
+        return self.space_vectors()
+
+    def space_info(self, space: Optional[str] = None) -> Dict:
+        """공간의 모델 정보 (model_type, model_name, dimension=쿼리 임베딩 차원, 축소했으면 reduction)"""
+        space = self._space(space)
+        return self.manifest.get("spaces", {}).get(space, {"dimension": self._sections[f"vectors/{space}"]["shape"][1]})
+
+    def projection(self, space: Optional[str] = None) -> Optional[Projection]:
+        """공간의 쿼리 변환 (차원 축소하지 않은 공간은 None)"""
+        space = self._space(space)
+        key = f"projection/{space}"
+        if key not in self._cache:
+            reduction = self.space_info(space).get("reduction")
+            if reduction is None:
+                self._cache[key] = None
+            else:
+                mean = self._array(f"projection_mean/{space}") if reduction["method"] == "pca" else None
+                components = self._array(f"projection/{space}") if reduction["method"] == "pca" else None
+                self._cache[key] = Projection(reduction["method"], reduction["source_dimension"],
+                                              reduction["dimension"], mean, components)
+        return self._cache[key]
+
+    def transform(self, embeddings: np.ndarray, space: Optional[str] = None) -> np.ndarray:
+        """
+        모델이 만든 원래 차원의 임베딩 -> 이 공간에 저장된 형태 (축소한 공간은 축소,
+        normalized_vectors 번들은 정규화). 이미 저장 차원인 축소 공간 임베딩은 정규화만 함
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        projection = self.projection(space)
+        if projection is not None and embeddings.shape[-1] == projection.source_dim:
+            return projection.apply(embeddings)
+        if self.manifest.get("normalized_vectors"):
+            return normalize(embeddings).astype(np.float32)
+        return embeddings
+
+    def codes(self, space: Optional[str] = None):
+        """2단계 검색용 (이진 부호 [words, n], 차원별 기준값). 부호 섹션이 없는 번들은 처음 사용할 때 계산"""
+        space = self._space(space)
+        if f"codes/{space}" in self._sections:
+            return self._array(f"codes/{space}"), self._array(f"code_thresholds/{space}")
+        key = f"codes/{space}"
+        if key not in self._cache:
+            vectors = self.space_vectors(space)
+            thresholds = vectors.mean(axis=0).astype(np.float32)
+            self._cache[key] = (np.ascontiguousarray(binary_codes(vectors, thresholds).T), thresholds)
+        return self._cache[key]
+
+    @property
+    def chunks(self) -> ChunkStore:
+        """청크 메타데이터 저장소 (컬럼은 mmap, 제목/스니펫은 처음 접근 시 압축 해제)"""
+        if "chunks" not in self._cache:
+            videos = json.loads(self._decompress("videos").decode("utf-8"))
+            self._cache["chunks"] = ChunkStore(
+                videos["video_ids"],
+                videos["titles"],
+                self._array("video_index"),
+                self._array("start_time"),
+                self._array("end_time"),
+                self._array("chunk_id"),
+                self._array("snippet_offsets"),
+                self._decompress("snippets"),
+                self._array("upload_date"),
+                self._array("video_duration"),
+                self._array("view_count"),
+            )
+        return self._cache["chunks"]
+
+    @property
+    def priors(self) -> VideoPriors:
+        """영상별 재정렬 prior (빌드 시 계산된 배열, 없으면 영상 속성으로 계산)"""
+        if "priors" not in self._cache:
+            if "prior_popularity" in self._sections:
+                self._cache["priors"] = VideoPriors(
+                    self.chunks.video_ids, self._array("prior_popularity"), self._array("prior_recency")
+                )
+            else:
+                self._cache["priors"] = VideoPriors.from_chunk_store(self.chunks)
+        return self._cache["priors"]
+
+    def count(self) -> int:
+        return self._sections["video_index"]["shape"][0]
+
+    def search(self, query_embedding: np.ndarray, top_k: int, rows: Optional[np.ndarray] = None,
+               space: Optional[str] = None, shortlist: Optional[int] = None):
+        """
+        전수 검색 (shortlist를 주면 2단계 검색)
+
+        Args:
+            query_embedding: 쿼리 임베딩 (차원 축소한 공간이면 원래 차원 그대로 넘기면 같은 변환을 적용)
+            top_k: 반환할 개수
+            rows: 후보 청크 행 번호 (None이면 전체). 후보 행의 벡터만 계산합니다.
+            space: 검색할 임베딩 공간 (None이면 기본 공간)
+            shortlist: 이진 부호 해밍 거리로 먼저 고를 후보 수 (None/0이면 전체를 정확히 계산).
+                후보 안에서는 정확한 거리이므로 결과는 근사 (recall은 benchmark_shortlist로 확인)
+
+        Returns:
+            (청크 행 번호 배열, 거리 배열) - 거리 오름차순
+        """
+        space = self._space(space)
+        vectors = self._array(f"vectors/{space}")
+        norms_sq = self._array(f"norms_sq/{space}")
+        query = self.transform(query_embedding, space)
+        if query.shape[-1] != vectors.shape[1]:
+            raise ValueError(f"쿼리 차원({query.shape[-1]})이 '{space}' 공간의 차원({vectors.shape[1]})과 다릅니다")
+        if rows is not None and len(rows) == 0:
+            return rows, np.zeros(0, dtype=np.float32)
+
+        if shortlist and max(shortlist, top_k) < (self.count() if rows is None else len(rows)):
+            # 1단계: 이진 부호로 후보 선별 (행 번호 순으로 정렬해 mmap을 순서대로 읽음)
+            codes, thresholds = self.codes(space)
+            hamming = hamming_distances(codes if rows is None else codes[:, rows], binary_codes(query, thresholds))
+            selected = np.argpartition(hamming, max(shortlist, top_k) - 1)[:max(shortlist, top_k)]
+            rows = np.sort(selected if rows is None else rows[selected])
+
+        if rows is None or len(rows) * 2 > self.count():
+            # 후보가 많으면 벡터를 모으는(복사) 비용이 더 크므로 전체 계산 후 후보 외 행을 제외
+            distances = norms_sq - 2 * (vectors @ query) + float(query @ query)
+            if rows is not None:
+                excluded = np.ones(len(distances), dtype=bool)
+                excluded[rows] = False
+                distances[excluded] = np.inf
+            candidates = None
+        else:
+            distances = norms_sq[rows] - 2 * (vectors[rows] @ query) + float(query @ query)
+            candidates = rows
+
+        top_k = min(top_k, len(rows) if rows is not None else len(distances))
+        top = np.argpartition(distances, top_k - 1)[:top_k]
+        top = top[np.argsort(distances[top])]
+        return (top if candidates is None else candidates[top]), distances[top]
+
+    def query(self, query_embeddings, n_results: int = 10, search_filter=None, space: Optional[str] = None,
+              shortlist: Optional[int] = None) -> Dict:
+        """
+        ChromaDB collection.query 호환 인터페이스.
+        distances(제곱 L2, 거리 오름차순)와 함께 similarities(코사인 유사도)를 돌려줍니다
+        (PriorRanker와 앱은 백엔드와 관계없이 similarities를 씀, search_filters.query_index 참고).
+
+        Args:
+            search_filter: search_filters.SearchFilter (ChromaDB의 where 대신)
+            space: 검색할 임베딩 공간 (None이면 기본 공간)
+            shortlist: 2단계 검색 후보 수 (None이면 정확 검색)
+        """
+        rows = search_filter.candidate_rows(self.chunks) if search_filter is not None else None
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": [], "similarities": []}
+        norms_sq = self._array(f"norms_sq/{self._space(space)}")
+        for query_embedding in query_embeddings:
+            top_rows, distances = self.search(query_embedding, n_results, rows, space, shortlist)
+            # |v - q|^2 = |v|^2 + |q|^2 - 2 v·q -> cos = v·q / (|v||q|) (정규화한 번들이면 1 - distance / 2)
+            query = self.transform(query_embedding, space)
+            query_sq = float(query @ query)
+            vector_sq = norms_sq[top_rows].astype(np.float64)
+            denominator = np.sqrt(vector_sq * query_sq)
+            similarities = np.where(denominator > 0, (vector_sq + query_sq - distances) / 2 / np.where(
+                denominator > 0, denominator, 1), 0.0)
+            result["similarities"].append(similarities.tolist())
+            result["ids"].append([f"chunk_{row}" for row in top_rows])
+            # top-k 행만 dict/문자열로 만듦
+            result["documents"].append([self.chunks.snippet(row) for row in top_rows])
+            result["metadatas"].append([self.chunks.metadata(row) for row in top_rows])
+            result["distances"].append(distances.tolist())
+        return result
+
+    def close(self):
+        self._cache.clear()
+        self._mmap.close()
+        self._file.close()
+
+
+def export_from_collections(collections: Dict[str, object], manifest: Dict, output_path,
+                            videos: Optional[Dict[str, Dict]] = None, reductions: Optional[Dict[str, str]] = None) -> Dict:
+    """
+    공간별 ChromaDB 컬렉션을 하나의 번들 파일로 내보냅니다. 청크 행 번호는 id(chunk_<n>)의 n 순서입니다.
+    메타데이터와 자막은 첫 번째(기본 공간) 컬렉션에서 읽고, 나머지 컬렉션에서는 임베딩만 읽습니다.
+
+    Args:
+        collections: 공간 이름 -> ChromaDB 컬렉션 (첫 번째가 기본 공간)
+        manifest: 번들에 포함할 manifest
+        output_path: 출력 파일 경로
+        videos: video_id별 영상 속성 (None이면 data/videos_metadata.json)
+        reductions: 공간 이름 -> 차원 축소 지정 ("pca:256", "truncate:512", dim_reduction 참고).
+            축소하지 않는 공간도 단위 벡터로 정규화해 저장합니다 (공간마다 같은 거리 범위)
+
+    Returns:
+        번들에 기록한 manifest
+    """
+    if videos is None:
+        videos = load_video_attributes()
+
+    def ordered(data):
+        return sorted(range(len(data["ids"])), key=lambda i: int(data["ids"][i].split("_")[-1]))
+
+    spaces = {}
+    chunks = None
+    for space, collection in collections.items():
+        if chunks is None:
+            data = collection.get(include=["embeddings", "metadatas", "documents"])
+            order = ordered(data)
+            ids = [data["ids"][i] for i in order]
+            chunks = ChunkStore.from_chunks(
+                [data["metadatas"][i] for i in order],
+                [data["documents"][i] for i in order],
+                videos,
+            )
+        else:
+            data = collection.get(include=["embeddings"])
+            order = ordered(data)
+            if [data["ids"][i] for i in order] != ids:
+                raise ValueError(f"공간 '{space}'의 청크 id가 기본 공간과 다릅니다")
+        spaces[space] = np.asarray(data["embeddings"], dtype=np.float32)[order]
+
+    # 차원 축소: 코퍼스 벡터로 변환을 만들고 축소된 벡터를 저장 (쿼리 변환은 번들에 함께 저장)
+    space_infos = {space: {k: v for k, v in info.items() if k != "reduction"}
+                   for space, info in manifest.get("spaces", {}).items()}
+    reductions = {space: reduction for space, reduction in
+                  ((space, parse_reduction(spec)) for space, spec in (reductions or {}).items()) if reduction}
+    for space, reduction in reductions.items():
+        check_reduction(reduction, spaces[space].shape[1], space_infos.get(space, {}).get("model_name"), space)
+    projections = {}
+    for space in spaces:
+        if space not in reductions:
+            spaces[space] = normalize(spaces[space]).astype(np.float32)
+            continue
+        projection = Projection.fit(spaces[space], *reductions[space])
+        spaces[space] = projection.apply(spaces[space])
+        projections[space] = projection
+        info = space_infos.setdefault(space, {})
+        info.setdefault("dimension", projection.source_dim)
+        info["reduction"] = projection.info()
+
+    # 최신성 prior는 빌드 날짜 기준
+    priors = VideoPriors.from_chunk_store(chunks)
+    manifest = {**manifest, "default_space": next(iter(collections)),
+                "priors_reference_date": date.today().isoformat(), "normalized_vectors": True}
+    if space_infos:
+        manifest["spaces"] = space_infos
+    write_bundle(output_path, manifest, spaces, chunks, priors, projections)
+    return manifest
+
+
+def export_from_collection(collection, manifest: Dict, output_path, videos: Optional[Dict[str, Dict]] = None):
+    """단일 컬렉션을 번들로 내보냅니다 (공간 이름은 manifest의 model_type)"""
+    export_from_collections({manifest.get("model_type", "default"): collection}, manifest, output_path, videos)
+
+
+def export_snapshot(output_path, version: Optional[str] = None, index_root: str = "data/index",
+                    reduction=None) -> Path:
+    """
+    스냅샷의 ChromaDB를 번들로 내보냅니다.
+    배포된 스냅샷은 바꾸지 않으므로(manifest checksum) 스냅샷 디렉토리 안에는 쓰지 않습니다.
+    번들이 든 스냅샷이 필요하면 build_vector_db.py로 새로 빌드합니다.
+
+    Args:
+        output_path: 출력 경로 (스냅샷 디렉토리 밖)
+        version: 스냅샷 버전 (None이면 현재 배포된 버전)
+        index_root: 인덱스 루트 디렉토리
+        reduction: 차원 축소 지정 (dim_reduction.reductions_for_spaces 형식, None이면 빌드 때의 축소 설정 유지)
+
+    Returns:
+        번들 파일 경로
+    """
+    import chromadb
+    from index_snapshots import current_version, read_manifest, snapshot_path
+
+    output_path = Path(output_path)
+    snapshots_dir = (Path(index_root) / "snapshots").resolve()
+    if output_path.resolve().is_relative_to(snapshots_dir):
+        raise ValueError(f"스냅샷 디렉토리 안에는 내보낼 수 없습니다 (배포된 스냅샷은 변경 불가): {output_path}")
+    version = version or current_version(index_root)
+    if version is None:
+        raise ValueError("배포된 스냅샷이 없습니다. build_vector_db.py를 먼저 실행하세요.")
+    path = snapshot_path(version, index_root)
+    manifest = read_manifest(path)
+    if manifest is None:
+        raise ValueError(f"스냅샷 '{version}'에 manifest가 없습니다")
+
+    if not (path / "chroma").is_dir():
+        # ingest_daemon이 만든 스냅샷은 번들만 있음 (PersistentClient가 빈 디렉토리를 만들지 않도록 먼저 확인)
+        raise ValueError(f"스냅샷 '{version}'에 ChromaDB가 없습니다 (번들은 스냅샷의 {BUNDLE_FILE})")
+    client = chromadb.PersistentClient(path=str(path / "chroma"))
+    spaces = manifest.get("spaces") or {manifest.get("model_type", "default"): {"collection_name": manifest["collection_name"]}}
+    collections = {space: client.get_collection(name=info["collection_name"]) for space, info in spaces.items()}
+    if reduction is not None:
+        reductions = reductions_for_spaces(reduction, spaces)
+    else:
+        reductions = {space: info["reduction"] for space, info in spaces.items() if info.get("reduction")}
+    export_from_collections(collections, manifest, output_path, reductions=reductions)
+    return output_path
+
+
+def _directory_size(path: Path) -> int:
+    return sum(p.stat().st_size for p in Path(path).rglob("*") if p.is_file())
+
+
+def benchmark(bundle_path, chroma_path: str, collection_name: str = "gomhee_videos", runs: int = 5):
+    """
+    번들 파일과 ChromaDB 디렉토리(chroma_path)의 크기와 time-to-first-query 비교.
+    크기는 검색에 필요한 인덱스만 비교합니다 (자막, chunks.json 등 원본 데이터는 어느 쪽도 배포하지 않음).
+    각 측정은 새 파이썬 프로세스에서 import부터 첫 검색까지의 시간입니다
+    (임베딩 모델 로딩은 두 방식에 공통이므로 제외, OS 페이지 캐시는 데워진 상태).
+    """
+    import subprocess
+    import sys
+    import time
+
+    dim = IndexBundle(bundle_path).manifest["dimension"]
+    scripts = {
+        "chroma": (
+            "import numpy as np, chromadb\n"
+            f"c = chromadb.PersistentClient(path={str(chroma_path)!r}).get_collection({collection_name!r})\n"
+            f"c.query(query_embeddings=[np.ones({dim}, dtype=np.float32).tolist()], n_results=2)\n"
+        ),
+        "bundle": (
+            "import numpy as np\n"
+            "from index_bundle import IndexBundle\n"
+            f"b = IndexBundle({str(bundle_path)!r})\n"
+            f"b.query([np.ones({dim}, dtype=np.float32)], n_results=2)\n"
+        ),
+    }
+
+    print(f"{'레이아웃':<10} {'크기(MB)':>10} {'첫 검색까지(s) 중앙값':>22}")
+    sizes = {"chroma": _directory_size(Path(chroma_path)), "bundle": Path(bundle_path).stat().st_size}
+    for name, script in scripts.items():
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", script], check=True, cwd=Path(__file__).parent)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        print(f"{name:<10} {sizes[name] / 1024 / 1024:>10.2f} {timings[len(timings) // 2]:>22.3f}")
+
+
+def benchmark_shortlist(bundle: IndexBundle, sizes=(100, 300, 1000), num_queries: int = 200, top_k: int = 10,
+                        space: Optional[str] = None, seed: int = 0):
+    """
+    정확 검색과 2단계 검색(shortlist 크기별)의 지연(p50/p95)과 recall@k 비교.
+    쿼리는 임의의 두 청크 벡터의 평균 (특정 청크와 정확히 일치하지 않는 질문 대용)
+    """
+    import time
+
+    vectors = bundle.space_vectors(space)
+    codes, _ = bundle.codes(space)
+    rng = np.random.default_rng(seed)
+    pairs = rng.choice(len(vectors), (num_queries, 2))
+    queries = vectors[pairs].mean(axis=1)
+
+    def run(shortlist):
+        timings, found = [], []
+        for query in queries:
+            start = time.perf_counter()
+            rows, _ = bundle.search(query, top_k, space=space, shortlist=shortlist)
+            timings.append((time.perf_counter() - start) * 1000)
+            found.append(rows)
+        return np.percentile(timings, [50, 95]), found
+
+    print(f"청크 {len(vectors)}개, {vectors.shape[1]}차원, 쿼리 {num_queries}개, top-{top_k}")
+    print(f"벡터 {vectors.nbytes / 1024 / 1024:.2f} MB, 이진 부호 {codes.nbytes / 1024 / 1024:.2f} MB")
+    print(f"{'방식':<16} {'p50(ms)':>10} {'p95(ms)':>10} {f'recall@{top_k}':>10}")
+    (p50, p95), truth = run(None)
+    print(f"{'정확 검색':<16} {p50:>10.3f} {p95:>10.3f} {1.0:>10.3f}")
+    for size in sizes:
+        (p50, p95), found = run(size)
+        recall = np.mean([len(set(t) & set(f)) / len(t) for t, f in zip(truth, found)])
+        print(f"{f'shortlist {size}':<16} {p50:>10.3f} {p95:>10.3f} {recall:>10.3f}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="배포용 인덱스 번들")
+    parser.add_argument("--index-root", default="data/index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export_parser = sub.add_parser("export", help="스냅샷을 번들로 내보내기")
+    export_parser.add_argument("--snapshot", default=None, help="스냅샷 버전 (기본: 현재 버전)")
+    export_parser.add_argument("--output", default=DEFAULT_BUNDLE_PATH, help="출력 경로 (스냅샷 디렉토리 밖)")
+    export_parser.add_argument("--reduce", nargs="+", default=None,
+                               help="차원 축소 (예: pca:256, openai=truncate:1024, none. 기본: 빌드 때 설정 유지)")
+    bench_parser = sub.add_parser("benchmark", help="번들 vs ChromaDB 크기/첫 검색 시간")
+    bench_parser.add_argument("--runs", type=int, default=5)
+    shortlist_parser = sub.add_parser("shortlist", help="정확 검색 vs 2단계 검색 지연/recall")
+    shortlist_parser.add_argument("--sizes", type=int, nargs="+", default=[100, 300, 1000])
+    shortlist_parser.add_argument("--space", default=None)
+    shortlist_parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        output = export_snapshot(args.output, args.snapshot, args.index_root, args.reduce)
+        print(f"번들 저장: {output} ({output.stat().st_size / 1024 / 1024:.2f} MB)")
+    elif args.command == "shortlist":
+        from index_snapshots import current_snapshot
+
+        _, path, _ = current_snapshot(args.index_root)
+        bundle_path = path / BUNDLE_FILE if path is not None else Path(DEFAULT_BUNDLE_PATH)
+        benchmark_shortlist(IndexBundle(bundle_path), args.sizes, top_k=args.top_k, space=args.space)
+    else:
+        from index_snapshots import current_snapshot
+
+        version, path, manifest = current_snapshot(args.index_root)
+        if version is None:
+            raise SystemExit("배포된 스냅샷이 없습니다. build_vector_db.py를 먼저 실행하세요.")
+        if not (path / "chroma").is_dir():
+            raise SystemExit(f"스냅샷 '{version}'에 ChromaDB가 없어 비교할 수 없습니다 (ingest_daemon이 만든 번들 전용 스냅샷)")
+        bundle_path = path / BUNDLE_FILE
+        if bundle_path.exists():
+            benchmark(bundle_path, path / "chroma", manifest["collection_name"], runs=args.runs)
+        else:
+            # 번들 없이 빌드된 스냅샷: 스냅샷은 그대로 두고 임시 파일로 내보내 비교
+            import tempfile
+
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                bundle_path = export_snapshot(Path(tmp_dir) / BUNDLE_FILE, version, args.index_root)
+                benchmark(bundle_path, path / "chroma", manifest["collection_name"], runs=args.runs)
@@ -0,0 +1,280 @@
+"""
+버전별 인덱스 스냅샷 관리
+build_vector_db는 매 빌드마다 새 스냅샷 디렉토리에 인덱스를 만들고 manifest를 남긴 뒤,
+CURRENT 포인터 파일을 원자적으로 교체(os.replace)하여 배포합니다.
+실행 중인 app.py는 IndexManager로 포인터 변경을 감지해 백그라운드에서 새 인덱스를 로드한 뒤 교체합니다.
+
+디렉토리 구조:
+    data/index/
+        CURRENT                      # 현재 버전 이름 한 줄
+        snapshots/<version>/
+            manifest.json            # 마지막에 기록됨 (manifest가 없으면 미완성 스냅샷)
+            chroma/                  # ChromaDB 저장소
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+DEFAULT_INDEX_ROOT = "data/index"
+MANIFEST_FILE = "manifest.json"
+POINTER_FILE = "CURRENT"
+
+
+def new_snapshot(index_root: str = DEFAULT_INDEX_ROOT):
+    """
+    새 스냅샷 디렉토리를 만듭니다.
+
+    Args:
+        index_root: 인덱스 루트 디렉토리
+
+    Returns:
+        (버전 이름, 스냅샷 경로)
+    """
+    version = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    path = Path(index_root) / "snapshots" / version
+    path.mkdir(parents=True, exist_ok=False)
+    return version, path
+
+
+def directory_checksum(path: Path) -> str:
+    """스냅샷 내 모든 파일(manifest 제외)의 경로와 내용으로 계산한 sha256"""
+    digest = hashlib.sha256()
+    for file in sorted(p for p in Path(path).rglob("*") if p.is_file()):
+        relative = file.relative_to(path).as_posix()
+        if relative == MANIFEST_FILE:
+            continue
+        digest.update(relative.encode("utf-8") + b"\0")
+        with open(file, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def write_manifest(path: Path, **fields) -> Dict:
+    """
+    스냅샷 manifest를 기록합니다. 스냅샷 내용이 모두 쓰인 뒤 마지막으로 호출해야 합니다.
+
+    Args:
+        path: 스냅샷 경로
+        **fields: model_type, model_name, dimension, chunk_count 등
+
+    Returns:
+        기록된 manifest dict
+    """
+    path = Path(path)
+    manifest = {
+        "version": path.name,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        **fields,
+        "checksum": directory_checksum(path),
+    }
+    tmp_file = path / (MANIFEST_FILE + ".tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_file, path / MANIFEST_FILE)
+    return manifest
+
+
+def read_manifest(path: Path) -> Optional[Dict]:
+    """manifest를 읽습니다. 없으면(미완성 스냅샷) None"""
+    manifest_file = Path(path) / MANIFEST_FILE
+    if not manifest_file.exists():
+        return None
+    with open(manifest_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def publish(version: str, index_root: str = DEFAULT_INDEX_ROOT):
+    """
+    CURRENT 포인터를 원자적으로 교체하여 스냅샷을 배포합니다.
+
+    Args:
+        version: 배포할 스냅샷 버전
+        index_root: 인덱스 루트 디렉토리
+    """
+    root = Path(index_root)
+    if read_manifest(root / "snapshots" / version) is None:
+        raise ValueError(f"스냅샷 '{version}'에 manifest가 없습니다 (미완성 스냅샷은 배포할 수 없음)")
+
+    tmp_file = root / (POINTER_FILE + ".tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        f.write(version + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, root / POINTER_FILE)
+
+
+def current_version(index_root: str = DEFAULT_INDEX_ROOT) -> Optional[str]:
+    """현재 배포된 버전 이름 (없으면 None)"""
+    pointer = Path(index_root) / POINTER_FILE
+    try:
+        return pointer.read_text(encoding="utf-8").strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def snapshot_path(version: str, index_root: str = DEFAULT_INDEX_ROOT) -> Path:
+    return Path(index_root) / "snapshots" / version
+
+
+def current_snapshot(index_root: str = DEFAULT_INDEX_ROOT):
+    """
+    현재 배포된 스냅샷
+
+    Returns:
+        (버전, 경로, manifest). 배포된 스냅샷이 없으면 (None, None, None)
+    """
+    version = current_version(index_root)
+    if version is None:
+        return None, None, None
+    path = snapshot_path(version, index_root)
+    return version, path, read_manifest(path)
+
+
+def prune_snapshots(index_root: str = DEFAULT_INDEX_ROOT, keep: int = 3):
+    """
+    오래된 스냅샷을 삭제합니다. 현재 버전과 최근 keep개는 남깁니다.
+    (실행 중인 앱이 직전 버전을 아직 쓰고 있을 수 있으므로 keep은 2 이상 권장)
+    """
+    snapshots_dir = Path(index_root) / "snapshots"
+    if not snapshots_dir.exists():
+        return
+    current = current_version(index_root)
+    versions = sorted(p.name for p in snapshots_dir.iterdir() if p.is_dir())
+    for version in versions[:-keep] if keep else versions:
+        if version != current:
+            shutil.rmtree(snapshots_dir / version, ignore_errors=True)
+
+
+class IndexHandle:
+    """한 버전의 로드된 인덱스 (검색 요청 하나는 하나의 handle만 사용)"""
+
+    def __init__(self, version: Optional[str], manifest: Optional[Dict], index):
+        self.version = version
+        self.manifest = manifest or {}
+        self.index = index
+        # 이 버전의 인덱스로 만든 부가 객체 (재정렬 prior 등). 인덱스(mmap)를 참조하므로 handle과 함께 해제되도록
+        # 버전을 키로 하는 전역 캐시 대신 여기에 둠
+        self._derived: Dict[str, object] = {}
+        self._derived_lock = threading.Lock()
+
+    def derived(self, name: str, factory: Callable):
+        """name의 부가 객체. 처음 요청될 때 factory(handle)로 한 번 만듦 (스레드 안전)"""
+        with self._derived_lock:
+            if name not in self._derived:
+                self._derived[name] = factory(self)
+            return self._derived[name]
+
+
+class IndexManager:
+    """
+    CURRENT 포인터를 주기적으로 확인하고, 새 버전이 배포되면 백그라운드 스레드에서
+    로드/워밍업을 마친 뒤 handle을 교체합니다. 교체 전까지는 기존 인덱스로 계속 응답하므로
+    재시작이나 지연 급증 없이 새 인덱스로 넘어갑니다.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[Optional[str], Optional[Path], Optional[Dict]], object],
+        index_root: str = DEFAULT_INDEX_ROOT,
+        check_interval: float = 5.0,
+        on_swap: Optional[Callable[[IndexHandle], None]] = None
+    ):
+        """
+        Args:
+            loader: (version, snapshot_path, manifest) -> 인덱스 객체.
+                    배포된 스냅샷이 없으면 (None, None, None)으로 호출됨 (기존 data/chroma_db 등)
+            index_root: 인덱스 루트 디렉토리
+            check_interval: 포인터 확인 최소 간격 (초)
+            on_swap: 새 handle로 교체된 직후 호출 (버전별 캐시 정리 등)
+        """
+        self.loader = loader
+        self.index_root = index_root
+        self.check_interval = check_interval
+        self.on_swap = on_swap
+        self._lock = threading.Lock()
+        self._loading_version = None
+        self._last_check = time.monotonic()
+        self.last_error: Optional[Exception] = None
+
+        # 첫 로드는 동기로 (로드할 인덱스가 없으면 앱이 응답할 수 없으므로)
+        self._handle = self._load(current_version(index_root))
+
+    def _load(self, version: Optional[str]) -> IndexHandle:
+        if version is None:
+            return IndexHandle(None, None, self.loader(None, None, None))
+        path = snapshot_path(version, self.index_root)
+        manifest = read_manifest(path)
+        if manifest is None:
+            raise ValueError(f"스냅샷 '{version}'에 manifest가 없습니다")
+        return IndexHandle(version, manifest, self.loader(version, path, manifest))
+
+    def get(self) -> IndexHandle:
+        """현재 handle 반환. 확인 주기가 지났으면 새 버전 여부를 확인합니다."""
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval:
+            self._last_check = now
+            self._check_for_update()
+        return self._handle
+
+    def _check_for_update(self):
+        version = current_version(self.index_root)
+        with self._lock:
+            if version is None or version == self._handle.version or version == self._loading_version:
+                return
+            self._loading_version = version
+        threading.Thread(target=self._swap, args=(version,), name=f"index-load-{version}", daemon=True).start()
+
+    def _swap(self, version: str):
+        try:
+            handle = self._load(version)
+        except Exception as e:
+            # 로드 실패 시 기존 인덱스 유지, 다음 확인 때 재시도
+            self.last_error = e
+            print(f"인덱스 '{version}' 로드 실패: {e}")
+            return
+        finally:
+            with self._lock:
+                self._loading_version = None
+
+        self._handle = handle
+        print(f"인덱스 교체됨: {version}")
+        if self.on_swap is not None:
+            self.on_swap(handle)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="인덱스 스냅샷 관리")
+    parser.add_argument("--index-root", default=DEFAULT_INDEX_ROOT)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="스냅샷 목록")
+    publish_parser = sub.add_parser("publish", help="스냅샷 배포 (롤백에도 사용)")
+    publish_parser.add_argument("version")
+    prune_parser = sub.add_parser("prune", help="오래된 스냅샷 삭제")
+    prune_parser.add_argument("--keep", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.command == "list":
+        current = current_version(args.index_root)
+        snapshots_dir = Path(args.index_root) / "snapshots"
+        for path in sorted(snapshots_dir.iterdir()) if snapshots_dir.exists() else []:
+            manifest = read_manifest(path)
+            marker = "*" if path.name == current else " "
+            if manifest is None:
+                print(f"{marker} {path.name}  (미완성)")
+            else:
+                print(f"{marker} {path.name}  {manifest.get('model_name')}  "
+                      f"dim={manifest.get('dimension')}  chunks={manifest.get('chunk_count')}")
+    elif args.command == "publish":
+        publish(args.version, args.index_root)
+        print(f"배포됨: {args.version}")
+    else:
+        prune_snapshots(args.index_root, keep=args.keep)
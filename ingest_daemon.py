@@ -0,0 +1,377 @@
+"""
+자막 파일 자동 반영 데몬
+data/subtitles/에 자막 JSON이 새로 생기거나 바뀌면 그 영상만 청킹/임베딩하고, 현재 배포된 번들에서
+그 영상의 행만 교체한 새 스냅샷을 만들어 배포합니다. 실행 중인 app.py는 IndexManager가 CURRENT 변경을
+감지해 인덱스를 교체하므로 재시작 없이 검색에 반영됩니다.
+
+- 파일 감시: watchdog (설치되어 있지 않으면 mtime 폴링)
+- debounce: 파일에 더 이상 이벤트가 없이 debounce초가 지나면 처리하고, 그동안 모인 파일은 스냅샷 하나로 묶음
+  (계속 바뀌는 파일도 첫 이벤트 후 max_wait초가 지나면 처리)
+- 배포 간격: 한 번 배포한 뒤 min_interval초 동안 조용해진 파일은 모아 두었다가 다음 스냅샷 하나로 반영
+  (반영마다 번들 전체를 다시 쓰므로, 파일이 하나씩 도착해도 스냅샷이 파일 수만큼 생기지 않도록).
+  직전 배포 후 min_interval초가 지났으면 debounce 직후 바로 반영 (한가할 때 도착->배포는 debounce + 처리 시간)
+- 반영이 실패하면 (임베딩 오류, 디스크 부족 등) 그 파일들을 다음 배치에 다시 넣어 간격을 늘려 가며 재시도
+- 임베딩 모델은 공간마다 처음 한 번만 로드해 계속 사용
+- 자막 파일이 지워지면 그 영상의 행을 삭제
+- 파일 도착부터 배포까지 단계별 시간 출력 (앱 반영에는 IndexManager 확인 주기(INDEX_CHECK_INTERVAL)와 로드 시간이 더해짐)
+
+새 스냅샷에는 번들만 들어갑니다 (ChromaDB 없음). 전체 재구축은 지금처럼 chunk_subtitles.py + build_vector_db.py로 합니다.
+번들은 스냅샷마다 새 파일이므로 바뀐 영상이 하나여도 모든 청크의 메타데이터와 벡터를 다시 씁니다
+(쓰기 비용은 임베딩이 아닌 번들 크기에 비례, 영상 임베딩은 바뀐 영상만 계산).
+
+사용 예:
+    python ingest_daemon.py
+    python ingest_daemon.py --once data/subtitles/REC2H8j2Bno.json     # 파일 하나만 반영하고 종료
+"""
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from chunk_store import ChunkStore, load_video_attributes
+from chunk_subtitles import chunk_subtitle, full_text, is_transcript
+from embedding_service import get_embedding_model
+from index_bundle import BUNDLE_FILE, IndexBundle, write_bundle
+from index_snapshots import DEFAULT_INDEX_ROOT, current_snapshot, new_snapshot, prune_snapshots, publish, write_manifest
+from ranking import VideoPriors
+
+DEFAULT_SUBTITLES_DIR = "data/subtitles"
+# 자막이 아닌 JSON (download_subtitles의 실패 로그)
+IGNORED_FILES = {"failed_videos.json"}
+DEBOUNCE_SECONDS = 1.0
+# 계속 이벤트가 오는 파일도 첫 이벤트 후 이 시간이 지나면 처리
+MAX_WAIT_SECONDS = 20.0
+# 배포 사이 최소 간격 (그동안 조용해진 파일은 다음 스냅샷에 함께 반영)
+MIN_PUBLISH_INTERVAL = 5.0
+# 반영 실패 시 재시도 간격 (실패마다 두 배, 최대 RETRY_MAX_DELAY초)와 포기할 때까지의 재시도 수
+RETRY_BASE_DELAY = 2.0
+RETRY_MAX_DELAY = 60.0
+MAX_RETRIES = 5
+POLL_INTERVAL = 0.5
+
+
+def load_video_chunks(path: Path, chunk_duration: float = 120.0):
+    """자막 JSON -> (video_id, 청크 리스트). 청크에는 임베딩할 full_text 포함"""
+    with open(path, "r", encoding="utf-8") as f:
+        subtitle_data = json.load(f)
+    if not is_transcript(subtitle_data):
+        raise ValueError("자막 형식이 아님")
+    chunks = chunk_subtitle(subtitle_data, chunk_duration)
+    for chunk in chunks:
+        chunk["full_text"] = full_text(chunk)
+    return subtitle_data["video_id"], chunks
+
+
+def replace_videos(bundle: IndexBundle, new_chunks: Dict[str, List[Dict]], new_vectors: Dict[str, Dict[str, np.ndarray]],
+                   videos: Dict[str, Dict]):
+    """
+    번들의 청크/벡터에서 new_chunks의 영상 행을 빼고 새 행을 뒤에 붙입니다.
+    남는 행도 모두 복사하므로 (새 번들 전체를 메모리에 만들어 다시 씀) 비용은 바뀐 영상 수가 아닌 번들 크기에 비례합니다.
+
+    Args:
+        bundle: 현재 번들
+        new_chunks: video_id -> 새 청크 (빈 리스트면 영상 삭제)
+        new_vectors: 공간 -> video_id -> 새 청크 벡터 (번들에 저장된 차원, 축소한 공간은 축소 후)
+        videos: video_id별 영상 속성 (load_video_attributes)
+
+    Returns:
+        (공간별 벡터, ChunkStore)
+    """
+    old = bundle.chunks
+    replaced = [number for number in map(old.video_number, new_chunks) if number is not None]
+    keep_rows = np.flatnonzero(~np.isin(old.video_index, replaced))
+
+    added = [chunk for video_id in new_chunks for chunk in new_chunks[video_id]]
+    metadatas = [old.metadata(int(row)) for row in keep_rows] + added
+    documents = [old.snippet(int(row)) for row in keep_rows] + [chunk["text"] for chunk in added]
+    chunks = ChunkStore.from_chunks(metadatas, documents, videos)
+
+    spaces = {}
+    for space in bundle.spaces:
+        kept = bundle.space_vectors(space)[keep_rows]
+        spaces[space] = np.concatenate([kept] + [new_vectors[space][video_id] for video_id in new_chunks
+                                                 if len(new_chunks[video_id])])
+    return spaces, chunks
+
+
+class Ingestor:
+    """변경된 자막 파일들을 현재 스냅샷에 반영해 새 스냅샷으로 배포"""
+
+    def __init__(self, index_root: str = DEFAULT_INDEX_ROOT, videos_metadata_file: str = "data/videos_metadata.json",
+                 chunk_duration: float = 120.0, keep_snapshots: int = 3):
+        self.index_root = index_root
+        self.videos_metadata_file = videos_metadata_file
+        self.chunk_duration = chunk_duration
+        self.keep_snapshots = keep_snapshots
+        self._models = {}
+        self.latencies: List[float] = []
+
+    def model(self, model_type: str):
+        if model_type not in self._models:
+            print(f"임베딩 모델 로딩: {model_type}")
+            self._models[model_type] = get_embedding_model(model_type)
+        return self._models[model_type]
+
+    def warm_up(self):
+        """현재 스냅샷의 공간별 모델을 미리 로드 (첫 파일이 모델 로딩 시간을 기다리지 않도록)"""
+        _, bundle, _ = self._current_bundle()
+        for space in bundle.spaces:
+            self.model(bundle.space_info(space).get("model_type", space))
+
+    def _current_bundle(self):
+        """(버전, 번들, manifest). CURRENT를 한 번만 읽어 번들과 기반 버전이 같은 스냅샷을 가리키도록"""
+        version, path, manifest = current_snapshot(self.index_root)
+        if path is None or not (path / BUNDLE_FILE).exists():
+            raise ValueError("배포된 번들 스냅샷이 없습니다. build_vector_db.py를 먼저 실행하세요.")
+        return version, IndexBundle(path / BUNDLE_FILE), manifest
+
+    def ingest(self, files: Dict[Path, float]) -> Optional[Dict]:
+        """
+        Args:
+            files: 자막 파일 경로 -> 도착 시각 (time.time, 지워진 파일은 영상 삭제)
+
+        Returns:
+            {version, videos, chunks, timings(단계별 초), latency(가장 먼저 도착한 파일부터 배포까지 초)}.
+            반영할 영상이 없으면 None
+        """
+        timings = {}
+        start = time.perf_counter()
+        new_chunks = {}
+        for path in files:
+            if path.exists():
+                try:
+                    video_id, chunks = load_video_chunks(path, self.chunk_duration)
+                except (ValueError, KeyError) as e:  # 쓰는 중인 파일, 자막 형식이 아닌 JSON
+                    print(f"{path.name}: 건너뜀 ({e})")
+                    continue
+            else:
+                video_id, chunks = path.stem, []
+            new_chunks[video_id] = chunks
+        if not new_chunks:
+            return None
+        timings["chunk"] = time.perf_counter() - start
+
+        # 번들 배열(청크 컬럼, PCA 변환)은 mmap 뷰이므로 닫지 않고 참조가 사라질 때 해제되게 둠
+        base_version, bundle, base_manifest = self._current_bundle()
+        start = time.perf_counter()
+        new_vectors = {}
+        for space in bundle.spaces:
+            info = bundle.space_info(space)
+            model = self.model(info.get("model_type", space))
+            new_vectors[space] = {}
+            for video_id, chunks in new_chunks.items():
+                if not chunks:
+                    continue
+                embeddings = np.asarray(model.embed_batch([chunk["full_text"] for chunk in chunks]), dtype=np.float32)
+                if embeddings.shape[1] != info["dimension"]:
+                    raise ValueError(f"공간 '{space}': 모델 차원({embeddings.shape[1]})이 번들({info['dimension']})과 다릅니다")
+                # 번들에 저장된 형태로 (축소한 공간은 축소, 정규화한 번들은 정규화)
+                new_vectors[space][video_id] = bundle.transform(embeddings, space)
+        timings["embed"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        spaces, chunks = replace_videos(bundle, new_chunks, new_vectors,
+                                        load_video_attributes(self.videos_metadata_file))
+        projections = {space: bundle.projection(space) for space in bundle.spaces if bundle.projection(space)}
+        version, snapshot_dir = new_snapshot(self.index_root)
+        manifest_fields = {k: v for k, v in base_manifest.items() if k not in ("version", "created_at", "checksum")}
+        manifest_fields.update({"format": "bundle", "chunk_count": len(chunks), "base_version": base_version,
+                                "ingested_videos": sorted(new_chunks)})
+        write_bundle(snapshot_dir / BUNDLE_FILE, {**bundle.manifest, **manifest_fields, "version": version},
+                     spaces, chunks, VideoPriors.from_chunk_store(chunks), projections)
+        timings["bundle"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        write_manifest(snapshot_dir, **manifest_fields)
+        publish(version, self.index_root)
+        prune_snapshots(self.index_root, keep=self.keep_snapshots)
+        timings["publish"] = time.perf_counter() - start
+
+        latency = time.time() - min(files.values())
+        self.latencies.append(latency)
+        return {"version": version, "videos": new_chunks, "chunks": len(chunks), "timings": timings,
+                "latency": latency}
+
+
+class ChangeCollector:
+    """
+    파일별 이벤트를 모아 debounce (마지막 이벤트 후 debounce초, 또는 첫 이벤트 후 max_wait초가 지난 파일만 내보냄,
+    스레드 안전)
+    """
+
+    def __init__(self, debounce: float = DEBOUNCE_SECONDS, max_wait: float = MAX_WAIT_SECONDS):
+        self.debounce = debounce
+        self.max_wait = max_wait
+        self._pending = {}  # 경로 -> [첫 이벤트 시각(time.time), 첫 이벤트(monotonic), 마지막 이벤트(monotonic)]
+        self._lock = threading.Lock()
+
+    def notify(self, path):
+        path = Path(path)
+        if path.suffix != ".json" or path.name in IGNORED_FILES:
+            return
+        with self._lock:
+            now = time.monotonic()
+            entry = self._pending.setdefault(path, [time.time(), now, now])
+            entry[2] = now
+
+    def ready(self) -> Dict[Path, float]:
+        """조용해진(또는 max_wait초를 넘긴) 파일 -> 첫 이벤트 시각"""
+        now = time.monotonic()
+        with self._lock:
+            settled = {path: entry[0] for path, entry in self._pending.items()
+                       if now - entry[2] >= self.debounce or now - entry[1] >= self.max_wait}
+            for path in settled:
+                del self._pending[path]
+        return settled
+
+
+def watch(directory, collector: ChangeCollector, poll_interval: float = POLL_INTERVAL):
+    """
+    디렉토리 변경을 collector로 전달하는 감시를 시작합니다.
+
+    Returns:
+        stop() 함수
+    """
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        Observer = None
+
+    if Observer is not None:
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.is_directory:
+                    return
+                collector.notify(getattr(event, "dest_path", None) or event.src_path)
+                if event.event_type == "moved":
+                    collector.notify(event.src_path)
+
+        observer = Observer()
+        observer.schedule(Handler(), str(directory), recursive=False)
+        observer.start()
+
+        def stop():
+            observer.stop()
+            observer.join()
+        return stop
+
+    # watchdog이 없으면 mtime 폴링
+    print(f"watchdog 미설치: {poll_interval}초 간격으로 폴링합니다")
+    stopped = threading.Event()
+
+    def scan():
+        return {path: path.stat().st_mtime_ns for path in Path(directory).glob("*.json")}
+
+    def run():
+        seen = scan()
+        while not stopped.wait(poll_interval):
+            current = scan()
+            for path in current.keys() | seen.keys():
+                if current.get(path) != seen.get(path):
+                    collector.notify(path)
+            seen = current
+
+    thread = threading.Thread(target=run, name="subtitle-poller", daemon=True)
+    thread.start()
+
+    def stop():
+        stopped.set()
+        thread.join()
+    return stop
+
+
+def print_result(result: Dict):
+    videos = ", ".join(f"{video_id}({len(chunks)}청크)" if chunks else f"{video_id}(삭제)"
+                       for video_id, chunks in result["videos"].items())
+    stages = " ".join(f"{stage} {seconds:.2f}s" for stage, seconds in result["timings"].items())
+    print(f"[{result['version']}] {videos} -> 전체 {result['chunks']}청크 | {stages} | "
+          f"파일 도착부터 배포까지 {result['latency']:.2f}s")
+
+
+def run_daemon(subtitles_dir=DEFAULT_SUBTITLES_DIR, ingestor: Optional[Ingestor] = None,
+               debounce: float = DEBOUNCE_SECONDS, poll_interval: float = POLL_INTERVAL,
+               min_interval: float = MIN_PUBLISH_INTERVAL, max_wait: float = MAX_WAIT_SECONDS):
+    """
+    Ctrl+C까지 자막 디렉토리를 감시하며 변경을 반영 (배포 사이는 최소 min_interval초).
+    실패한 배치는 다음 배치에 합쳐 RETRY_BASE_DELAY초부터 두 배씩 늘려 재시도하고, MAX_RETRIES번 연속 실패하면
+    버림 (그 파일이 다시 바뀌면 반영)
+    """
+    ingestor = ingestor or Ingestor()
+    ingestor.warm_up()
+    collector = ChangeCollector(debounce, max_wait)
+    stop = watch(subtitles_dir, collector, poll_interval)
+    print(f"감시 중: {subtitles_dir} (debounce {debounce}s, 배포 간격 최소 {min_interval}s)")
+    batch: Dict[Path, float] = {}
+    next_ingest = float("-inf")  # monotonic
+    failures = 0
+
+    def add(files: Dict[Path, float]):
+        for path, arrived in files.items():
+            batch[path] = min(arrived, batch.get(path, arrived))
+
+    try:
+        while True:
+            time.sleep(min(0.1, debounce / 4))
+            add(collector.ready())
+            if not batch or time.monotonic() < next_ingest:
+                continue
+            files, batch = batch, {}
+            started = time.monotonic()
+            try:
+                result = ingestor.ingest(files)
+            except Exception as e:
+                names = ", ".join(path.name for path in files)
+                failures += 1
+                if failures > MAX_RETRIES:
+                    print(f"반영 실패 ({names}): {e} - {MAX_RETRIES}회 재시도 후 포기 (파일이 다시 바뀌면 반영)")
+                    failures = 0
+                    next_ingest = started + min_interval
+                    continue
+                delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (failures - 1))
+                print(f"반영 실패 ({names}): {e} - {delay:.1f}초 후 재시도 ({failures}/{MAX_RETRIES})")
+                add(files)
+                next_ingest = time.monotonic() + delay
+                continue
+            failures = 0
+            next_ingest = started + min_interval
+            if result is not None:
+                print_result(result)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop()
+        if ingestor.latencies:
+            latencies = np.array(ingestor.latencies)
+            print(f"\n반영 {len(latencies)}회, 도착->배포 p50 {np.percentile(latencies, 50):.2f}s, "
+                  f"최대 {latencies.max():.2f}s")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="자막 파일 자동 반영 데몬")
+    parser.add_argument("--subtitles-dir", default=DEFAULT_SUBTITLES_DIR)
+    parser.add_argument("--index-root", default=DEFAULT_INDEX_ROOT)
+    parser.add_argument("--videos-metadata", default="data/videos_metadata.json")
+    parser.add_argument("--debounce", type=float, default=DEBOUNCE_SECONDS)
+    parser.add_argument("--max-wait", type=float, default=MAX_WAIT_SECONDS,
+                        help="계속 바뀌는 파일도 첫 이벤트 후 이 시간(초)이 지나면 반영")
+    parser.add_argument("--min-interval", type=float, default=MIN_PUBLISH_INTERVAL,
+                        help="배포 사이 최소 간격(초), 그동안 모인 파일은 스냅샷 하나로 반영")
+    parser.add_argument("--keep-snapshots", type=int, default=3)
+    parser.add_argument("--once", nargs="+", default=None, metavar="JSON", help="이 파일들만 반영하고 종료")
+    args = parser.parse_args()
+
+    ingestor = Ingestor(args.index_root, args.videos_metadata, keep_snapshots=args.keep_snapshots)
+    if args.once:
+        now = time.time()
+        result = ingestor.ingest({Path(path): now for path in args.once})
+        if result is not None:
+            print_result(result)
+    else:
+        run_daemon(args.subtitles_dir, ingestor, debounce=args.debounce, min_interval=args.min_interval,
+                   max_wait=args.max_wait)
@@ -0,0 +1,149 @@
+"""
+OpenAI 임베딩 엔드포인트(POST /v1/embeddings)를 흉내 내는 로컬 모의 서버
+API 키나 네트워크 없이 비동기 임베딩 클라이언트의 배치/재시도/체크포인트 동작을 확인할 때 사용합니다.
+텍스트 해시로 만든 결정적 벡터를 반환하고, 일정 비율로 429/500 오류를 섞을 수 있습니다.
+
+실행:
+    python mock_openai_server.py --port 8765 --fail-rate 0.1
+"""
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+
+def mock_embedding(text: str, dim: int) -> list:
+    """텍스트별로 항상 같은 단위 벡터"""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dim)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+class MockEmbeddingServer:
+    """별도 스레드에서 동작하는 모의 임베딩 서버"""
+
+    def __init__(self, host="127.0.0.1", port=0, dim=256, fail_rate=0.0, latency=0.0, max_inputs=2048):
+        """
+        Args:
+            host: 바인딩 주소
+            port: 포트 (0이면 임의의 빈 포트)
+            dim: 반환할 벡터 차원
+            fail_rate: 429/500 오류를 반환할 확률
+            latency: 요청당 인위적 지연 (초)
+            max_inputs: 요청당 최대 입력 개수 (초과 시 400)
+        """
+        self.dim = dim
+        self.fail_rate = fail_rate
+        self.latency = latency
+        self.max_inputs = max_inputs
+        self.requests = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """현재 스레드에서 실행 (Ctrl+C로 종료)"""
+        self._server.serve_forever()
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body, headers=None):
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+
+                with server._lock:
+                    server.requests += 1
+                    fail = random.random() < server.fail_rate
+                    if fail:
+                        server.failures += 1
+
+                if self.path.rstrip("/") != "/v1/embeddings":
+                    return self._send(404, {"error": {"message": "not found", "type": "invalid_request_error"}})
+                if server.latency:
+                    time.sleep(server.latency)
+                if fail:
+                    if random.random() < 0.5:
+                        return self._send(429, {"error": {"message": "rate limited", "type": "rate_limit_error"}},
+                                          {"retry-after": "0.05"})
+                    return self._send(500, {"error": {"message": "server error", "type": "server_error"}})
+
+                inputs = request.get("input", [])
+                if isinstance(inputs, str):
+                    inputs = [inputs]
+                if not inputs or len(inputs) > server.max_inputs:
+                    return self._send(400, {"error": {"message": "invalid input size", "type": "invalid_request_error"}})
+
+                tokens = sum(max(1, len(text) // 2) for text in inputs)
+                self._send(200, {
+                    "object": "list",
+                    "model": request.get("model", "mock"),
+                    "data": [
+                        {"object": "embedding", "index": i, "embedding": mock_embedding(text, server.dim)}
+                        for i, text in enumerate(inputs)
+                    ],
+                    "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+                })
+
+        return Handler
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="모의 OpenAI 임베딩 서버")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = MockEmbeddingServer(port=args.port, dim=args.dim, fail_rate=args.fail_rate, latency=args.latency)
+    print(f"Mock embeddings endpoint: {server.base_url}/embeddings")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
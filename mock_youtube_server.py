@@ -0,0 +1,288 @@
+"""
+YouTube 영상 페이지(/watch), 자막 XML(/api/timedtext), 썸네일(/vi/<video_id>/hqdefault.jpg)을 흉내 내는 로컬 모의 서버
+네트워크 없이 subtitle_fetcher의 세션 재사용, 방법별 대체, 통계와 thumbnails의 변환을 확인할 때 사용합니다.
+MockWebDriver는 Chrome 없이 browser_pool을 시험할 수 있도록 드라이버 실행/스크립트 지연을 흉내 냅니다.
+
+영상 페이지는 data/subtitles/<video_id>.json이 있으면 그 자막을 가리키는 captionTracks를 담아 만들고,
+없으면 자막 트랙이 없는 페이지를 반환합니다. 녹화해 둔 실제 페이지(--page)를 모든 영상에 그대로 돌려줄 수도 있습니다.
+
+실행:
+    python mock_youtube_server.py --port 8766 --latency 0.05
+"""
+import hashlib
+import io
+import json
+import random
+import socket
+import threading
+import time
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+
+def watch_page(player_response: dict, padding_kb: int = 0, braces_in_strings: bool = True) -> str:
+    """
+    영상 페이지 HTML. padding_kb를 주면 실제 페이지(약 350KB)처럼 채워 넣습니다.
+    실제 페이지와 같은 순서로 player response에는 스트리밍 정보(약 1/4)가 captions 앞에,
+    긴 설명과 국가 목록(microformat)이 뒤에 오고, 나머지는 별도 스크립트의 ytInitialData입니다.
+    braces_in_strings면 설명에 "};"나 괄호가 들어갑니다 (기존 정규식 추출이 깨지는 경우).
+    """
+    player_response = dict(player_response)
+    initial_data = {}
+    if padding_kb:
+        cipher = "s=" + "A" * 1200 + "&sp=sig&url=https://rr1---sn-ab5l6nzr.googlevideo.com/videoplayback"
+        formats = max(1, padding_kb * 1024 // 4 // (len(cipher) + 150))
+        description = "타임라인 {00:00} 인트로};\n\"인용\" [링크] } { " if braces_in_strings else "타임라인 00:00 인트로\n"
+        captions = player_response.pop("captions", None)
+        player_response = {
+            "responseContext": {"serviceTrackingParams": [{"service": "GFEEDBACK", "params": []}]},
+            "playabilityStatus": {"status": "OK"},
+            "streamingData": {"adaptiveFormats": [
+                {"itag": 100 + i, "signatureCipher": cipher, "mimeType": 'video/mp4; codecs="avc1.4d401e"',
+                 "bitrate": 1000 * i}
+                for i in range(formats)
+            ]},
+            "playbackTracking": {"videostatsPlaybackUrl": {"baseUrl": "https://s.youtube.com/api/stats/playback"}},
+            **({"captions": captions} if captions is not None else {}),
+            **player_response,
+            "videoDetails": {**player_response.get("videoDetails", {}), "shortDescription": description * 40},
+            "microformat": {"playerMicroformatRenderer": {
+                "description": {"simpleText": description * 40},
+                "availableCountries": [f"{chr(65 + i // 26)}{chr(65 + i % 26)}" for i in range(250)],
+            }},
+        }
+        size = len(json.dumps(player_response, ensure_ascii=False).encode("utf-8"))
+        item = {"videoRenderer": {"title": {"runs": [{"text": "추천 영상 제목"}]}, "thumbnail": cipher[:300]}}
+        count = max(0, (padding_kb * 1024 - size) // (len(json.dumps(item, ensure_ascii=False).encode("utf-8")) + 1))
+        initial_data = {"contents": {"items": [item] * count}}
+    return ("<!DOCTYPE html><html><head><script>var ytInitialPlayerResponse = "
+            f"{json.dumps(player_response, ensure_ascii=False)};var meta = {{}};</script>"
+            f"<script>var ytInitialData = {json.dumps(initial_data, ensure_ascii=False)};</script>"
+            "</head><body></body></html>")
+
+
+def timedtext_xml(subtitles: List[dict]) -> str:
+    lines = ['<?xml version="1.0" encoding="utf-8" ?><transcript>']
+    for entry in subtitles:
+        lines.append(f'<text start="{entry["start"]}" dur="{entry["duration"]}">{escape(entry["text"])}</text>')
+    lines.append("</transcript>")
+    return "".join(lines)
+
+
+def thumbnail_jpeg(video_id: str) -> bytes:
+    """
+    hqdefault.jpg 흉내 (480x360, 16:9 화면 위아래에 검은 띠). 영상마다 다른 색/무늬.
+    Pillow가 없으면 1x1 JPEG
+    """
+    try:
+        from PIL import Image, ImageDraw
+    except ImportError:
+        return bytes.fromhex(
+            "ffd8ffe000104a46494600010100000100010000ffdb004300080606070605080707070909080a0c140d0c0b0b0c1912130f141d1a1f1e"
+            "1d1a1c1c20242e2720222c231c1c2837292c30313434341f27393d38323c2e333432ffc0000b080001000101011100ffc4001f0000010501"
+            "010101010100000000000000000102030405060708090a0bffc400b5100002010303020403050504040000017d01020300041105122131"
+            "410613516107227114328191a1082342b1c11552d1f02433627282090a161718191a25262728292a3435363738393a434445464748494a"
+            "535455565758595a636465666768696a737475767778797a838485868788898a92939495969798999aa2a3a4a5a6a7a8a9aab2b3b4b5b6"
+            "b7b8b9bac2c3c4c5c6c7c8c9cad2d3d4d5d6d7d8d9dae1e2e3e4e5e6e7e8e9eaf1f2f3f4f5f6f7f8f9faffda0008010100003f00fbd3ff"
+            "d9")
+    seed = hashlib.sha256(video_id.encode("utf-8")).digest()
+    image = Image.new("RGB", (480, 360), "black")
+    draw = ImageDraw.Draw(image)
+    for y in range(45, 315):
+        draw.line([(0, y), (479, y)], fill=(seed[0], (seed[1] + y) % 256, (seed[2] + 2 * y) % 256))
+    rng = random.Random(seed)
+    for _ in range(40):
+        x, y = rng.randrange(480), rng.randrange(45, 315)
+        draw.ellipse([x, y, x + rng.randrange(10, 80), y + rng.randrange(10, 60)],
+                     fill=tuple(rng.randrange(256) for _ in range(3)))
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+class MockWebDriver:
+    """
+    selenium WebDriver 흉내 (get / execute_script / page_source / quit).
+    Chrome 실행 비용(startup)과 페이지의 스크립트가 ytInitialPlayerResponse를 만들기까지의 지연(script_delay)을 흉내 냅니다.
+    execute_script는 browser_pool.CAPTIONS_SCRIPT만 지원합니다.
+    """
+
+    def __init__(self, startup=1.0, script_delay=0.2):
+        import requests
+
+        time.sleep(startup)
+        self.script_delay = script_delay
+        self.page_source = ""
+        self._session = requests.Session()
+        self._loaded_at = 0.0
+
+    def get(self, url: str):
+        response = self._session.get(url)
+        response.raise_for_status()
+        self.page_source = response.text
+        self._loaded_at = time.monotonic()
+
+    def execute_script(self, script: str):
+        from subtitle_fetcher import extract_captions
+
+        if time.monotonic() - self._loaded_at < self.script_delay:
+            return None
+        try:
+            return {"captions": extract_captions(self.page_source)}
+        except ValueError:
+            return None
+
+    def quit(self):
+        self._session.close()
+
+
+class MockYouTubeServer:
+    """별도 스레드에서 동작하는 모의 YouTube 서버 (HTTP/1.1 keep-alive)"""
+
+    def __init__(self, host="127.0.0.1", port=0, subtitles_dir="data/subtitles", page_file: Optional[str] = None,
+                 latency=0.0, fail_rate=0.0, page_kb=0):
+        """
+        Args:
+            host: 바인딩 주소
+            port: 포트 (0이면 임의의 빈 포트)
+            subtitles_dir: 자막 JSON 디렉토리 (download_subtitles 출력 형식)
+            page_file: 모든 /watch 요청에 돌려줄 녹화된 페이지 HTML (None이면 자막 JSON으로 생성)
+            latency: 요청당 인위적 지연 (초)
+            fail_rate: 500 오류를 반환할 확률
+            page_kb: 생성하는 영상 페이지를 이 크기(KB) 정도로 채움 (실제 페이지 크기 흉내)
+        """
+        self.subtitles_dir = Path(subtitles_dir)
+        self.page = Path(page_file).read_text(encoding="utf-8") if page_file else None
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.page_kb = page_kb
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def video_ids(self) -> List[str]:
+        return sorted(path.stem for path in self.subtitles_dir.glob("*.json") if path.stem != "failed_videos")
+
+    def _subtitles(self, video_id: str) -> Optional[dict]:
+        path = self.subtitles_dir / f"{video_id}.json"
+        if not video_id or "/" in video_id or not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _watch_page(self, video_id: str) -> str:
+        if self.page is not None:
+            return self.page
+        data = self._subtitles(video_id)
+        player_response = {"videoDetails": {"videoId": video_id, "title": data["title"] if data else ""}}
+        if data:
+            language = data.get("language", "ko")
+            player_response["captions"] = {"playerCaptionsTracklistRenderer": {"captionTracks": [{
+                "baseUrl": f"{self.base_url}/api/timedtext?v={video_id}&lang={language}",
+                "name": {"simpleText": language},
+                "languageCode": language,
+            }]}}
+        return watch_page(player_response, self.page_kb)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """현재 스레드에서 실행 (Ctrl+C로 종료)"""
+        self._server.serve_forever()
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def setup(self):
+                # 연결마다 한 번 호출 (keep-alive로 재사용되는 연결은 다시 세지 않음)
+                super().setup()
+                # 헤더와 본문을 따로 쓰므로 Nagle 알고리즘이 keep-alive 응답을 지연시키지 않도록
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                with server._lock:
+                    server.connections += 1
+
+            def _send(self, status, body, content_type="text/html; charset=utf-8"):
+                payload = body if isinstance(body, bytes) else body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                video_id = parse_qs(url.query).get("v", [""])[0]
+                with server._lock:
+                    server.requests += 1
+                    fail = random.random() < server.fail_rate
+                if server.latency:
+                    time.sleep(server.latency)
+                if fail:
+                    return self._send(500, "server error", "text/plain")
+
+                if url.path == "/watch":
+                    return self._send(200, server._watch_page(video_id))
+                if url.path == "/api/timedtext":
+                    data = server._subtitles(video_id)
+                    # 실제 YouTube처럼 자막이 없으면 빈 200 응답
+                    return self._send(200, timedtext_xml(data["subtitles"]) if data else "", "text/xml; charset=utf-8")
+                parts = url.path.split("/")
+                if len(parts) == 4 and parts[1] == "vi" and parts[3] == "hqdefault.jpg":
+                    return self._send(200, thumbnail_jpeg(parts[2]), "image/jpeg")
+                self._send(404, "not found", "text/plain")
+
+        return Handler
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="모의 YouTube 서버 (영상 페이지 + 자막 XML)")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--subtitles-dir", default="data/subtitles")
+    parser.add_argument("--page", default=None, help="모든 영상에 돌려줄 녹화된 페이지 HTML")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--page-kb", type=int, default=0, help="생성 페이지 크기 (KB, 실제 페이지는 약 350)")
+    args = parser.parse_args()
+
+    server = MockYouTubeServer(port=args.port, subtitles_dir=args.subtitles_dir, page_file=args.page,
+                               latency=args.latency, fail_rate=args.fail_rate, page_kb=args.page_kb)
+    print(f"Mock YouTube: {server.base_url}/watch?v=<video_id> ({len(server.video_ids())}개 영상)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
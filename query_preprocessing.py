@@ -0,0 +1,224 @@
+"""
+검색 질문 전처리
+사용자 입력을 임베딩하기 전에 표기를 통일합니다. 같은 뜻의 질문이 같은 문자열이 되므로
+임베딩이 일관되고 캐시(정확 일치 / semantic_cache) 적중률이 올라갑니다.
+
+    1. 유니코드 NFC 정규화, 전각 영숫자 -> 반각, 이모지와 자모만 있는 표현(ㅎㅎ, ㅋㅋ) 제거
+    2. 문장부호를 공백으로, 연속 공백 정리 (S&P, 3.5% 같은 표기는 유지)
+    3. 금융 약어 표기 통일: "isa", "아이에스에이", "개인형 퇴직연금" -> 자막에 쓰인 "ISA", "IRP"
+    4. 질문 끝의 요청/어미 표현 제거 ("알려줘", "궁금해요" 등)
+
+약어 사전은 SEED_ABBREVIATIONS(검수한 약어 목록) 중 청크 자막에 실제로 나오는 약어만 담습니다.
+자막의 대문자 토큰을 그대로 약어로 쓰면 음성 인식 잡음(IS, SP, TR 등)이 섞이므로, 목록에 없는 자주 나오는
+대문자 토큰은 사전에 넣지 않고 build 출력에 후보로만 보여줍니다 (검토 후 SEED_ABBREVIATIONS에 추가):
+    python query_preprocessing.py build     # data/chunks.json -> data/query_dictionary.json
+"""
+import json
+import re
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DEFAULT_DICTIONARY_PATH = "data/query_dictionary.json"
+
+# 약어 -> 사용자가 쓸 수 있는 다른 표기 (한글 명칭, 한글 발음)
+SEED_ABBREVIATIONS = {
+    "ISA": ["개인종합자산관리계좌", "아이에스에이", "아이사"],
+    "IRP": ["개인형퇴직연금", "개인형 퇴직연금", "개인형퇴직연금계좌", "아이알피"],
+    "ETF": ["상장지수펀드", "이티에프"],
+    "CMA": ["종합자산관리계좌", "씨엠에이"],
+    "TDF": ["타깃데이트펀드", "타겟데이트펀드", "티디에프"],
+    "MMF": ["머니마켓펀드", "엠엠에프"],
+    "ELS": ["주가연계증권", "이엘에스"],
+    "ETN": ["상장지수증권", "이티엔"],
+    "ELB": ["주가연계파생결합사채", "이엘비"],
+    "DC": ["확정기여형"],
+    "DB": ["확정급여형"],
+    "RP": ["환매조건부채권"],
+    "KRX": ["한국거래소", "케이알엑스"],
+}
+
+# 약어가 아닌 대문자 토큰 (build의 후보 목록에서 제외)
+NON_ABBREVIATIONS = {"TV", "AI", "IT", "NH", "KB", "SK", "BNK", "VIP", "CD"}
+
+# 질문 끝의 요청/어미 표현 (긴 것부터 확인)
+FILLER_ENDINGS = sorted([
+    "알려주세요", "알려 주세요", "알려줘요", "알려줘", "알려 줘", "가르쳐주세요", "가르쳐 주세요", "가르쳐줘",
+    "궁금합니다", "궁금해요", "궁금해", "부탁드립니다", "부탁드려요", "부탁해요", "설명해주세요", "설명해 주세요",
+    "설명해줘", "말해주세요", "말해줘", "좀",
+], key=len, reverse=True)
+
+# 한글 표기 바로 뒤에 붙어도 표기 경계로 보는 조사 (긴 것부터)
+PARTICLES = sorted([
+    "은", "는", "이", "가", "을", "를", "와", "과", "의", "도", "만", "에", "에서", "으로", "로", "이랑", "랑",
+    "하고", "보다", "처럼", "까지", "부터", "이나", "나", "에게", "이란", "란", "이라", "라",
+], key=len, reverse=True)
+
+_EMOJI_CATEGORIES = {"So", "Sk", "Cs", "Co"}
+_INVISIBLE = {"\u200b", "\u200d", "\ufe0e", "\ufe0f"}  # zero-width, ZWJ, variation selector
+_PUNCTUATION = re.compile(r"(?<!\d)[.](?!\d)|[^\w\s.%&+]|_")
+_SPACES = re.compile(r"\s+")
+_JAMO_ONLY = re.compile(r"(?<![가-힣])[ㄱ-ㅎㅏ-ㅣ]+(?![가-힣])")
+_FULLWIDTH = {code: code - 0xFEE0 for code in range(0xFF01, 0xFF5F)}
+_LATIN = re.compile(r"[A-Za-z][A-Za-z&]*")
+
+
+def count_abbreviations(chunks_file: str = "data/chunks.json") -> Counter:
+    """청크 자막의 대문자 토큰(2~5자) 등장 횟수"""
+    with open(chunks_file, 'r', encoding='utf-8') as f:
+        chunks = json.load(f)
+    counts = Counter()
+    for chunk in chunks:
+        counts.update(re.findall(r"\b[A-Z]{2,5}\b", chunk['text']))
+    return counts
+
+
+def build_dictionary(chunks_file: str = "data/chunks.json", min_count: int = 5,
+                     counts: Optional[Counter] = None) -> Dict[str, str]:
+    """
+    청크 자막에서 약어 사전을 만듭니다 (SEED_ABBREVIATIONS에 있는 약어만).
+
+    Args:
+        chunks_file: 청크 데이터 JSON
+        min_count: 사전에 넣을 최소 등장 횟수
+        counts: count_abbreviations 결과 (None이면 chunks_file에서 셈)
+
+    Returns:
+        {다른 표기(소문자/한글): 자막에 쓰인 약어}
+    """
+    if counts is None:
+        counts = count_abbreviations(chunks_file)
+    dictionary = {}
+    for abbreviation, aliases in SEED_ABBREVIATIONS.items():
+        if counts[abbreviation] < min_count:
+            continue
+        dictionary[abbreviation.lower()] = abbreviation
+        for alias in aliases:
+            dictionary[alias] = abbreviation
+    return dictionary
+
+
+def abbreviation_candidates(counts: Counter, min_count: int = 5) -> List[str]:
+    """사전에 없는 자주 나오는 대문자 토큰 (SEED_ABBREVIATIONS에 추가할지 검토할 후보, 많이 나온 순)"""
+    return [token for token, count in counts.most_common()
+            if count >= min_count and token not in SEED_ABBREVIATIONS and token not in NON_ABBREVIATIONS]
+
+
+def load_dictionary(path: str = DEFAULT_DICTIONARY_PATH) -> Dict[str, str]:
+    """저장된 약어 사전. 없으면 기본 약어만 사용"""
+    if Path(path).exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    dictionary = {}
+    for abbreviation, aliases in SEED_ABBREVIATIONS.items():
+        dictionary[abbreviation.lower()] = abbreviation
+        for alias in aliases:
+            dictionary[alias] = abbreviation
+    return dictionary
+
+
+class QueryPreprocessor:
+    """질문 정규화 (결과는 LRU로 메모이즈)"""
+
+    def __init__(self, dictionary: Optional[Dict[str, str]] = None, cache_size: int = 4096):
+        """
+        Args:
+            dictionary: {다른 표기: 약어} (None이면 load_dictionary())
+            cache_size: 메모이즈할 질문 수
+        """
+        self.dictionary = dictionary if dictionary is not None else load_dictionary()
+        # 한글 표기는 단어 경계에서만 치환 (앞은 한글/영숫자가 아니고, 뒤는 조사만 붙을 수 있음, 긴 표기부터)
+        # "아이사"가 "우리아이사진" 안에서 바뀌지 않도록
+        korean_aliases = sorted((alias for alias in self.dictionary if not alias.isascii()), key=len, reverse=True)
+        self._korean_pattern = re.compile(
+            r"(?<![가-힣A-Za-z0-9])(" + "|".join(map(re.escape, korean_aliases)) + ")"
+            r"(?=(?:" + "|".join(PARTICLES) + r")?(?![가-힣]))"
+        ) if korean_aliases else None
+        self.normalize = lru_cache(maxsize=cache_size)(self._normalize)
+
+    def __call__(self, query: str) -> str:
+        return self.normalize(query)
+
+    def _normalize(self, query: str) -> str:
+        text = unicodedata.normalize("NFC", query).translate(_FULLWIDTH)
+        text = "".join(
+            " " if unicodedata.category(ch) in _EMOJI_CATEGORIES else ch
+            for ch in text if ch not in _INVISIBLE
+        )
+        text = _PUNCTUATION.sub(" ", text)
+        text = _JAMO_ONLY.sub(" ", text)
+
+        if self._korean_pattern is not None:
+            text = self._korean_pattern.sub(lambda m: f" {self.dictionary[m.group(1)]} ", text)
+        text = _LATIN.sub(lambda m: self._latin(m.group(0)), text)
+        # "ISA계좌" -> "ISA 계좌"
+        text = re.sub(r"([A-Za-z])([가-힣])", r"\1 \2", text)
+        text = re.sub(r"([가-힣])([A-Za-z])", r"\1 \2", text)
+        text = _SPACES.sub(" ", text).strip()
+
+        # 전부 지워지면 (예: "ㅋㅋ") 원래 입력 사용
+        return self._strip_endings(text) or query.strip()
+
+    def _latin(self, token: str) -> str:
+        return self.dictionary.get(token.lower(), token)
+
+    @staticmethod
+    def _strip_endings(text: str) -> str:
+        changed = True
+        while changed and text:
+            changed = False
+            for ending in FILLER_ENDINGS:
+                if text.endswith(ending) and len(text) > len(ending):
+                    text = text[:-len(ending)].rstrip()
+                    changed = True
+                    break
+        return text
+
+    def cache_info(self):
+        return self.normalize.cache_info()
+
+
+def save_dictionary(dictionary: Dict[str, str], path: str = DEFAULT_DICTIONARY_PATH):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(dictionary, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="검색 질문 전처리")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_parser = sub.add_parser("build", help="청크 자막에서 약어 사전 생성")
+    build_parser.add_argument("--chunks", default="data/chunks.json")
+    build_parser.add_argument("--output", default=DEFAULT_DICTIONARY_PATH)
+    build_parser.add_argument("--min-count", type=int, default=5)
+    demo_parser = sub.add_parser("demo", help="예시 질문 정규화 결과")
+    demo_parser.add_argument("queries", nargs="*")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        counts = count_abbreviations(args.chunks)
+        dictionary = build_dictionary(args.chunks, args.min_count, counts)
+        save_dictionary(dictionary, args.output)
+        print(f"약어 사전 저장: {args.output} ({len(set(dictionary.values()))}개 약어, {len(dictionary)}개 표기)")
+        print(", ".join(sorted(set(dictionary.values()))))
+        candidates = abbreviation_candidates(counts, args.min_count)
+        if candidates:
+            print(f"사전에 없는 대문자 토큰 {len(candidates)}개 (약어면 SEED_ABBREVIATIONS에 추가): "
+                  + ", ".join(f"{token}({counts[token]})" for token in candidates[:30]))
+    else:
+        queries: List[str] = args.queries or [
+            "ISA 만기되면 연금으로 전환하는 게 좋을까요?",
+            "isa만기 되면   연금으로 전환하는 게 좋을까요??",
+            "🐻 아이에스에이 만기되면 연금으로 전환하는 게 좋을까요 ㅎㅎ",
+            "개인형 퇴직연금이랑 연금저축 차이 알려줘",
+            "S&P500 etf 수수료 3.5% 비싼가요?!",
+            "아이에스에이는 우리아이사진 찍듯이 모으면 되나요",
+        ]
+        preprocessor = QueryPreprocessor()
+        for query in queries:
+            print(f"{query!r:<50} -> {preprocessor(query)!r}")
+        print(preprocessor.cache_info())
@@ -0,0 +1,320 @@
+"""
+영상 단위 사전 점수(prior)를 섞은 검색 결과 재정렬
+유사도만으로 순위를 매기면 조회수가 많은 대표 영상이나 최신 세법이 반영된 영상(예: "ver.2025")이
+오래된 영상과 구분되지 않습니다. 빌드 시점에 영상별 prior를 계산해 두고(dense 배열),
+검색 후보(상위 N개)에 대해 벡터 연산 한 번으로 점수를 섞어 다시 정렬합니다.
+
+    score = similarity_weight * similarity + popularity_weight * popularity + recency_weight * recency
+
+    similarity : 코사인 유사도 (search_filters.query_index가 번들/ChromaDB 모두 'similarities'로 돌려줌).
+                 거리는 백엔드마다 척도가 달라(정규화 벡터의 제곱 L2 vs 원본 벡터의 L2) 가중치의 의미가 바뀌므로 쓰지 않음
+
+    popularity : log(1 + 조회수)를 0~1로 정규화 (조회수 미상은 중앙값)
+    recency    : 0.5 ** (업로드 후 경과일 / half_life_days). 업로드 날짜가 없으면 제목의 연도 표시
+                 ("ver.2025", "2025년")로 추정, 그마저 없으면 unknown_recency (기본: half-life 두 번 지난 값)
+
+평가:
+    python ranking.py evaluate                                  # 테스트 질문으로 가중치별 순위 변화 비교
+    python ranking.py evaluate --judgments data/eval_judgments.json
+    (judgments: {"질문": ["관련 video_id", ...]} 형식이면 MRR, nDCG@k도 계산)
+"""
+import re
+from datetime import date
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from chunk_store import UNKNOWN_DATE, UNKNOWN_VIEWS, load_video_attributes
+
+# 제목의 연도 표시 ("TDF2045" 같은 상품명은 제외)
+YEAR_HINT_PATTERNS = (
+    re.compile(r"ver\.?\s*(20\d{2})", re.IGNORECASE),
+    re.compile(r"(20\d{2})\s*년"),
+)
+
+
+def title_year(title: str) -> Optional[int]:
+    """제목에 표시된 연도 (없으면 None)"""
+    for pattern in YEAR_HINT_PATTERNS:
+        match = pattern.search(title or "")
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def _to_date(yyyymmdd: int) -> date:
+    return date(yyyymmdd // 10000, yyyymmdd // 100 % 100, yyyymmdd % 100)
+
+
+class VideoPriors:
+    """영상별 prior (영상 번호 순서의 dense 배열)"""
+
+    def __init__(self, video_ids: List[str], popularity: np.ndarray, recency: np.ndarray):
+        self.video_ids = video_ids
+        self.popularity = np.asarray(popularity, dtype=np.float32)
+        self.recency = np.asarray(recency, dtype=np.float32)
+        self._numbers = {video_id: n for n, video_id in enumerate(video_ids)}
+        # prior에 없는 영상(인덱스와 메타데이터 불일치 등)에 쓸 중립값
+        self._default = (
+            float(self.popularity.mean()) if len(self.popularity) else 0.5,
+            float(self.recency.mean()) if len(self.recency) else 0.5,
+        )
+
+    @classmethod
+    def compute(
+        cls,
+        video_ids: List[str],
+        titles: List[str],
+        upload_date: np.ndarray,
+        view_count: np.ndarray,
+        reference_date: Optional[date] = None,
+        half_life_days: float = 365.0,
+        unknown_recency: float = 0.25
+    ) -> "VideoPriors":
+        """
+        Args:
+            video_ids: 영상 ID
+            titles: 영상 제목 (업로드 날짜가 없을 때 연도 추정용)
+            upload_date: YYYYMMDD 정수 (미상은 UNKNOWN_DATE)
+            view_count: 조회수 (미상은 UNKNOWN_VIEWS)
+            reference_date: 경과일 기준 날짜 (None이면 오늘)
+            half_life_days: recency가 절반이 되는 기간 (일)
+            unknown_recency: 날짜도 연도 표시도 없는 영상의 recency
+        """
+        reference_date = reference_date or date.today()
+        views = np.asarray(view_count, dtype=np.float64)
+        known_views = views != UNKNOWN_VIEWS
+        log_views = np.log1p(np.where(known_views, views, 0))
+        popularity = np.full(len(video_ids), 0.5)
+        if known_views.any():
+            low, high = log_views[known_views].min(), log_views[known_views].max()
+            scaled = (log_views - low) / (high - low) if high > low else np.full(len(video_ids), 0.5)
+            popularity = np.where(known_views, scaled, np.median(scaled[known_views]))
+
+        ages = np.full(len(video_ids), np.nan)
+        for n, (uploaded, title) in enumerate(zip(upload_date, titles)):
+            if uploaded != UNKNOWN_DATE:
+                ages[n] = (reference_date - _to_date(int(uploaded))).days
+            else:
+                year = title_year(title)
+                if year is not None:
+                    ages[n] = (reference_date - date(year, 7, 1)).days
+        recency = 0.5 ** (np.clip(ages, 0, None) / half_life_days)
+        recency = np.where(np.isnan(recency), unknown_recency, recency)
+
+        return cls(video_ids, popularity, recency)
+
+    @classmethod
+    def from_chunk_store(cls, chunks, **kwargs) -> "VideoPriors":
+        """chunk_store.ChunkStore의 영상 속성으로 계산"""
+        return cls.compute(chunks.video_ids, chunks.titles, chunks.upload_date, chunks.view_count, **kwargs)
+
+    @classmethod
+    def from_metadata_file(cls, metadata_file: str = "data/videos_metadata.json", **kwargs) -> "VideoPriors":
+        """videos_metadata.json으로 계산 (번들이 없는 ChromaDB 인덱스용)"""
+        import json
+
+        videos = load_video_attributes(metadata_file)
+        titles = {}
+        try:
+            with open(metadata_file, 'r', encoding='utf-8') as f:
+                titles = {video['video_id']: video.get('title', '') for video in json.load(f)}
+        except FileNotFoundError:
+            pass
+        video_ids = list(videos)
+        return cls.compute(
+            video_ids,
+            [titles.get(video_id, '') for video_id in video_ids],
+            np.array([int(v['upload_date']) if v.get('upload_date') else UNKNOWN_DATE for v in videos.values()],
+                     dtype=np.int32),
+            np.array([v['view_count'] if v.get('view_count') is not None else UNKNOWN_VIEWS for v in videos.values()],
+                     dtype=np.int64),
+            **kwargs
+        )
+
+    def lookup(self, video_ids: List[str]):
+        """video_id 리스트의 (popularity, recency) 배열"""
+        numbers = np.array([self._numbers.get(video_id, -1) for video_id in video_ids], dtype=np.int64)
+        known = numbers >= 0
+        popularity = np.where(known, self.popularity[numbers], self._default[0])
+        recency = np.where(known, self.recency[numbers], self._default[1])
+        return popularity, recency
+
+
+class PriorRanker:
+    """검색 후보를 유사도 + prior 점수로 재정렬"""
+
+    def __init__(
+        self,
+        priors: Optional[VideoPriors],
+        similarity_weight: float = 1.0,
+        popularity_weight: float = 0.03,
+        recency_weight: float = 0.05,
+        candidates: int = 20
+    ):
+        """
+        Args:
+            priors: 영상별 prior (None이면 재정렬하지 않음)
+            similarity_weight: 유사도 가중치
+            popularity_weight: 조회수 prior 가중치
+            recency_weight: 최신성 prior 가중치
+            candidates: 재정렬할 검색 후보 수 (top_k보다 크게)
+        """
+        self.priors = priors
+        self.similarity_weight = similarity_weight
+        self.popularity_weight = popularity_weight
+        self.recency_weight = recency_weight
+        self.candidates = candidates
+
+    @property
+    def enabled(self) -> bool:
+        return self.priors is not None and (self.popularity_weight or self.recency_weight)
+
+    def fetch_size(self, top_k: int) -> int:
+        """벡터 검색에서 가져올 후보 수"""
+        return max(top_k, self.candidates) if self.enabled else top_k
+
+    def rerank(self, results: Dict, top_k: int) -> Dict:
+        """
+        ChromaDB query 결과(쿼리 1개)를 재정렬해 top_k개만 남깁니다. 'scores'에 섞인 점수를 추가합니다.
+        """
+        similarities = np.asarray(similarity_scores(results), dtype=np.float32)
+        if not self.enabled or len(similarities) == 0:
+            return results
+
+        popularity, recency = self.priors.lookup([m['video_id'] for m in results['metadatas'][0]])
+        scores = (self.similarity_weight * similarities
+                  + self.popularity_weight * popularity
+                  + self.recency_weight * recency)
+        order = np.argsort(-scores, kind="stable")[:top_k]
+
+        reranked = {key: [[values[0][i] for i in order]] for key, values in results.items()
+                    if key in ('ids', 'documents', 'metadatas', 'distances', 'similarities') and values}
+        reranked['scores'] = [scores[order].tolist()]
+        return reranked
+
+
+def similarity_scores(results: Dict) -> List[float]:
+    """쿼리 1개 결과의 코사인 유사도 ('similarities'가 없는 예전 결과는 1 - distance)"""
+    if results.get('similarities'):
+        return list(results['similarities'][0])
+    return [1 - distance for distance in results['distances'][0]]
+
+
+def _dcg(relevance: List[int]) -> float:
+    return sum(rel / np.log2(rank + 2) for rank, rel in enumerate(relevance))
+
+
+def evaluate(
+    search: Callable[[str, int], Dict],
+    queries: List[str],
+    rankers: Dict[str, PriorRanker],
+    top_k: int = 5,
+    judgments: Optional[Dict[str, List[str]]] = None
+) -> Dict[str, Dict[str, float]]:
+    """
+    재정렬 설정별 순위 지표 비교. 첫 번째 ranker를 기준(baseline)으로 top-k 영상 겹침 비율을 계산하고,
+    judgments(질문 -> 관련 video_id 목록)가 있으면 MRR, nDCG@k도 계산합니다.
+
+    Args:
+        search: (query, n_results) -> ChromaDB query 결과
+        queries: 평가할 질문
+        rankers: 이름 -> PriorRanker
+        top_k: 평가할 순위 수
+        judgments: 질문별 관련 영상 ID
+
+    Returns:
+        이름 -> 지표 dict
+    """
+    fetch = max(ranker.fetch_size(top_k) for ranker in rankers.values())
+    candidates = {query: search(query, fetch) for query in queries}
+    priors = next((r.priors for r in rankers.values() if r.priors is not None), None)
+
+    report = {}
+    baseline = None
+    for name, ranker in rankers.items():
+        tops = {}
+        for query, results in candidates.items():
+            ranked = ranker.rerank(results, top_k) if ranker.enabled else {
+                key: [values[0][:top_k]] for key, values in results.items() if values
+            }
+            tops[query] = [m['video_id'] for m in ranked['metadatas'][0]]
+        if baseline is None:
+            baseline = tops
+
+        metrics = {
+            f"overlap@{top_k}": float(np.mean([
+                len(set(tops[q]) & set(baseline[q])) / max(len(set(baseline[q])), 1) for q in queries
+            ])),
+        }
+        if priors is not None:
+            popularity, recency = priors.lookup([v for q in queries for v in tops[q]])
+            metrics["mean_popularity"] = float(popularity.mean()) if len(popularity) else 0.0
+            metrics["mean_recency"] = float(recency.mean()) if len(recency) else 0.0
+        if judgments:
+            reciprocal_ranks, ndcgs = [], []
+            for query in queries:
+                relevant = set(judgments.get(query, []))
+                # 같은 영상의 청크가 여러 번 나오면 처음 나온 순위만 relevant로 셈
+                relevance = [1 if video_id in relevant and video_id not in tops[query][:rank] else 0
+                             for rank, video_id in enumerate(tops[query])]
+                first = next((rank for rank, rel in enumerate(relevance, 1) if rel), None)
+                reciprocal_ranks.append(1 / first if first else 0.0)
+                ideal = _dcg([1] * min(len(relevant), top_k))
+                ndcgs.append(_dcg(relevance) / ideal if ideal else 0.0)
+            metrics["MRR"] = float(np.mean(reciprocal_ranks))
+            metrics[f"nDCG@{top_k}"] = float(np.mean(ndcgs))
+        report[name] = metrics
+    return report
+
+
+def print_report(report: Dict[str, Dict[str, float]]):
+    names = list(report)
+    columns = list(dict.fromkeys(column for metrics in report.values() for column in metrics))
+    print(f"{'설정':<16}" + "".join(f"{column:>18}" for column in columns))
+    for name in names:
+        print(f"{name:<16}" + "".join(f"{report[name].get(column, float('nan')):>18.4f}" for column in columns))
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from embedding_service import get_embedding_model
+    from index_bundle import BUNDLE_FILE, IndexBundle
+    from index_snapshots import DEFAULT_INDEX_ROOT, current_snapshot
+    from search_filters import query_index
+    from test_search import TEST_QUESTIONS
+
+    parser = argparse.ArgumentParser(description="prior 재정렬 평가")
+    sub = parser.add_subparsers(dest="command", required=True)
+    eval_parser = sub.add_parser("evaluate", help="가중치별 순위 지표 비교")
+    eval_parser.add_argument("--index-root", default=DEFAULT_INDEX_ROOT)
+    eval_parser.add_argument("--judgments", default=None, help="질문 -> 관련 video_id 목록 JSON")
+    eval_parser.add_argument("--model-type", default="kosbert")
+    eval_parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    version, path, manifest = current_snapshot(args.index_root)
+    if version is None:
+        raise SystemExit("배포된 스냅샷이 없습니다. build_vector_db.py를 먼저 실행하세요.")
+    bundle = IndexBundle(path / BUNDLE_FILE)
+    embedding_model = get_embedding_model(args.model_type)
+
+    judgments = None
+    if args.judgments:
+        with open(args.judgments, 'r', encoding='utf-8') as f:
+            judgments = json.load(f)
+    queries = list(judgments) if judgments else TEST_QUESTIONS
+
+    def search(query, n_results):
+        return query_index(bundle, embedding_model.embed_query(query), n_results)
+
+    priors = bundle.priors
+    rankers = {
+        "유사도만": PriorRanker(None),
+        "조회수": PriorRanker(priors, popularity_weight=0.03, recency_weight=0.0),
+        "최신성": PriorRanker(priors, popularity_weight=0.0, recency_weight=0.05),
+        "조회수+최신성": PriorRanker(priors),
+    }
+    print_report(evaluate(search, queries, rankers, top_k=args.top_k, judgments=judgments))
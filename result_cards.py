@@ -0,0 +1,90 @@
+"""
+검색 결과 카드 HTML
+인기 질문의 상위 청크는 매 rerun마다 같은 카드로 다시 그려지므로, 카드 HTML을 청크(영상 + 시작 시각)별로
+한 번만 만들어 두고 재사용합니다. 순위 번호는 app.py 스타일의 CSS counter(.result-list)로 붙이므로 카드 HTML은 순위와 무관합니다.
+
+결과 목록 전체를 문자열 하나로 이어 st.markdown 한 번으로 보냅니다 (카드마다 호출하면 rerun마다 카드 수만큼
+요소가 전송되고, 느린 모바일 네트워크에서 카드가 하나씩 그려짐).
+"""
+from functools import lru_cache
+from html import escape
+from typing import Dict, List
+
+# 캐시할 카드 수 (카드당 1KB 미만)
+CARD_CACHE_SIZE = 4096
+
+
+def youtube_url(video_id: str, start_seconds: int) -> str:
+    return f"https://www.youtube.com/watch?v={video_id}&t={start_seconds}s"
+
+
+@lru_cache(maxsize=CARD_CACHE_SIZE)
+def card_html(url: str, thumbnail: str, title: str, timestamp: str, thumbnail_srcset: str = "") -> str:
+    """
+    결과 카드 하나의 HTML (한 줄, 들여쓰기 없음: 여러 카드를 이어도 markdown 코드 블록으로 해석되지 않도록)
+    """
+    url = escape(url)
+    srcset = f' srcset="{escape(thumbnail_srcset)}" sizes="100vw"' if thumbnail_srcset else ""
+    return (
+        '<div class="video-card">'
+        f'<a href="{url}" target="_blank"><div class="video-thumbnail-container">'
+        f'<img src="{escape(thumbnail)}"{srcset} class="video-thumbnail" loading="lazy"></div></a>'
+        '<div class="video-content">'
+        f'<div class="video-title">{escape(title)}</div>'
+        f'<span class="timestamp-badge">⏱️ {escape(timestamp)}부터 재생</span>'
+        f'<a href="{url}" target="_blank" class="watch-button">🎥 영상 보러가기</a>'
+        '</div></div>'
+    )
+
+
+def render_cards(results: List[Dict]) -> str:
+    """format_results의 결과 목록 -> st.markdown(unsafe_allow_html=True) 한 번으로 그릴 HTML"""
+    cards = "".join(card_html(result['url'], result['thumbnail'], result['title'], result['timestamp'],
+                              result.get('thumbnail_srcset', ""))
+                    for result in results)
+    return f'<div class="result-list">{cards}</div>'
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="카드 HTML 생성 시간 비교 (rerun마다 f-string vs 캐시)")
+    parser.add_argument("--reruns", type=int, default=10000)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    results = [{
+        'url': youtube_url(f"video{i:05d}", 120 * i),
+        'thumbnail': f"https://img.youtube.com/vi/video{i:05d}/hqdefault.jpg",
+        'title': f'🌕 추석특집 "ETF 몰아보기" | 종류 | 기준 | 분배금 {i}',
+        'timestamp': f"{2 * i:02d}:00",
+    } for i in range(args.top_k)]
+
+    def rebuild(results):
+        # 기존 방식: 카드마다 f-string (카드마다 st.markdown 호출)
+        return [f"""
+            <div class="video-card">
+                <a href="{result['url']}" target="_blank">
+                    <div class="video-thumbnail-container">
+                        <img src="{result['thumbnail']}" class="video-thumbnail">
+                    </div>
+                </a>
+                <div class="video-content">
+                    <div class="video-title">{i}. {result['title']}</div>
+                    <span class="timestamp-badge">⏱️ {result['timestamp']}부터 재생</span>
+                    <a href="{result['url']}" target="_blank" class="watch-button">
+                        🎥 영상 보러가기
+                    </a>
+                </div>
+            </div>
+            """ for i, result in enumerate(results, 1)]
+
+    for name, render, messages in (("카드마다 f-string", rebuild, args.top_k), ("캐시 + 한 번에", render_cards, 1)):
+        start = time.perf_counter()
+        for _ in range(args.reruns):
+            html = render(results)
+        elapsed = (time.perf_counter() - start) / args.reruns * 1e6
+        size = sum(map(len, html)) if isinstance(html, list) else len(html)
+        print(f"{name:<16} rerun당 {elapsed:6.1f}µs, st.markdown {messages}회, HTML {size}자")
+    print(card_html.cache_info())
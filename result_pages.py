@@ -0,0 +1,60 @@
+"""
+한 번 가져온 검색 결과를 나눠 보여주는 상태
+질문마다 순위가 매겨진 후보 목록(기본 50개)을 한 번만 가져와 st.session_state에 보관하고, "더 보기", 한 번에 보여줄
+결과 수 변경, "이 영상의 다른 구간"은 모두 이 목록을 잘라서 보여줍니다 (임베딩/인덱스 검색을 다시 하지 않음).
+
+질문, 인덱스 버전, 임베딩 공간, 필터 중 하나라도 바뀌면 key가 달라지므로 새로 검색합니다.
+"""
+from typing import Dict, Hashable, List, Optional
+
+# 질문당 가져와 둘 순위 목록 길이
+DEFAULT_DEPTH = 50
+
+
+class ResultPages:
+    """순위 목록 하나와 현재 보고 있는 범위"""
+
+    def __init__(self, key: Hashable, results: List[Dict], page_size: int):
+        """
+        Args:
+            key: 이 목록을 만든 검색 조건 (질문, 인덱스 버전, 공간, 필터)
+            results: 순위순 결과 (format_results 형식, video_id 포함)
+            page_size: 처음과 "더 보기"마다 보여줄 결과 수
+        """
+        self.key = key
+        self.results = results
+        self.page_size = page_size
+        self.shown = page_size
+        self.video_id: Optional[str] = None
+
+    def set_page_size(self, page_size: int):
+        """한 번에 보여줄 수 변경 (이미 펼친 결과는 그대로)"""
+        self.page_size = page_size
+        self.shown = max(self.shown, page_size)
+
+    def visible(self) -> List[Dict]:
+        """지금 보여줄 결과. 영상을 골랐으면 그 영상의 후보 구간 전부 (순위순)"""
+        if self.video_id is not None:
+            return [result for result in self.results if result['video_id'] == self.video_id]
+        return self.results[:self.shown]
+
+    def has_more(self) -> bool:
+        return self.video_id is None and self.shown < len(self.results)
+
+    def more(self):
+        self.shown += self.page_size
+
+    def more_from_videos(self) -> Dict[str, int]:
+        """보이는 영상별로 목록에 남아 있는 같은 영상의 다른 구간 수 (없는 영상은 제외, 보이는 순서)"""
+        if self.video_id is not None:
+            return {}
+        visible = self.results[:self.shown]
+        counts = {result['video_id']: 0 for result in visible}
+        for result in self.results[self.shown:]:
+            if result['video_id'] in counts:
+                counts[result['video_id']] += 1
+        return {video_id: count for video_id, count in counts.items() if count}
+
+    def focus(self, video_id: Optional[str]):
+        """video_id의 구간만 보기 (None이면 전체 목록으로 돌아감)"""
+        self.video_id = video_id
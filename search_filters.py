@@ -0,0 +1,264 @@
+"""
+검색 사전 필터 (업로드 날짜, 영상, 영상 길이)
+필터 조건으로 후보 영상을 먼저 고른 뒤(영상 단위 배열 / 날짜순 정렬 배열 이분 탐색),
+그 영상들의 청크 행만 벡터 검색합니다. 결과를 많이 가져와서 파이썬에서 거르는 방식과 달리
+필터 결과가 top-k보다 적게 나오지 않고, 검색 비용은 후보 청크 수에 비례합니다.
+
+번들(IndexBundle)은 ChunkStore 배열로, ChromaDB는 같은 조건을 where 절로 바꿔서 필터링합니다.
+ChromaDB 인덱스는 빌드 시점에 따라 영상 속성(upload_date, video_duration, is_short)이 청크 메타데이터에 없을 수
+있고, 없는 키에 대한 where 조건은 모든 청크를 걸러내므로 available_attributes로 기록된 속성만 조건에 씁니다.
+
+사용 예:
+    search_filter = SearchFilter(date_from="2025-01-01", exclude_shorts=True)
+    results = query_index(collection, query_embedding, n_results=5, search_filter=search_filter)
+
+벤치마크:
+    python search_filters.py --queries 200
+"""
+from datetime import date, datetime
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from chunk_store import UNKNOWN_DATE
+from index_bundle import IndexBundle
+
+# 이 길이(초) 이하의 영상은 Shorts로 간주
+SHORTS_MAX_DURATION = 60.0
+# 인덱스별로 기억해 둘 필터 조건 수
+FILTER_CACHE_SIZE = 64
+# 필터 조건에 쓰는 영상 속성 (청크 메타데이터 키)
+FILTER_ATTRIBUTES = frozenset({"upload_date", "video_duration", "is_short"})
+
+
+def parse_date(value) -> Optional[int]:
+    """'YYYYMMDD', 'YYYY-MM-DD', date/datetime을 YYYYMMDD 정수로 (None은 None)"""
+    if value is None:
+        return None
+    if isinstance(value, (date, datetime)):
+        return value.year * 10000 + value.month * 100 + value.day
+    return int(str(value).replace("-", ""))
+
+
+class SearchFilter:
+    """검색 사전 필터 조건 (모든 조건은 AND)"""
+
+    def __init__(
+        self,
+        video_ids: Optional[Iterable[str]] = None,
+        date_from=None,
+        date_to=None,
+        min_duration: Optional[float] = None,
+        max_duration: Optional[float] = None,
+        exclude_shorts: bool = False
+    ):
+        """
+        Args:
+            video_ids: 이 영상들 안에서만 검색
+            date_from: 업로드 날짜 하한 (포함, 날짜 미상 영상은 제외됨)
+            date_to: 업로드 날짜 상한 (포함)
+            min_duration: 영상 길이 하한 (초, 길이 미상 영상은 제외됨)
+            max_duration: 영상 길이 상한 (초, 길이 미상 영상은 제외됨)
+            exclude_shorts: Shorts(SHORTS_MAX_DURATION초 이하) 제외 (길이 미상 영상은 남김)
+        """
+        self.video_ids = list(video_ids) if video_ids is not None else None
+        self.date_from = parse_date(date_from)
+        self.date_to = parse_date(date_to)
+        self.min_duration = min_duration
+        self.max_duration = max_duration
+        self.exclude_shorts = exclude_shorts
+
+    def key(self) -> tuple:
+        return (tuple(sorted(self.video_ids)) if self.video_ids is not None else None, self.date_from, self.date_to,
+                self.min_duration, self.max_duration, self.exclude_shorts)
+
+    def is_empty(self) -> bool:
+        return (self.video_ids is None and self.date_from is None and self.date_to is None
+                and self.min_duration is None and self.max_duration is None and not self.exclude_shorts)
+
+    def video_mask(self, chunks) -> np.ndarray:
+        """조건을 만족하는 영상 bool 배열 (chunk_store.ChunkStore의 영상 번호 기준)"""
+        mask = np.ones(chunks.num_videos, dtype=bool)
+        if self.video_ids is not None:
+            selected = np.zeros(chunks.num_videos, dtype=bool)
+            numbers = [chunks.video_number(video_id) for video_id in self.video_ids]
+            selected[[n for n in numbers if n is not None]] = True
+            mask &= selected
+        if self.date_from is not None or self.date_to is not None:
+            in_range = np.zeros(chunks.num_videos, dtype=bool)
+            in_range[chunks.videos_in_date_range(self.date_from, self.date_to)] = True
+            mask &= in_range
+        # 길이 미상(NaN)은 비교 결과가 항상 False
+        duration = chunks.video_duration
+        if self.min_duration is not None:
+            mask &= duration >= self.min_duration
+        if self.max_duration is not None:
+            mask &= duration <= self.max_duration
+        if self.exclude_shorts:
+            mask &= ~(duration <= SHORTS_MAX_DURATION)
+        return mask
+
+    def candidate_rows(self, chunks) -> Optional[np.ndarray]:
+        """검색할 청크 행 번호. 조건이 없으면 None (전체 검색). 같은 조건의 결과는 인덱스별로 재사용"""
+        if self.is_empty():
+            return None
+        key = self.key()
+        rows = chunks.filter_cache.get(key)
+        if rows is None:
+            if len(chunks.filter_cache) >= FILTER_CACHE_SIZE:
+                chunks.filter_cache.clear()
+            rows = chunks.filter_cache[key] = chunks.rows_for_videos(np.flatnonzero(self.video_mask(chunks)))
+        return rows
+
+    def to_where(self, attributes: Iterable[str] = FILTER_ATTRIBUTES) -> Optional[Dict]:
+        """
+        ChromaDB where 절 (build_vector_db가 청크 메타데이터에 영상 속성을 함께 저장함)
+
+        Args:
+            attributes: 인덱스에 기록된 영상 속성 (available_attributes). 없는 속성의 조건은 빼고,
+                is_short가 없으면 쇼츠 제외는 video_duration으로 대신함 (길이 미상 청크도 제외됨)
+        """
+        attributes = set(attributes)
+        conditions = []
+        if self.video_ids is not None:
+            conditions.append({"video_id": {"$in": self.video_ids}})
+        if "upload_date" in attributes:
+            if self.date_from is not None:
+                conditions.append({"upload_date": {"$gte": self.date_from}})
+            if self.date_to is not None:
+                conditions.append({"upload_date": {"$lte": self.date_to}})
+        if "video_duration" in attributes:
+            if self.min_duration is not None:
+                conditions.append({"video_duration": {"$gte": self.min_duration}})
+            if self.max_duration is not None:
+                conditions.append({"video_duration": {"$lte": self.max_duration}})
+        if self.exclude_shorts:
+            if "is_short" in attributes:
+                conditions.append({"is_short": False})
+            elif "video_duration" in attributes:
+                conditions.append({"video_duration": {"$gt": SHORTS_MAX_DURATION}})
+        if not conditions:
+            return None
+        return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+
+def available_attributes(index, manifest: Optional[Dict] = None) -> frozenset:
+    """
+    인덱스에 값이 기록된 필터용 영상 속성 (FILTER_ATTRIBUTES의 부분집합)
+
+    번들은 ChunkStore 배열에 값이 하나라도 있는지로, ChromaDB는 manifest의 video_attributes로 판단합니다.
+    manifest에 기록이 없으면(이전 빌드, data/chroma_db) 속성별로 청크 한 개씩 조회해 확인합니다.
+    """
+    if isinstance(index, IndexBundle):
+        chunks = index.chunks
+        attributes = set()
+        if np.any(chunks.upload_date != UNKNOWN_DATE):
+            attributes.add("upload_date")
+        if np.any(~np.isnan(chunks.video_duration)):
+            attributes.update(("video_duration", "is_short"))
+        return frozenset(attributes)
+    if manifest and "video_attributes" in manifest:
+        return frozenset(manifest["video_attributes"]) & FILTER_ATTRIBUTES
+    probes = {
+        "upload_date": {"upload_date": {"$gt": UNKNOWN_DATE}},
+        "video_duration": {"video_duration": {"$gte": 0}},
+        "is_short": {"is_short": {"$in": [True, False]}},
+    }
+    return frozenset(name for name, where in probes.items() if index.get(where=where, limit=1, include=[])["ids"])
+
+
+def query_index(index, query_embedding, n_results: int, search_filter: Optional[SearchFilter] = None,
+                space: Optional[str] = None, shortlist: Optional[int] = None,
+                attributes: Iterable[str] = FILTER_ATTRIBUTES) -> Dict:
+    """
+    번들/ChromaDB 공통 검색 (ChromaDB query 결과 형식 + similarities)
+    distances는 백엔드마다 의미가 다르므로 (정규화한 번들의 제곱 L2, ChromaDB 컬렉션 설정의 거리)
+    순위 점수에는 두 백엔드 모두 코사인 유사도(similarities)를 씁니다.
+
+    Args:
+        index: IndexBundle 또는 ChromaDB 컬렉션
+        query_embedding: 쿼리 임베딩 (numpy 배열)
+        n_results: 결과 개수
+        search_filter: 사전 필터 (None이면 전체 검색)
+        space: 번들의 임베딩 공간 (None이면 기본 공간, ChromaDB 컬렉션은 자기 공간만 있음)
+        shortlist: 번들 2단계 검색의 1단계 후보 수 (None이면 정확 검색, ChromaDB는 자체 HNSW 사용)
+        attributes: ChromaDB 인덱스에 기록된 영상 속성 (available_attributes, where 절 생성용)
+    """
+    if search_filter is not None and search_filter.is_empty():
+        search_filter = None
+    if isinstance(index, IndexBundle):
+        return index.query([query_embedding], n_results=n_results, search_filter=search_filter, space=space,
+                           shortlist=shortlist)
+
+    kwargs = {}
+    if search_filter is not None:
+        where = search_filter.to_where(attributes)
+        if where is not None:
+            kwargs["where"] = where
+    query = np.asarray(query_embedding, dtype=np.float32)
+    results = index.query(query_embeddings=[query.tolist()], n_results=n_results,
+                          include=["documents", "metadatas", "distances", "embeddings"], **kwargs)
+    # 결과 청크 임베딩으로 코사인 유사도 계산 (임베딩은 결과에서 뺌)
+    embeddings = results.pop("embeddings", None)
+    vectors = np.asarray(embeddings[0] if embeddings is not None and len(embeddings) else [], dtype=np.float32)
+    if len(vectors):
+        norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query)
+        similarities = (vectors @ query) / np.where(norms > 0, norms, 1)
+    else:
+        similarities = np.zeros(0, dtype=np.float32)
+    results["similarities"] = [similarities.tolist()]
+    return results
+
+
+def benchmark(bundle: IndexBundle, num_queries: int = 200, top_k: int = 5, seed: int = 0):
+    """필터 없는 검색과 필터 검색의 지연 시간(p50/p95) 비교. 쿼리는 임의의 단위 벡터"""
+    import time
+
+    chunks = bundle.chunks
+    rng = np.random.default_rng(seed)
+    queries = rng.standard_normal((num_queries, bundle.vectors.shape[1])).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    dates = np.sort(chunks.upload_date[chunks.upload_date != UNKNOWN_DATE])
+    cases = {
+        "필터 없음": None,
+        "쇼츠 제외": SearchFilter(exclude_shorts=True),
+        "영상 1개": SearchFilter(video_ids=[chunks.video_ids[0]]),
+        "10분 이상": SearchFilter(min_duration=600),
+    }
+    if len(dates):
+        cases["최근 절반 기간"] = SearchFilter(date_from=int(dates[len(dates) // 2]))
+
+    print(f"청크 {len(chunks)}개, 영상 {chunks.num_videos}개, 쿼리 {num_queries}개, top-{top_k}")
+    print(f"{'조건':<12} {'후보 청크':>10} {'p50(ms)':>10} {'p95(ms)':>10}")
+    for name, search_filter in cases.items():
+        rows = search_filter.candidate_rows(chunks) if search_filter else None
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            query_index(bundle, query, top_k, search_filter)
+            timings.append((time.perf_counter() - start) * 1000)
+        p50, p95 = np.percentile(timings, [50, 95])
+        candidates = len(chunks) if rows is None else len(rows)
+        print(f"{name:<12} {candidates:>10} {p50:>10.3f} {p95:>10.3f}")
+    if not len(dates):
+        print("(업로드 날짜가 있는 영상이 없어 날짜 필터는 측정하지 않음)")
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    from pathlib import Path
+
+    from index_bundle import BUNDLE_FILE, DEFAULT_BUNDLE_PATH
+    from index_snapshots import DEFAULT_INDEX_ROOT, current_snapshot
+
+    parser = argparse.ArgumentParser(description="검색 필터 지연 시간 벤치마크")
+    parser.add_argument("--index-root", default=DEFAULT_INDEX_ROOT)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    _, path, _ = current_snapshot(args.index_root)
+    bundle_path = path / BUNDLE_FILE if path is not None else Path(os.getenv("GOMHEE_INDEX_BUNDLE", DEFAULT_BUNDLE_PATH))
+    benchmark(IndexBundle(bundle_path), num_queries=args.queries, top_k=args.top_k)
@@ -0,0 +1,295 @@
+"""
+검색 요청 단계별 지연 시간 계측 모듈
+쿼리 정규화, 임베딩, 벡터 검색, 재정렬, 결과 포맷팅, 렌더링 단계의 시간을 기록하고
+히스토그램으로 집계하여 Prometheus 텍스트 포맷 또는 로테이팅 로그로 내보냅니다.
+
+환경변수 SEARCH_METRICS 로 활성화합니다.
+    off (기본)   : 계측하지 않음 (no-op 타이머 사용)
+    prometheus  : data/metrics/search.prom 파일로 주기적으로 내보냄
+    log         : 요청마다 JSON 한 줄을 data/metrics/search_latency.log 에 기록
+    both        : 둘 다
+"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Dict, Optional
+
+# 검색 파이프라인 단계 (순서대로)
+STAGES = ("normalize", "embedding", "vector_search", "rerank", "format", "render")
+
+# 히스토그램 버킷 경계 (초 단위)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    """누적 버킷 히스토그램 (Prometheus histogram과 같은 의미)"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 마지막 칸은 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """
+        버킷 내 선형 보간으로 분위수를 추정합니다 (Prometheus histogram_quantile 방식).
+
+        Args:
+            q: 0~1 사이의 분위수 (예: 0.95)
+
+        Returns:
+            추정값 (초). 관측값이 없으면 0.0
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, self.counts):
+            if cumulative + count >= rank:
+                if count == 0:
+                    return bound
+                return lower + (bound - lower) * (rank - cumulative) / count
+            cumulative += count
+            lower = bound
+        return self.buckets[-1]
+
+
+class RequestTimer:
+    """한 번의 검색 요청에 대한 단계별 시간과 캐시 적중 여부"""
+
+    enabled = True
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.flags: Dict[str, bool] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def flag(self, name: str, value: bool = True):
+        """캐시 적중 등 요청 단위 플래그 기록 (예: flag("query_cache", hit))"""
+        self.flags[name] = bool(value)
+
+    def total(self) -> float:
+        return time.perf_counter() - self._start
+
+
+class _NullTimer:
+    """계측이 꺼져 있을 때 사용하는 no-op 타이머"""
+
+    enabled = False
+    stages: Dict[str, float] = {}
+    flags: Dict[str, bool] = {}
+    _context = nullcontext()
+
+    def stage(self, name: str):
+        return self._context
+
+    def flag(self, name: str, value: bool = True):
+        pass
+
+    def total(self) -> float:
+        return 0.0
+
+
+NULL_TIMER = _NullTimer()
+
+
+class SearchMetrics:
+    """
+    요청 타이머를 집계하여 히스토그램과 캐시 카운터로 관리하고 내보냅니다.
+    여러 Streamlit 세션이 공유하므로 내부 상태는 lock으로 보호합니다.
+    """
+
+    def __init__(
+        self,
+        mode: str = "off",
+        metrics_dir: str = "data/metrics",
+        export_interval: float = 10.0,
+        log_max_bytes: int = 5 * 1024 * 1024,
+        log_backup_count: int = 3
+    ):
+        """
+        Args:
+            mode: "off", "prometheus", "log", "both"
+            metrics_dir: 내보낼 파일이 저장될 디렉토리
+            export_interval: Prometheus 파일 갱신 최소 간격 (초)
+            log_max_bytes: 로그 파일 로테이션 크기
+            log_backup_count: 보관할 로그 파일 개수
+        """
+        mode = (mode or "off").lower()
+        if mode not in ("off", "prometheus", "log", "both"):
+            raise ValueError(f"Unknown metrics mode: {mode}. Choose 'off', 'prometheus', 'log' or 'both'")
+
+        self.mode = mode
+        self.enabled = mode != "off"
+        self.export_interval = export_interval
+        self.metrics_dir = Path(metrics_dir)
+        self.prometheus_file = self.metrics_dir / "search.prom"
+
+        self._lock = threading.Lock()
+        self._histograms = {name: Histogram() for name in STAGES + ("total",)}
+        self._cache_hits: Dict[str, int] = {}
+        self._cache_misses: Dict[str, int] = {}
+        self._requests = 0
+        self._last_export = 0.0
+        self._logger: Optional[logging.Logger] = None
+
+        if not self.enabled:
+            return
+
+        self.metrics_dir.mkdir(parents=True, exist_ok=True)
+        if mode in ("log", "both"):
+            self._logger = logging.getLogger(f"gomhee.search_metrics.{id(self)}")
+            self._logger.setLevel(logging.INFO)
+            self._logger.propagate = False
+            handler = RotatingFileHandler(
+                self.metrics_dir / "search_latency.log",
+                maxBytes=log_max_bytes,
+                backupCount=log_backup_count,
+                encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._logger.addHandler(handler)
+
+    def start_request(self):
+        """요청 타이머 생성 (비활성화 시 공유 no-op 타이머)"""
+        if not self.enabled:
+            return NULL_TIMER
+        return RequestTimer()
+
+    def finish_request(self, timer):
+        """요청 타이머를 집계하고 설정에 따라 로그/Prometheus 파일로 내보냅니다."""
+        if not timer.enabled:
+            return
+
+        total = timer.total()
+        with self._lock:
+            self._requests += 1
+            for name, seconds in timer.stages.items():
+                histogram = self._histograms.get(name)
+                if histogram is None:
+                    histogram = self._histograms[name] = Histogram()
+                histogram.observe(seconds)
+            self._histograms["total"].observe(total)
+            for name, hit in timer.flags.items():
+                counter = self._cache_hits if hit else self._cache_misses
+                counter[name] = counter.get(name, 0) + 1
+
+            export_due = time.time() - self._last_export >= self.export_interval
+            if export_due:
+                self._last_export = time.time()
+
+        if self._logger is not None:
+            self._logger.info(json.dumps({
+                "ts": round(timer.started_at, 3),
+                "total_ms": round(total * 1000, 2),
+                "stages_ms": {name: round(s * 1000, 2) for name, s in timer.stages.items()},
+                "cache": timer.flags
+            }, ensure_ascii=False))
+
+        if export_due and self.mode in ("prometheus", "both"):
+            self.write_prometheus()
+
+    def to_prometheus_text(self) -> str:
+        """현재 집계를 Prometheus text exposition 포맷으로 변환"""
+        lines = [
+            "# HELP gomhee_search_stage_seconds Search latency per pipeline stage.",
+            "# TYPE gomhee_search_stage_seconds histogram",
+        ]
+        with self._lock:
+            for name, histogram in self._histograms.items():
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'gomhee_search_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'gomhee_search_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {histogram.count}')
+                lines.append(f'gomhee_search_stage_seconds_sum{{stage="{name}"}} {histogram.sum:.6f}')
+                lines.append(f'gomhee_search_stage_seconds_count{{stage="{name}"}} {histogram.count}')
+
+            lines.append("# HELP gomhee_search_cache_total Cache lookups per cache and result.")
+            lines.append("# TYPE gomhee_search_cache_total counter")
+            for name in sorted(set(self._cache_hits) | set(self._cache_misses)):
+                lines.append(f'gomhee_search_cache_total{{cache="{name}",result="hit"}} {self._cache_hits.get(name, 0)}')
+                lines.append(f'gomhee_search_cache_total{{cache="{name}",result="miss"}} {self._cache_misses.get(name, 0)}')
+
+            lines.append("# HELP gomhee_search_requests_total Search requests observed.")
+            lines.append("# TYPE gomhee_search_requests_total counter")
+            lines.append(f"gomhee_search_requests_total {self._requests}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self):
+        """node_exporter textfile collector가 읽을 수 있도록 원자적으로 파일 교체"""
+        tmp_file = self.prometheus_file.with_suffix(".prom.tmp")
+        tmp_file.write_text(self.to_prometheus_text(), encoding="utf-8")
+        os.replace(tmp_file, self.prometheus_file)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """단계별 p50/p95/평균 (초)"""
+        with self._lock:
+            return {
+                name: {
+                    "count": h.count,
+                    "mean": h.sum / h.count if h.count else 0.0,
+                    "p50": h.quantile(0.50),
+                    "p95": h.quantile(0.95),
+                }
+                for name, h in self._histograms.items()
+                if h.count
+            }
+
+
+def get_search_metrics(mode: Optional[str] = None, **kwargs) -> SearchMetrics:
+    """
+    SearchMetrics 팩토리 함수
+
+    Args:
+        mode: 내보내기 모드 (None이면 환경변수 SEARCH_METRICS, 기본 "off")
+        **kwargs: SearchMetrics 추가 인자
+
+    Returns:
+        SearchMetrics 인스턴스
+    """
+    if mode is None:
+        mode = os.getenv("SEARCH_METRICS", "off")
+    return SearchMetrics(mode=mode, **kwargs)
+
+
+if __name__ == "__main__":
+    # 간단한 동작 확인
+    metrics = get_search_metrics("prometheus", export_interval=0)
+    for i in range(100):
+        timer = metrics.start_request()
+        with timer.stage("embedding"):
+            time.sleep(0.001 * (i % 5))
+        with timer.stage("vector_search"):
+            time.sleep(0.0005)
+        timer.flag("query_cache", i % 3 == 0)
+        metrics.finish_request(timer)
+
+    print(metrics.to_prometheus_text())
+    for name, stats in metrics.summary().items():
+        print(f"{name:>14}: p50={stats['p50']*1000:.2f}ms p95={stats['p95']*1000:.2f}ms")
@@ -0,0 +1,179 @@
+"""
+의미 기반 검색 결과 캐시
+"ISA 만기 연금 전환"과 "ISA 만기되면 연금으로 옮겨야 하나요?"처럼 표현만 다른 질문은 문자열 캐시로는 잡히지 않습니다.
+최근에 답한 질문들의 임베딩을 고정 크기 배열(ring buffer)에 보관하고, 새 질문의 임베딩과 코사인 유사도가
+threshold 이상인 항목이 있으면 저장된 순위 결과를 그대로 돌려줍니다 (메인 인덱스 검색/재정렬 생략).
+
+항목 수가 수백~수천 개 수준이므로 근사 검색 구조 대신 정규화된 벡터 행렬과의 내적 한 번으로 찾습니다
+(1024개 x 768차원에서 약 0.2ms로 쿼리 임베딩보다 훨씬 작음). 가득 차면 가장 오래 사용되지 않은 항목을 교체합니다(LRU).
+
+같은 질문이라도 인덱스 버전, top_k, 검색 필터가 다르면 결과가 다르므로 context가 같은 항목끼리만 비교합니다.
+"""
+import threading
+import time
+from typing import Dict, Hashable, Optional
+
+import numpy as np
+
+
+class SemanticCache:
+    """질문 임베딩 기준 검색 결과 캐시 (스레드 안전)"""
+
+    def __init__(self, max_entries: int = 512, threshold: float = 0.95, ttl: Optional[float] = None):
+        """
+        Args:
+            max_entries: 최대 항목 수
+            threshold: 캐시 적중으로 볼 최소 코사인 유사도
+            ttl: 항목 유효 시간 (초, None이면 만료 없음)
+        """
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.ndarray] = None  # 첫 저장 시 차원에 맞춰 생성
+        self._contexts = np.full(max_entries, -1, dtype=np.int64)  # context 번호, -1은 빈 칸
+        self._last_used = np.zeros(max_entries, dtype=np.int64)
+        self._created = np.zeros(max_entries, dtype=np.float64)
+        self._results = [None] * max_entries
+        self._context_numbers: Dict[Hashable, int] = {}
+        self._next_context = 0
+        self._clock = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _context_number(self, context: Hashable) -> int:
+        number = self._context_numbers.get(context)
+        if number is None:
+            number = self._context_numbers[context] = self._next_context
+            self._next_context += 1
+        return number
+
+    def lookup(self, query_embedding, context: Hashable = None):
+        """
+        유사한 질문의 결과 조회
+
+        Args:
+            query_embedding: 질문 임베딩
+            context: 결과에 영향을 주는 조건 (인덱스 버전, top_k, 필터 등)
+
+        Returns:
+            (저장된 결과, 코사인 유사도). 없으면 (None, 최고 유사도 또는 0)
+        """
+        vector = self._normalize(query_embedding)
+        with self._lock:
+            number = self._context_numbers.get(context)
+            if self._vectors is None or number is None or len(vector) != self._vectors.shape[1]:
+                self.misses += 1
+                return None, 0.0
+
+            similarities = self._vectors @ vector
+            valid = self._contexts == number
+            if self.ttl is not None:
+                valid &= time.time() - self._created < self.ttl
+            similarities = np.where(valid, similarities, -np.inf)
+            slot = int(np.argmax(similarities))
+            best = float(similarities[slot])
+            if best < self.threshold:
+                self.misses += 1
+                return None, max(best, 0.0)
+
+            self._clock += 1
+            self._last_used[slot] = self._clock
+            self.hits += 1
+            return self._results[slot], best
+
+    def store(self, query_embedding, results, context: Hashable = None):
+        """결과 저장 (가득 차면 가장 오래 사용되지 않은 항목 교체)"""
+        vector = self._normalize(query_embedding)
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != len(vector):
+                # 처음이거나 임베딩 차원이 바뀐 경우(모델 교체) 비우고 새로 시작
+                self._vectors = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+                self._contexts[:] = -1
+                self._results = [None] * self.max_entries
+                self._context_numbers.clear()
+
+            empty = np.flatnonzero(self._contexts < 0)
+            if len(empty):
+                slot = int(empty[0])
+            else:
+                slot = int(np.argmin(self._last_used))
+                self.evictions += 1
+
+            self._clock += 1
+            self._vectors[slot] = vector
+            self._contexts[slot] = self._context_number(context)
+            self._last_used[slot] = self._clock
+            self._created[slot] = time.time()
+            self._results[slot] = results
+
+            # 오래된 context(이전 인덱스 버전 등)가 쌓이지 않도록 사용 중인 것만 남김
+            if len(self._context_numbers) > self.max_entries:
+                used = set(self._contexts[self._contexts >= 0].tolist())
+                self._context_numbers = {c: n for c, n in self._context_numbers.items() if n in used}
+
+    def clear(self):
+        with self._lock:
+            self._contexts[:] = -1
+            self._results = [None] * self.max_entries
+            self._context_numbers.clear()
+
+    def __len__(self) -> int:
+        return int((self._contexts >= 0).sum())
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="의미 캐시 threshold 확인 / 조회 지연 측정")
+    parser.add_argument("--model-type", default="kosbert")
+    parser.add_argument("--threshold", type=float, default=0.95)
+    args = parser.parse_args()
+
+    # 같은 뜻의 질문 쌍과 다른 뜻의 질문 쌍의 유사도
+    pairs = [
+        ("ISA 만기 연금 전환", "ISA 만기되면 연금으로 옮겨야 하나요?"),
+        ("ISA 만기되면 연금으로 전환하는 게 좋을까요?", "ISA 만기 후 연금저축으로 전환해도 되나요"),
+        ("사회초년생 투자 시작 방법 알려줘", "사회초년생은 투자를 어떻게 시작하나요?"),
+        ("ISA 만기 연금 전환", "주택연금은 누가 가입하면 유리한가요?"),
+        ("커버드콜 ETF 투자", "사회초년생 투자 시작 방법 알려줘"),
+    ]
+    from embedding_service import get_embedding_model
+
+    model = get_embedding_model(args.model_type)
+    for first, second in pairs:
+        cache = SemanticCache(threshold=args.threshold)
+        cache.store(model.embed_query(first), [first])
+        _, similarity = cache.lookup(model.embed_query(second))
+        verdict = "적중" if similarity >= args.threshold else "미적중"
+        print(f"{similarity:.3f} {verdict:<4} {first} <-> {second}")
+
+    # 가득 찬 캐시에서의 조회 지연
+    dim = model.embedding_dim
+    full = SemanticCache(max_entries=1024, threshold=args.threshold)
+    rng = np.random.default_rng(0)
+    for vector in rng.standard_normal((1024, dim)):
+        full.store(vector, None)
+    queries = rng.standard_normal((1000, dim))
+    start = time.perf_counter()
+    for query in queries:
+        full.lookup(query)
+    print(f"조회 지연 (1024개, {dim}차원): {(time.perf_counter() - start) / len(queries) * 1e6:.1f} µs")
@@ -0,0 +1,530 @@
+"""
+YouTube 자막 수집기 (통합)
+커넥션 풀을 쓰는 requests.Session 하나를 모든 요청에 재사용하고, 비용이 낮은 방법부터 차례로 시도합니다.
+
+    1. transcript_api  youtube-transcript-api 라이브러리 (1.0 이상 설치된 경우, 같은 세션 사용)
+    2. timedtext       영상 페이지의 captionTracks에서 자막 XML 주소를 찾아 직접 요청
+    3. browser         헤드리스 Chrome(Selenium)으로 페이지를 연 뒤 2와 같은 방식 (browser_pool의 드라이버 재사용)
+
+자막이 없다고 확정되면(자막 비활성화, 자막 트랙 없음) 더 비싼 방법은 시도하지 않습니다.
+방법별 시도/성공/실패 횟수와 평균 지연을 기록하므로(stats) 대량 수집에서 어느 단계까지 내려가는지 확인할 수 있습니다.
+
+base_url을 바꾸면 로컬 모의 서버(mock_youtube_server.py)로 요청합니다 (자막 XML 주소도 같은 서버로 바뀜).
+
+사용 예:
+    python subtitle_fetcher.py REC2H8j2Bno
+    python subtitle_fetcher.py --mock                 # data/subtitles로 만든 로컬 모의 서버에서 전체 수집
+    python subtitle_fetcher.py REC2H8j2Bno --save     # subtitles_REC2H8j2Bno.json (chunk_subtitles 입력 형식)
+    python subtitle_fetcher.py --benchmark-xml        # 수 MB짜리 timedtext XML 파싱 시간/메모리
+"""
+import codecs
+import html
+import json
+import os
+import re
+import time
+from typing import Dict, Iterator, List, Optional, Sequence
+from urllib.parse import urlsplit, urlunsplit
+from xml.etree import ElementTree as ET
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_BASE_URL = "https://www.youtube.com"
+DEFAULT_STRATEGIES = ("transcript_api", "timedtext", "browser")
+USER_AGENT = ("Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7",
+    # br은 brotli 패키지가 없으면 requests가 풀지 못해 본문이 깨지므로 요청하지 않음
+    "Accept-Encoding": "gzip, deflate",
+}
+
+_PLAYER_RESPONSE = re.compile(r"ytInitialPlayerResponse\s*=\s*\{")
+_JSON_DECODER = json.JSONDecoder()
+# timedtext XML을 읽는 단위
+XML_CHUNK_SIZE = 64 * 1024
+# XML 자체 엔티티가 아닌 &는 &amp;로 바꿔 그대로 넘김 (&nbsp; 등은 html.unescape가 처리)
+_BARE_AMPERSAND = re.compile(r"&(?!(?:amp|lt|gt|quot|apos|#[0-9]+|#x[0-9a-fA-F]+);)")
+ENTITY_MAX_LENGTH = len("&#x10FFFF;")
+
+
+class NoSubtitles(Exception):
+    """영상에 자막이 없음 (다른 방법으로도 가져올 수 없음)"""
+
+
+class StrategyUnavailable(Exception):
+    """이 환경에서 쓸 수 없는 방법 (라이브러리 미설치 등)"""
+
+
+class FetchFailed(RuntimeError):
+    """모든 방법이 실패 (errors: 방법 이름 -> 그 방법의 오류, 마지막 오류가 __cause__)"""
+
+    def __init__(self, video_id: str, errors: Dict[str, BaseException]):
+        self.video_id = video_id
+        self.errors = errors
+        details = "; ".join(f"{name}: {type(error).__name__}: {error}" for name, error in errors.items())
+        super().__init__(f"{video_id}: 모든 자막 수집 방법이 실패했습니다 ({details or '쓸 수 있는 방법 없음'})")
+
+
+def extract_captions(page: str) -> Optional[Dict]:
+    """
+    영상 페이지 HTML의 ytInitialPlayerResponse에서 captions 부분을 꺼냅니다.
+    "ytInitialPlayerResponse =" 뒤의 여는 중괄호부터 json.JSONDecoder.raw_decode로 객체 하나만 파싱하므로
+    (C 파서, 문자열 안의 괄호나 "};"에 영향 없음, 객체 뒤의 스크립트는 읽지 않음) 정규식 + json.loads보다 빠르고
+    문자열에 "};"가 있어도 잘리지 않습니다. --benchmark-pages로 비교할 수 있습니다.
+
+    Returns:
+        captions dict. player response에 captions가 없으면 None
+
+    Raises:
+        ValueError: 페이지에 ytInitialPlayerResponse가 없거나 JSON이 닫히지 않음 (동의 페이지, 잘린 응답 등)
+    """
+    match = _PLAYER_RESPONSE.search(page)
+    if not match:
+        raise ValueError("페이지에서 ytInitialPlayerResponse를 찾지 못했습니다")
+    try:
+        player_response, _ = _JSON_DECODER.raw_decode(page, match.end() - 1)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"ytInitialPlayerResponse를 파싱하지 못했습니다 ({e})") from e
+    return player_response.get("captions")
+
+
+def caption_tracks(captions: Optional[Dict]) -> List[Dict]:
+    return (captions or {}).get("playerCaptionsTracklistRenderer", {}).get("captionTracks", [])
+
+
+def choose_track(tracks: List[Dict], languages: Sequence[str]) -> Dict:
+    """선호 언어 순서대로, 같은 언어면 수동 자막 우선. 없으면 첫 번째 트랙"""
+    for language in languages:
+        matches = [t for t in tracks if t.get("languageCode", "").startswith(language)]
+        if matches:
+            return min(matches, key=lambda t: t.get("kind") == "asr")
+    return tracks[0]
+
+
+def _cue(element) -> Optional[Dict]:
+    """<text start dur>(초) 또는 srv3 형식 <p t d>(밀리초) 요소 -> {start, duration, text}"""
+    # YouTube는 자막 내용을 한 번 더 이스케이프하므로(&amp;#39;) XML 해석 후 HTML 엔티티를 다시 풂
+    text = html.unescape("".join(element.itertext())).replace("\n", " ").strip()
+    if not text:
+        return None
+    if element.tag == "p":
+        return {"start": int(element.get("t", 0)) / 1000, "duration": int(element.get("d", 0)) / 1000, "text": text}
+    return {"start": float(element.get("start", 0)), "duration": float(element.get("dur", 0)), "text": text}
+
+
+def _chunks(source) -> Iterator:
+    if isinstance(source, (str, bytes)):
+        for start in range(0, len(source), XML_CHUNK_SIZE):
+            yield source[start:start + XML_CHUNK_SIZE]
+    elif hasattr(source, "read"):
+        while True:
+            chunk = source.read(XML_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+    else:
+        yield from source
+
+
+def iter_timedtext(source) -> Iterator[Dict]:
+    """
+    timedtext XML을 조금씩 읽으면서 자막 한 줄씩 {start, duration, text}로 내보냅니다
+    (chunk_subtitles.chunk_subtitle의 subtitles 형식). 처리한 요소는 바로 버리므로
+    수 MB짜리 자막도 메모리 사용량이 일정합니다.
+    XML에 정의되지 않은 엔티티(&nbsp; 등)나 이스케이프되지 않은 &도 파싱 오류 없이 처리합니다.
+
+    Args:
+        source: XML 문자열/bytes, 파일 객체, 또는 조각(bytes/str)의 iterable (response.iter_content 등)
+
+    Raises:
+        ValueError: 빈 응답
+        xml.etree.ElementTree.ParseError: XML이 아님
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    stack = []
+    pending = ""
+    seen_root = False
+
+    def events(text):
+        nonlocal seen_root
+        parser.feed(_BARE_AMPERSAND.sub("&amp;", text))
+        for event, element in parser.read_events():
+            if event == "start":
+                stack.append(element)
+                seen_root = True
+                continue
+            stack.pop()
+            if element.tag in ("text", "p"):
+                cue = _cue(element)
+                if stack:
+                    stack[-1].clear()  # 지금까지 읽은 형제 요소 버리기
+                if cue is not None:
+                    yield cue
+
+    for chunk in _chunks(source):
+        text = pending + (decoder.decode(chunk) if isinstance(chunk, bytes) else chunk)
+        # 조각 끝에서 잘린 엔티티(&am|p;)는 다음 조각과 합친 뒤에 판단
+        ampersand = text.rfind("&", max(0, len(text) - ENTITY_MAX_LENGTH))
+        if ampersand != -1 and ";" not in text[ampersand:]:
+            text, pending = text[:ampersand], text[ampersand:]
+        else:
+            pending = ""
+        yield from events(text)
+    yield from events(pending + decoder.decode(b"", final=True))
+    if not seen_root:
+        raise ValueError("빈 자막 응답")
+    parser.close()
+
+
+def parse_timedtext_xml(xml) -> List[Dict]:
+    """timedtext XML(<transcript><text start dur>)을 [{start, duration, text}]로"""
+    return list(iter_timedtext(xml))
+
+
+class StrategyStats:
+    """방법별 시도 결과"""
+
+    def __init__(self):
+        self.attempts = 0
+        self.successes = 0
+        self.no_subtitles = 0
+        self.failures = 0
+        self.unavailable = 0
+        self.seconds = 0.0
+
+    def as_dict(self) -> Dict:
+        return {
+            "attempts": self.attempts,
+            "successes": self.successes,
+            "no_subtitles": self.no_subtitles,
+            "failures": self.failures,
+            "unavailable": self.unavailable,
+            "success_rate": self.successes / self.attempts if self.attempts else 0.0,
+            "mean_seconds": self.seconds / self.attempts if self.attempts else 0.0,
+        }
+
+
+class SubtitleFetcher:
+    """비용이 낮은 방법부터 시도하는 자막 수집기 (세션/브라우저 재사용, 스레드 간 공유 불가)"""
+
+    def __init__(
+        self,
+        languages: Sequence[str] = ("ko",),
+        strategies: Sequence[str] = DEFAULT_STRATEGIES,
+        base_url: Optional[str] = None,
+        pool_size: int = 8,
+        timeout: float = 10.0,
+        session: Optional[requests.Session] = None,
+        browser_pool=None
+    ):
+        """
+        Args:
+            languages: 선호 자막 언어 (앞쪽 우선)
+            strategies: 시도할 방법 순서 (DEFAULT_STRATEGIES 중에서)
+            base_url: YouTube 주소 (None이면 실제 YouTube, 모의 서버 테스트용)
+            pool_size: 호스트별로 유지할 연결 수
+            timeout: 요청 타임아웃 (초)
+            session: 사용할 세션 (None이면 새로 만듦)
+            browser_pool: browser 방법에 쓸 browser_pool.BrowserPool (None이면 처음 쓸 때 드라이버 1개짜리 풀을 만듦)
+        """
+        unknown = set(strategies) - set(DEFAULT_STRATEGIES)
+        if unknown:
+            raise ValueError(f"알 수 없는 자막 수집 방법: {', '.join(sorted(unknown))}")
+        self.languages = list(languages)
+        self.strategies = list(strategies)
+        self.base_url = (base_url or DEFAULT_BASE_URL).rstrip("/")
+        self.timeout = timeout
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(HEADERS)
+        self.session = session
+        self._stats = {name: StrategyStats() for name in self.strategies}
+        self._transcript_api = None
+        self._browser_pool = browser_pool
+        self._owns_browser_pool = browser_pool is None
+
+    def fetch(self, video_id: str) -> Dict:
+        """
+        자막을 가져옵니다.
+
+        Returns:
+            {video_id, language, strategy, subtitles: [{start, duration, text}]}
+
+        Raises:
+            NoSubtitles: 자막이 없는 영상
+            FetchFailed: 모든 방법이 실패 (RuntimeError, 방법별 오류를 errors에 담고 마지막 오류를 원인으로 포함)
+        """
+        last_error = None
+        errors = {}
+        for name in self.strategies:
+            stats = self._stats[name]
+            start = time.perf_counter()
+            try:
+                language, subtitles = getattr(self, f"_fetch_{name}")(video_id)
+            except StrategyUnavailable:
+                stats.unavailable += 1
+                continue
+            except NoSubtitles:
+                stats.attempts += 1
+                stats.no_subtitles += 1
+                stats.seconds += time.perf_counter() - start
+                raise
+            except Exception as e:
+                stats.attempts += 1
+                stats.failures += 1
+                stats.seconds += time.perf_counter() - start
+                last_error = errors[name] = e
+                continue
+            stats.attempts += 1
+            stats.successes += 1
+            stats.seconds += time.perf_counter() - start
+            return {"video_id": video_id, "language": language, "strategy": name, "subtitles": subtitles}
+
+        raise FetchFailed(video_id, errors) from last_error
+
+    # 1. youtube-transcript-api
+    def _fetch_transcript_api(self, video_id: str):
+        if self.base_url != DEFAULT_BASE_URL:
+            raise StrategyUnavailable("transcript_api는 실제 YouTube에만 요청할 수 있음")
+        try:
+            from youtube_transcript_api import YouTubeTranscriptApi
+            from youtube_transcript_api._errors import NoTranscriptFound, TranscriptsDisabled
+        except ImportError:
+            raise StrategyUnavailable("youtube-transcript-api 미설치")
+
+        if self._transcript_api is None:
+            # 인스턴스 API(list/fetch, http_client)는 1.0부터. 이전 버전은 클래스 메서드(list_transcripts)만 있어
+            # 영상마다 AttributeError로 실패하므로 쓸 수 없는 방법으로 처리
+            if not hasattr(YouTubeTranscriptApi, "list"):
+                raise StrategyUnavailable("youtube-transcript-api 1.0 이상 필요 (pip install -U youtube-transcript-api)")
+            self._transcript_api = YouTubeTranscriptApi(http_client=self.session)
+        try:
+            transcript_list = self._transcript_api.list(video_id)
+            try:
+                transcript = transcript_list.find_transcript(self.languages)
+            except NoTranscriptFound:
+                # 선호 언어가 없으면 수동 자막, 그다음 자동 생성 자막 중 첫 번째
+                transcripts = sorted(transcript_list, key=lambda t: t.is_generated)
+                if not transcripts:
+                    raise NoSubtitles(video_id)
+                transcript = transcripts[0]
+            entries = transcript.fetch()
+        except (TranscriptsDisabled, NoTranscriptFound):
+            raise NoSubtitles(video_id)
+
+        subtitles = [{"start": e.start, "duration": e.duration, "text": e.text} for e in entries]
+        return transcript.language_code, subtitles
+
+    # 2. 페이지의 captionTracks -> timedtext XML
+    def _fetch_timedtext(self, video_id: str):
+        response = self.session.get(f"{self.base_url}/watch", params={"v": video_id}, timeout=self.timeout)
+        response.raise_for_status()
+        return self._subtitles_from_page(video_id, response.text)
+
+    # 3. 헤드리스 브라우저(풀에서 빌린 드라이버)로 페이지를 연 뒤 2와 같은 방식
+    def _fetch_browser(self, video_id: str):
+        if self._browser_pool is None:
+            from browser_pool import BrowserPool
+
+            self._browser_pool = BrowserPool(size=1, base_url=self.base_url, timeout=self.timeout)
+        return self.subtitles_from_captions(video_id, self._browser_pool.captions(video_id))
+
+    def _subtitles_from_page(self, video_id: str, page: str):
+        # player response가 없으면(동의 페이지/봇 확인 등) ValueError -> 다음 방법 시도
+        return self.subtitles_from_captions(video_id, extract_captions(page))
+
+    def subtitles_from_captions(self, video_id: str, captions: Optional[Dict]):
+        """player response의 captions에서 자막 트랙을 골라 timedtext XML을 받아옵니다 -> (언어, 자막)"""
+        tracks = caption_tracks(captions)
+        if not tracks:
+            raise NoSubtitles(video_id)
+        track = choose_track(tracks, self.languages)
+
+        with self.session.get(self._rebase(track["baseUrl"]), timeout=self.timeout, stream=True) as response:
+            response.raise_for_status()
+            subtitles = list(iter_timedtext(response.iter_content(XML_CHUNK_SIZE)))
+        return track.get("languageCode", ""), subtitles
+
+    def _rebase(self, url: str) -> str:
+        """자막 주소를 base_url 서버로 (모의 서버 테스트용, 실제 YouTube면 그대로)"""
+        if url.startswith("/"):
+            return self.base_url + url
+        if self.base_url == DEFAULT_BASE_URL:
+            return url
+        base = urlsplit(self.base_url)
+        return urlunsplit((base.scheme, base.netloc) + tuple(urlsplit(url))[2:])
+
+    def stats(self) -> Dict[str, Dict]:
+        return {name: stats.as_dict() for name, stats in self._stats.items()}
+
+    def print_stats(self):
+        print(f"{'방법':<16} {'시도':>6} {'성공':>6} {'자막없음':>8} {'실패':>6} {'미사용':>6} {'성공률':>8} {'평균(s)':>8}")
+        for name, s in self.stats().items():
+            print(f"{name:<16} {s['attempts']:>6} {s['successes']:>6} {s['no_subtitles']:>8} {s['failures']:>6} "
+                  f"{s['unavailable']:>6} {s['success_rate']:>8.1%} {s['mean_seconds']:>8.3f}")
+
+    def close(self):
+        if self._browser_pool is not None and self._owns_browser_pool:
+            self._browser_pool.close()
+            self._browser_pool = None
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def benchmark_extractors(pages: Dict[str, str], runs: int = 20):
+    """
+    captions 추출 방식별 페이지당 시간 비교 (ytInitialPlayerResponse가 없는 페이지는 건너뜀)
+        regex             기존 스크립트의 re.search(r'ytInitialPlayerResponse\\s*=\\s*({.+?});', DOTALL) + json.loads
+        extract_captions  raw_decode로 player response 객체 하나만 파싱
+    """
+    legacy = re.compile(r"ytInitialPlayerResponse\s*=\s*({.+?});", re.DOTALL)
+
+    def regex(page):
+        match = legacy.search(page)
+        if match is None:
+            raise ValueError("player response 없음")
+        return json.loads(match.group(1)).get("captions")
+
+    methods = {"regex": regex, "extract_captions": extract_captions}
+    print(f"{'페이지':<28} {'크기(KB)':>9} " + " ".join(f"{name + '(ms)':>22}" for name in methods))
+    for name, page in pages.items():
+        if not _PLAYER_RESPONSE.search(page):
+            print(f"{name[:28]:<28} ytInitialPlayerResponse 없음, 건너뜀 (동의 페이지, 압축된 채 저장된 응답 등)")
+            continue
+        expected = extract_captions(page)
+        cells = []
+        for method_name, method in methods.items():
+            try:
+                result = method(page)
+            except ValueError:
+                cells.append(f"{'실패':>22}")
+                continue
+            start = time.perf_counter()
+            for _ in range(runs):
+                method(page)
+            elapsed = (time.perf_counter() - start) / runs * 1000
+            mark = "" if result == expected else " (오답)"
+            cells.append(f"{f'{elapsed:.3f}{mark}':>22}")
+        print(f"{name[:28]:<28} {len(page.encode('utf-8')) // 1024:>9} " + " ".join(cells))
+
+
+def benchmark_xml_parsers(path: str, runs: int = 3):
+    """
+    timedtext XML 파일 파싱 시간과 최대 메모리(tracemalloc) 비교
+        tree       파일 전체를 읽어 ET.fromstring (이전 방식)
+        streaming  iter_timedtext로 XML_CHUNK_SIZE씩 읽기 (자막 줄은 세기만 하고 버림)
+    """
+    import tracemalloc
+
+    def tree():
+        with open(path, "r", encoding="utf-8") as f:
+            return sum(1 for element in ET.fromstring(f.read()).iter("text") if _cue(element))
+
+    def streaming():
+        with open(path, "rb") as f:
+            return sum(1 for _ in iter_timedtext(f))
+
+    print(f"{path}: {os.path.getsize(path) / 1024 / 1024:.1f}MB")
+    print(f"{'방식':<10} {'자막 줄':>10} {'시간(ms)':>10} {'최대 메모리(MB)':>16}")
+    for name, method in (("tree", tree), ("streaming", streaming)):
+        tracemalloc.start()
+        count = method()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        start = time.perf_counter()
+        for _ in range(runs):
+            method()
+        elapsed = (time.perf_counter() - start) / runs * 1000
+        print(f"{name:<10} {count:>10} {elapsed:>10.1f} {peak / 1024 / 1024:>16.2f}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="YouTube 자막 수집")
+    parser.add_argument("video_ids", nargs="*", default=["REC2H8j2Bno"])
+    parser.add_argument("--strategies", nargs="+", default=list(DEFAULT_STRATEGIES), choices=DEFAULT_STRATEGIES)
+    parser.add_argument("--base-url", default=None)
+    parser.add_argument("--mock", action="store_true", help="data/subtitles로 만든 로컬 모의 서버 사용 (전체 영상)")
+    parser.add_argument("--save", action="store_true",
+                        help="subtitles_<id>.json으로 저장 (download_subtitles와 같은 형식, chunk_subtitles 입력)")
+    parser.add_argument("--benchmark-pages", nargs="*", default=None, metavar="HTML",
+                        help="저장된 페이지로 captions 추출 방식 비교 (captions가 든 생성 페이지 350KB도 함께 측정, "
+                             "저장 페이지는 브라우저에서 '페이지 저장'한 영상 페이지)")
+    parser.add_argument("--benchmark-xml", nargs="?", const="", default=None, metavar="XML",
+                        help="timedtext XML 파싱 시간/메모리 비교 (파일을 주지 않으면 수 MB짜리 XML 생성)")
+    args = parser.parse_args()
+
+    if args.benchmark_xml is not None:
+        path = args.benchmark_xml
+        if not path:
+            import tempfile
+
+            from mock_youtube_server import timedtext_xml
+
+            cues = [{"start": i * 2.5, "duration": 3.0, "text": f"자막 {i}번째 줄 &amp; \"인용\" 'it's'"}
+                    for i in range(60000)]
+            path = os.path.join(tempfile.gettempdir(), "timedtext_benchmark.xml")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(timedtext_xml(cues))
+        benchmark_xml_parsers(path)
+        raise SystemExit
+
+    if args.benchmark_pages is not None:
+        from pathlib import Path
+
+        from mock_youtube_server import watch_page
+
+        captions = {"playerCaptionsTracklistRenderer": {"captionTracks": [
+            {"baseUrl": "/api/timedtext?v=x&lang=ko", "languageCode": "ko"}]}}
+        pages = {path: Path(path).read_text(encoding="utf-8", errors="replace")
+                 for path in args.benchmark_pages}
+        pages["생성 페이지 (350KB)"] = watch_page({"captions": captions}, padding_kb=350)
+        pages["생성 페이지 (문자열에 }; 없음)"] = watch_page({"captions": captions}, 350, braces_in_strings=False)
+        pages["생성 페이지 (자막 없음)"] = watch_page({}, padding_kb=350)
+        benchmark_extractors(pages)
+        raise SystemExit
+
+    server = None
+    video_ids = args.video_ids
+    if args.mock:
+        from mock_youtube_server import MockYouTubeServer
+
+        server = MockYouTubeServer().start()
+        args.base_url = server.base_url
+        video_ids = server.video_ids() + ["no_subtitles"]
+
+    start = time.perf_counter()
+    with SubtitleFetcher(strategies=args.strategies, base_url=args.base_url) as fetcher:
+        for video_id in video_ids:
+            try:
+                result = fetcher.fetch(video_id)
+            except NoSubtitles:
+                print(f"{video_id}: 자막 없음")
+                continue
+            except RuntimeError as e:
+                print(e)
+                continue
+            subtitles = result["subtitles"]
+            print(f"{video_id}: {len(subtitles)}줄 ({result['language']}, {result['strategy']})")
+            if args.save:
+                with open(f"subtitles_{video_id}.json", "w", encoding="utf-8") as f:
+                    json.dump({"video_id": video_id, "title": "", "language": result["language"],
+                               "subtitles": subtitles}, f, ensure_ascii=False, indent=2)
+        print(f"\n{len(video_ids)}개 영상, {time.perf_counter() - start:.2f}s")
+        fetcher.print_stats()
+    if server is not None:
+        print(f"모의 서버: 요청 {server.requests}개, 연결 {server.connections}개")
+        server.stop()
@@ -4,6 +4,9 @@
 import chromadb
 from embedding_service import get_embedding_model
 from chunk_subtitles import format_timestamp
+from index_bundle import BUNDLE_FILE, IndexBundle
+from index_snapshots import current_snapshot
+from search_filters import query_index
 
 # 테스트 질문 5개 (수집된 36개 영상 기반)
 TEST_QUESTIONS = [
@@ -14,15 +17,17 @@ TEST_QUESTIONS = [
     "은퇴 후 연금 수령은 어떻게 계획해야 하나요?"
 ]
 
-def search_videos(query, collection, embedding_model, top_k=5):
+def search_videos(query, collection, embedding_model, top_k=5, space=None, shortlist=None):
     """
     쿼리에 대한 관련 영상 검색
     
     Args:
         query: 검색 쿼리
-        collection: ChromaDB 컬렉션
-        embedding_model: 임베딩 모델
+        collection: IndexBundle 또는 ChromaDB 컬렉션
+        embedding_model: 임베딩 모델 (space의 모델과 같아야 함)
         top_k: 반환할 결과 개수
+        space: 번들의 임베딩 공간 (None이면 기본 공간)
+        shortlist: 번들 2단계 검색의 1단계 후보 수 (None이면 정확 검색)
     
     Returns:
         검색 결과 리스트
@@ -31,10 +36,7 @@ def search_videos(query, collection, embedding_model, top_k=5):
     query_embedding = embedding_model.embed_query(query)
     
     # 검색
-    results = collection.query(
-        query_embeddings=[query_embedding.tolist()],
-        n_results=top_k
-    )
+    results = query_index(collection, query_embedding, top_k, space=space, shortlist=shortlist)
     
     # 결과 포맷팅
     formatted_results = []
@@ -61,25 +63,44 @@ def search_videos(query, collection, embedding_model, top_k=5):
     
     return formatted_results
 
-def run_tests(db_path="data/chroma_db", collection_name="gomhee_videos", model_type="kosbert"):
+def run_tests(index_root="data/index", collection_name="gomhee_videos", model_type="kosbert", shortlist=None):
     """
     5개 테스트 질문으로 검색 성능 평가
+    스냅샷 번들에 임베딩 공간이 여러 개면 모든 공간의 결과를 나란히 출력합니다 (모델 A/B 비교).
+    (배포된 스냅샷이 없으면 기존 data/chroma_db 사용)
     """
     print("="*80)
     print("박곰희TV 영상 추천 시스템 - 검색 성능 테스트")
     print("="*80)
     print()
     
-    # ChromaDB 로드
-    print(f"ChromaDB 로딩: {db_path}")
-    client = chromadb.PersistentClient(path=db_path)
-    collection = client.get_collection(name=collection_name)
-    print(f"컬렉션 '{collection_name}' 로드됨 (문서 수: {collection.count()})")
+    # 인덱스 로드 (스냅샷에 번들이 있으면 번들, 없으면 ChromaDB)
+    version, snapshot_dir, manifest = current_snapshot(index_root)
+    if snapshot_dir is not None and (snapshot_dir / BUNDLE_FILE).exists():
+        print(f"인덱스 스냅샷: {version} ({manifest['chunk_count']}개 청크)")
+        collection = IndexBundle(snapshot_dir / BUNDLE_FILE)
+        spaces = {space: collection.space_info(space).get("model_type", space) for space in collection.spaces}
+        print(f"번들 로드됨 (임베딩 공간: {', '.join(spaces)}, 기본: {collection.default_space})")
+    else:
+        if snapshot_dir is None:
+            db_path = "data/chroma_db"
+        else:
+            db_path = str(snapshot_dir / "chroma")
+            collection_name = manifest["collection_name"]
+            model_type = manifest.get("model_type", model_type)
+            print(f"인덱스 스냅샷: {version} ({manifest['model_name']}, {manifest['chunk_count']}개 청크)")
+        print(f"ChromaDB 로딩: {db_path}")
+        client = chromadb.PersistentClient(path=db_path)
+        collection = client.get_collection(name=collection_name)
+        print(f"컬렉션 '{collection_name}' 로드됨 (문서 수: {collection.count()})")
+        spaces = {None: model_type}
     print()
     
-    # 임베딩 모델 로드
-    print(f"임베딩 모델 로딩: {model_type}")
-    embedding_model = get_embedding_model(model_type)
+    # 임베딩 모델 로드 (공간마다 해당 모델)
+    embedding_models = {}
+    for space, space_model_type in spaces.items():
+        print(f"임베딩 모델 로딩: {space_model_type}")
+        embedding_models[space] = get_embedding_model(space_model_type)
     print()
     
     # 각 질문에 대해 검색 수행
@@ -89,16 +110,18 @@ def run_tests(db_path="data/chroma_db", collection_name="gomhee_videos", model_t
         print("="*80)
         print()
         
-        results = search_videos(question, collection, embedding_model, top_k=5)
-        
-        print(f"Top-5 추천 영상:\n")
-        for j, result in enumerate(results, 1):
-            print(f"{j}. {result['title']}")
-            print(f"   ⏰ 시간: {result['timestamp']} ({result['start_time']:.0f}s - {result['end_time']:.0f}s)")
-            print(f"   📊 유사도: {result['similarity_score']:.4f}")
-            print(f"   🔗 URL: {result['url']}")
-            print(f"   📝 내용: {result['snippet']}")
-            print()
+        for space, embedding_model in embedding_models.items():
+            results = search_videos(question, collection, embedding_model, top_k=5, space=space, shortlist=shortlist)
+            
+            label = f" [{space}]" if len(embedding_models) > 1 else ""
+            print(f"Top-5 추천 영상{label}:\n")
+            for j, result in enumerate(results, 1):
+                print(f"{j}. {result['title']}")
+                print(f"   ⏰ 시간: {result['timestamp']} ({result['start_time']:.0f}s - {result['end_time']:.0f}s)")
+                print(f"   📊 유사도: {result['similarity_score']:.4f}")
+                print(f"   🔗 URL: {result['url']}")
+                print(f"   📝 내용: {result['snippet']}")
+                print()
         
         print()
     
@@ -113,8 +136,15 @@ def run_tests(db_path="data/chroma_db", collection_name="gomhee_videos", model_t
     print()
 
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="테스트 질문 검색")
+    parser.add_argument("--shortlist", type=int, default=None, help="2단계 검색 후보 수 (기본: 정확 검색)")
+    args = parser.parse_args()
+    
     run_tests(
-        db_path="data/chroma_db",
+        index_root="data/index",
         collection_name="gomhee_videos",
-        model_type="kosbert"
+        model_type="kosbert",
+        shortlist=args.shortlist
     )
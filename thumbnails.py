@@ -0,0 +1,242 @@
+"""
+영상 썸네일 로컬 캐시
+카드마다 img.youtube.com의 hqdefault.jpg(480x360, 위아래 검은 띠 포함)를 직접 불러오면, 모바일에서는 썸네일이
+페이지 용량의 대부분을 차지하고 결과마다 외부 서버 왕복이 생깁니다. 빌드 단계에서 videos_metadata.json의 모든 영상
+썸네일을 한 번 받아, 카드에 보이는 16:9 영역만 잘라 작은 WebP로 static/thumbnails에 저장합니다. 앱은 이 파일을
+Streamlit 정적 파일 서빙(.streamlit/config.toml의 enableStaticServing)으로 직접 제공합니다.
+
+- URL에 내용 해시(?v=)를 붙임: 파일이 바뀌면 주소도 바뀌고, 정적 파일 핸들러(tornado)는 ?v= 요청에
+  장기 캐시 헤더(Cache-Control max-age 10년)를 붙이므로 브라우저가 다시 요청하지 않음
+- 캐시에 없는 영상(빌드 후 추가된 영상, 받기 실패)은 원래 YouTube 주소로 대체
+- Pillow가 없으면 자르기/변환 없이 원본 JPEG를 그대로 저장
+- 이미지 소스(fetch)를 주입할 수 있어 네트워크 없이 시험 가능 (mock_youtube_server가 /vi/<id>/hqdefault.jpg 제공)
+
+사용 예:
+    python thumbnails.py build                  # 없는 썸네일만 받아 변환
+    python thumbnails.py build --mock           # 모의 서버가 만든 이미지로 시험
+    python thumbnails.py stats
+"""
+import hashlib
+import io
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_THUMBNAIL_DIR = "static/thumbnails"
+# Streamlit은 static/ 아래 파일을 app/static/ 경로로 제공
+STATIC_URL_PREFIX = "app/static/thumbnails"
+DEFAULT_IMAGE_BASE_URL = "https://img.youtube.com"
+INDEX_FILE = "index.json"
+# 카드 폭에 맞춘 변형 (원본 폭 480을 넘지 않음). 여러 개면 srcset으로 브라우저가 고름
+DEFAULT_WIDTHS = (480,)
+DEFAULT_QUALITY = 70
+ASPECT_RATIO = 16 / 9
+
+
+def remote_url(video_id: str, base_url: str = DEFAULT_IMAGE_BASE_URL) -> str:
+    return f"{base_url.rstrip('/')}/vi/{video_id}/hqdefault.jpg"
+
+
+def http_fetcher(base_url: Optional[str] = None, timeout: float = 10.0) -> Callable[[str], bytes]:
+    """video_id -> 원본 썸네일 바이트 (연결을 재사용하는 requests 세션)"""
+    import requests
+
+    session = requests.Session()
+    base_url = base_url or DEFAULT_IMAGE_BASE_URL
+
+    def fetch(video_id: str) -> bytes:
+        response = session.get(remote_url(video_id, base_url), timeout=timeout)
+        response.raise_for_status()
+        return response.content
+
+    return fetch
+
+
+def resize_variants(data: bytes, widths: Sequence[int] = DEFAULT_WIDTHS,
+                    quality: int = DEFAULT_QUALITY) -> Dict[int, Tuple[str, bytes]]:
+    """
+    원본 이미지 -> {폭: (확장자, 이미지 바이트)}.
+    카드(object-fit: cover, 16:9)에 보이는 가운데 영역만 잘라 폭별로 줄입니다 (원본보다 키우지 않음).
+    Pillow가 없으면 {0: ("jpg", 원본)}
+    """
+    try:
+        from PIL import Image, features
+    except ImportError:
+        return {0: ("jpg", data)}
+
+    image = Image.open(io.BytesIO(data)).convert("RGB")
+    height = min(image.height, round(image.width / ASPECT_RATIO))
+    top = (image.height - height) // 2
+    image = image.crop((0, top, image.width, top + height))
+
+    if features.check("webp"):
+        extension, options = "webp", {"format": "WEBP", "quality": quality, "method": 6}
+    else:
+        extension, options = "jpg", {"format": "JPEG", "quality": quality, "optimize": True, "progressive": True}
+    variants = {}
+    for width in sorted({min(width, image.width) for width in widths}):
+        resized = image if width == image.width else image.resize((width, round(width / image.width * image.height)),
+                                                                  Image.LANCZOS)
+        buffer = io.BytesIO()
+        resized.save(buffer, **options)
+        variants[width] = (extension, buffer.getvalue())
+    return variants
+
+
+def load_video_ids(metadata_file: str = "data/videos_metadata.json") -> List[str]:
+    with open(metadata_file, "r", encoding="utf-8") as f:
+        return [video["video_id"] for video in json.load(f)]
+
+
+def _write_atomic(path: Path, data: bytes):
+    tmp_file = path.with_name(path.name + ".tmp")
+    tmp_file.write_bytes(data)
+    os.replace(tmp_file, path)
+
+
+class ThumbnailCache:
+    """static/thumbnails의 썸네일과 그 목록(index.json)"""
+
+    def __init__(self, directory: str = DEFAULT_THUMBNAIL_DIR, url_prefix: str = STATIC_URL_PREFIX,
+                 fallback_base_url: str = DEFAULT_IMAGE_BASE_URL):
+        """
+        Args:
+            directory: 썸네일 디렉토리 (Streamlit 정적 서빙이면 static/ 아래)
+            url_prefix: 브라우저에서 directory에 접근하는 경로
+            fallback_base_url: 캐시에 없는 영상의 썸네일 서버
+        """
+        self.directory = Path(directory)
+        self.url_prefix = url_prefix.rstrip("/")
+        self.fallback_base_url = fallback_base_url
+        # video_id -> {"version": 내용 해시, "files": {폭: 파일 이름}, "source_bytes": 원본 크기}
+        self.index: Dict[str, Dict] = {}
+        index_file = self.directory / INDEX_FILE
+        if index_file.exists():
+            with open(index_file, "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+
+    def sources(self, video_id: str) -> Tuple[str, str]:
+        """카드 img의 (src, srcset). 캐시에 없으면 (YouTube 썸네일 주소, "")"""
+        entry = self.index.get(video_id)
+        if entry is None:
+            return remote_url(video_id, self.fallback_base_url), ""
+        urls = sorted((int(width), f"{self.url_prefix}/{name}?v={entry['version']}")
+                      for width, name in entry["files"].items())
+        srcset = ", ".join(f"{url} {width}w" for width, url in urls) if len(urls) > 1 else ""
+        return urls[-1][1], srcset
+
+    def _cached(self, video_id: str) -> bool:
+        entry = self.index.get(video_id)
+        return entry is not None and all((self.directory / name).exists() for name in entry["files"].values())
+
+    def _store(self, video_id: str, data: bytes, widths: Sequence[int], quality: int) -> Dict:
+        variants = resize_variants(data, widths, quality)
+        digest = hashlib.sha256()
+        files = {}
+        for width, (extension, image) in variants.items():
+            name = f"{video_id}-{width}.{extension}" if width else f"{video_id}.{extension}"
+            _write_atomic(self.directory / name, image)
+            digest.update(image)
+            files[str(width)] = name
+        return {"version": digest.hexdigest()[:12], "files": files, "source_bytes": len(data)}
+
+    def build(self, video_ids: Iterable[str], fetch: Callable[[str], bytes], widths: Sequence[int] = DEFAULT_WIDTHS,
+              quality: int = DEFAULT_QUALITY, workers: int = 8, force: bool = False) -> Dict:
+        """
+        캐시에 없는 영상의 썸네일을 받아 변환해 저장하고 index.json을 갱신합니다.
+
+        Args:
+            video_ids: 영상 ID
+            fetch: video_id -> 원본 이미지 바이트 (http_fetcher, 시험용 함수)
+            widths: 저장할 폭
+            quality: WebP/JPEG 품질
+            workers: 동시에 받을 수
+            force: 이미 있는 썸네일도 다시 받음
+
+        Returns:
+            {fetched, skipped, failed: {video_id: 오류}, source_bytes, stored_bytes, seconds}
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        video_ids = list(dict.fromkeys(video_ids))
+        todo = [video_id for video_id in video_ids if force or not self._cached(video_id)]
+        failed = {}
+
+        def work(video_id):
+            try:
+                return video_id, self._store(video_id, fetch(video_id), widths, quality)
+            except Exception as e:
+                failed[video_id] = e
+                return video_id, None
+
+        start = time.perf_counter()
+        fetched = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for video_id, entry in executor.map(work, todo):
+                if entry is not None:
+                    fetched[video_id] = self.index[video_id] = entry
+        _write_atomic(self.directory / INDEX_FILE,
+                      json.dumps(self.index, ensure_ascii=False, indent=1, sort_keys=True).encode("utf-8"))
+        return {
+            "fetched": len(fetched),
+            "skipped": len(video_ids) - len(todo),
+            "failed": failed,
+            "source_bytes": sum(entry["source_bytes"] for entry in fetched.values()),
+            "stored_bytes": sum((self.directory / name).stat().st_size
+                                for entry in fetched.values() for name in entry["files"].values()),
+            "seconds": time.perf_counter() - start,
+        }
+
+    def print_stats(self):
+        if not self.index:
+            print(f"썸네일 캐시가 비어 있습니다: {self.directory}")
+            return
+        source = sum(entry["source_bytes"] for entry in self.index.values())
+        largest = [max(entry["files"].items(), key=lambda item: int(item[0]))[1] for entry in self.index.values()]
+        stored = sum((self.directory / name).stat().st_size for name in largest if (self.directory / name).exists())
+        count = len(self.index)
+        print(f"영상 {count}개: 원본 평균 {source / count / 1024:.1f}KB -> 카드 이미지 평균 {stored / count / 1024:.1f}KB "
+              f"({stored / source:.0%})")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="썸네일 로컬 캐시")
+    parser.add_argument("command", choices=["build", "stats"])
+    parser.add_argument("--dir", default=DEFAULT_THUMBNAIL_DIR)
+    parser.add_argument("--metadata", default="data/videos_metadata.json")
+    parser.add_argument("--widths", type=int, nargs="+", default=list(DEFAULT_WIDTHS))
+    parser.add_argument("--quality", type=int, default=DEFAULT_QUALITY)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--limit", type=int, default=None, help="앞에서부터 이 수만큼의 영상만")
+    parser.add_argument("--force", action="store_true", help="이미 있는 썸네일도 다시 받음")
+    parser.add_argument("--mock", action="store_true", help="모의 서버가 만든 이미지로 시험 (네트워크 없음)")
+    args = parser.parse_args()
+
+    cache = ThumbnailCache(args.dir)
+    if args.command == "stats":
+        cache.print_stats()
+    else:
+        server = None
+        base_url = None
+        if args.mock:
+            from mock_youtube_server import MockYouTubeServer
+
+            server = MockYouTubeServer().start()
+            base_url = server.base_url
+        try:
+            summary = cache.build(load_video_ids(args.metadata)[:args.limit], http_fetcher(base_url), args.widths,
+                                  args.quality, args.workers, args.force)
+        finally:
+            if server is not None:
+                server.stop()
+        print(f"받음 {summary['fetched']}개, 이미 있음 {summary['skipped']}개, 실패 {len(summary['failed'])}개 "
+              f"({summary['seconds']:.1f}s)")
+        if summary["fetched"]:
+            print(f"원본 {summary['source_bytes'] / 1024:.0f}KB -> 저장 {summary['stored_bytes'] / 1024:.0f}KB")
+        for video_id, error in list(summary["failed"].items())[:10]:
+            print(f"  {video_id}: {error}")
+        cache.print_stats()